@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for Source Snatcher.
+
+Run a benchmark with ``python -m benchmarks.<name>`` from the repository root.
+"""
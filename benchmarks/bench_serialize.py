@@ -0,0 +1,103 @@
+"""
+Benchmark the output serializers on the test fixtures' project shapes.
+
+Usage:
+    python -m benchmarks.bench_serialize [--copies 2000] [--repeat 3]
+
+The files of the test fixture project (short text, JSON and Python
+files) are replicated --copies times, plus a share of larger multi-line
+modules, and written with each backend to an in-memory stream. The
+yaml.dump and json.dump rows are the whole-document calls the writers
+replaced.
+"""
+
+import argparse
+import io
+import json
+import time
+from typing import Callable, Dict
+
+import yaml
+
+from sourcesnatcher.writers import JsonWriter, YamlWriter
+
+# Contents of tests/conftest.py's temp_project_dir
+FIXTURE_FILES = {
+    'test.txt': 'test content',
+    'test.json': '{"test": "content"}',
+    'test.py': 'print("test")',
+    'src/test.py': 'print("src test")',
+}
+
+MODULE = ''.join(f"def function_{i}(value):\n    return value * {i}  # ☃\n\n"
+                 for i in range(40))
+
+
+def make_files(copies: int) -> Dict[str, str]:
+    files = {}
+    for i in range(copies):
+        for relpath, contents in FIXTURE_FILES.items():
+            files[f"pkg{i:05d}/{relpath}"] = contents
+        if i % 4 == 0:
+            files[f"pkg{i:05d}/module.py"] = MODULE
+    return files
+
+
+def streaming(writer_class, **kwargs) -> Callable[[str, Dict[str, str]], str]:
+    def write(tree, files):
+        stream = io.StringIO()
+        writer = writer_class(stream, **kwargs)
+        writer.begin(tree)
+        for relpath, contents in files.items():
+            writer.write_file(relpath, contents)
+        writer.end()
+        return stream.getvalue()
+    return write
+
+
+def whole_yaml(tree, files):
+    return yaml.dump({'tree': tree, 'files': files}, Dumper=yaml.Dumper)
+
+
+def whole_json(tree, files):
+    return json.dumps({'tree': tree, 'files': files}, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--copies', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    files = make_files(args.copies)
+    tree = '\n'.join(['project', *files])
+    size = sum(len(contents) for contents in files.values())
+    print(f"{len(files)} files, {size / 1e6:.1f} MB of contents")
+
+    backends = [
+        ('yaml.dump', whole_yaml),
+        ('yaml python', streaming(YamlWriter, dumper=yaml.SafeDumper)),
+    ]
+    if hasattr(yaml, 'CSafeDumper'):
+        backends.append(('yaml libyaml', streaming(YamlWriter, dumper=yaml.CSafeDumper)))
+    else:
+        print("PyYAML was built without libyaml; skipping the C emitter")
+    backends += [
+        ('json.dump', whole_json),
+        ('json', streaming(JsonWriter)),
+        ('json compact', streaming(JsonWriter, compact=True)),
+    ]
+
+    for name, write in backends:
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            output = write(tree, files)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:<14} {best:8.3f}s  {size / best / 1e6:8.1f} MB/s  "
+              f"{len(output) / 1e6:6.1f} MB out")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark command line startup time.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 20] [--target-ms 60]
+
+Batch wrappers start capture-project once per project, so on small
+projects interpreter startup and module imports dominate. Each command is
+run --runs times in a fresh interpreter and the median wall time is
+reported next to a bare interpreter, which is the floor. Exits with
+status 1 if `--help` takes more than --target-ms over the floor; the
+target is relative so that it holds on slower and faster machines alike
+(about 35-45 ms over the floor at the time of writing, mostly argparse).
+
+For a per-module breakdown, run:
+    python -X importtime -m sourcesnatcher --help
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+COMMANDS = [
+    ('python (floor)', ['-c', 'pass']),
+    ('--help', ['-m', 'sourcesnatcher', '--help']),
+    ('import capture_project', ['-c', 'import sourcesnatcher.capture_project']),
+    ('import yaml writer', ['-c', 'import sourcesnatcher.yamlwriter']),
+]
+
+
+def median_ms(args: List[str], runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--target-ms', type=float, default=60.0,
+                        help='Most milliseconds --help may take over the bare interpreter')
+    args = parser.parse_args()
+
+    results = {}
+    for name, command in COMMANDS:
+        results[name] = median_ms(command, args.runs)
+        print(f"{name:<24} {results[name]:7.1f} ms")
+
+    over_ms = results['--help'] - results['python (floor)']
+    print(f"--help is {over_ms:.1f} ms over the bare interpreter")
+    if over_ms > args.target_ms:
+        print(f"FAIL: --help took {over_ms:.1f} ms over the floor "
+              f"(target {args.target_ms:.0f} ms)")
+        sys.exit(1)
+    print(f"OK: --help under {args.target_ms:.0f} ms over the floor")
+
+
+if __name__ == '__main__':
+    main()
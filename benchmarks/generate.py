@@ -0,0 +1,146 @@
+"""
+Deterministic generator of synthetic project trees.
+
+Usage:
+    python -m benchmarks.generate ROOT [--files 10000] [--depth 4] [--fanout 6]
+                                       [--median-bytes 2048] [--size-sigma 1.2]
+                                       [--binary-ratio 0.05] [--excluded-ratio 0.1]
+                                       [--seed 0]
+
+The same spec and seed always produce the same tree: directory names,
+file names, sizes and contents all come from one seeded generator.
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import Dict, List, NamedTuple
+
+TEXT_SUFFIXES = ['.py', '.md', '.json', '.yaml', '.txt', '.conf']
+BINARY_SUFFIXES = ['.png', '.so', '.bin', '.jar']
+# Directories ProjectCapture excludes by default
+EXCLUDED_DIRS = ['node_modules', '__pycache__', 'venv', '.git', 'lib']
+
+WORDS = ['value', 'config', 'result', 'items', 'handler', 'request', 'index',
+         'return', 'import', 'self', 'data', 'name', 'path', 'None', 'True']
+
+
+class TreeSpec(NamedTuple):
+    """Shape of a synthetic project."""
+    files: int = 10000
+    # Levels of directories below the root
+    depth: int = 4
+    # Subdirectories per directory
+    fanout: int = 6
+    # File sizes follow a log-normal distribution around median_bytes
+    median_bytes: int = 2048
+    size_sigma: float = 1.2
+    max_bytes: int = 4 * 1024 * 1024
+    # Share of files with binary contents and suffixes
+    binary_ratio: float = 0.05
+    # Chance that a directory also holds an excluded directory (node_modules,
+    # ...), and the share of files placed in those directories
+    excluded_ratio: float = 0.1
+    seed: int = 0
+
+
+# Named shapes used by the runner
+PROFILES: Dict[str, TreeSpec] = {
+    'small': TreeSpec(files=2000),
+    'wide': TreeSpec(files=20000, depth=2, fanout=40),
+    'deep': TreeSpec(files=20000, depth=10, fanout=2),
+    'large-files': TreeSpec(files=500, median_bytes=256 * 1024, size_sigma=0.8),
+    'mixed': TreeSpec(files=20000, binary_ratio=0.3, excluded_ratio=0.4),
+}
+
+
+def _directories(spec: TreeSpec, rng: random.Random) -> List[str]:
+    """All directory relpaths of a full tree of the given depth and fanout."""
+    dirs = ['']
+    level = ['']
+    for depth in range(spec.depth):
+        next_level = []
+        for parent in level:
+            for i in range(spec.fanout):
+                name = f"{rng.choice(WORDS)}{depth}_{i}"
+                next_level.append(os.path.join(parent, name) if parent else name)
+        dirs.extend(next_level)
+        level = next_level
+    return dirs
+
+
+def _random_bytes(rng: random.Random, size: int) -> bytes:
+    return rng.getrandbits(8 * size).to_bytes(size, 'little') if size else b''
+
+
+def _line_pool(rng: random.Random, count: int = 4096) -> List[str]:
+    return [' ' * (4 * rng.randint(0, 3)) + ' '.join(rng.choices(WORDS, k=rng.randint(2, 10)))
+            for _ in range(count)]
+
+
+def _text(rng: random.Random, pool: List[str], size: int) -> bytes:
+    # Lines average about 40 bytes; draw enough to cover size, then cut
+    lines = rng.choices(pool, k=size // 30 + 1)
+    return '\n'.join(lines).encode()[:size]
+
+
+def generate_tree(root: str, spec: TreeSpec = TreeSpec()) -> Dict[str, int]:
+    """
+    Write a synthetic project under root, which must not exist yet.
+
+    Returns:
+        Counts of the files written: 'files', 'text_files', 'binary_files',
+        'excluded_files', 'bytes' and 'directories'.
+    """
+    rng = random.Random(spec.seed)
+    pool = _line_pool(rng)
+    dirs = _directories(spec, rng)
+    excluded = [os.path.join(d, rng.choice(EXCLUDED_DIRS)) for d in dirs
+                if rng.random() < spec.excluded_ratio]
+
+    os.makedirs(root)
+    for relpath in dirs[1:] + excluded:
+        os.makedirs(os.path.join(root, relpath), exist_ok=True)
+
+    counts = dict.fromkeys(['files', 'text_files', 'binary_files', 'excluded_files', 'bytes'], 0)
+    counts['directories'] = len(dirs) + len(excluded)
+
+    for i in range(spec.files):
+        # excluded_ratio of the files land in excluded directories, when there are any
+        is_excluded = bool(excluded) and rng.random() < spec.excluded_ratio
+        directory = rng.choice(excluded if is_excluded else dirs)
+        size = min(spec.max_bytes, int(rng.lognormvariate(0, spec.size_sigma) * spec.median_bytes))
+        if rng.random() < spec.binary_ratio:
+            suffix = rng.choice(BINARY_SUFFIXES)
+            data = _random_bytes(rng, min(size, 4096)) + b'\0' * max(0, size - 4096)
+            counts['binary_files'] += 1
+        else:
+            suffix = rng.choice(TEXT_SUFFIXES)
+            data = _text(rng, pool, size)
+            counts['text_files'] += 1
+        if is_excluded:
+            counts['excluded_files'] += 1
+        with open(os.path.join(root, directory, f"file{i:07d}{suffix}"), 'wb') as f:
+            f.write(data)
+        counts['files'] += 1
+        counts['bytes'] += len(data)
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('root', help='Directory to create')
+    defaults = TreeSpec()
+    for field in TreeSpec._fields:
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(getattr(defaults, field)),
+                            default=getattr(defaults, field))
+    args = parser.parse_args()
+
+    spec = TreeSpec(**{field: getattr(args, field) for field in TreeSpec._fields})
+    print(json.dumps(generate_tree(args.root, spec), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark capture_structure on generated trees and check for regressions.
+
+Usage:
+    python -m benchmarks.run [--profiles small mixed] [--formats text json yaml pack]
+                             [--repeat 3] [--trees DIR]
+                             [--save-baseline NAME] [--compare NAME] [--tolerance 0.15]
+
+Each profile in benchmarks.generate.PROFILES is generated once (into
+--trees, or a temporary directory), then every format is captured in a
+fresh interpreter so that peak RSS covers one capture only. The best of
+--repeat runs is reported as files/s, MB/s and peak RSS.
+
+--save-baseline writes the results to benchmarks/baselines/NAME.json;
+--compare checks them against a saved baseline and exits with status 1
+if throughput fell, or peak RSS grew, by more than --tolerance.
+Baselines are only comparable on the same machine.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from benchmarks.generate import PROFILES, generate_tree
+
+FORMATS = ['text', 'json', 'yaml', 'pack']
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# (metric, True if higher is better)
+METRICS = [('files_per_s', True), ('mb_per_s', True), ('peak_rss_mb', False)]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def worker(root: str, format: str, output: str) -> None:
+    """Capture root once and print the measurements as JSON."""
+    import time
+
+    from sourcesnatcher import ProjectCapture
+    from sourcesnatcher.stats import CaptureStats
+
+    stats = CaptureStats()
+    start = time.perf_counter()
+    ProjectCapture().capture_structure(root, output, format, stats=stats)
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        'seconds': seconds,
+        'files': stats.counters['files_included'],
+        'bytes': stats.counters['bytes_included'],
+        'peak_rss_mb': _peak_rss_mb(),
+    }))
+
+
+def measure(root: str, format: str, output: str, repeat: int) -> Dict[str, float]:
+    """Run repeat captures in subprocesses and keep the best of each metric."""
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.run', '--worker', root, format, output],
+            check=True, stdout=subprocess.PIPE, universal_newlines=True)
+        runs.append(json.loads(result.stdout))
+    seconds = min(run['seconds'] for run in runs)
+    return {
+        'seconds': round(seconds, 4),
+        'files': runs[0]['files'],
+        'files_per_s': round(runs[0]['files'] / seconds, 1),
+        'mb_per_s': round(runs[0]['bytes'] / seconds / 1e6, 2),
+        'peak_rss_mb': round(min(run['peak_rss_mb'] for run in runs), 1),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Dict[str, float]]],
+            baseline: Dict[str, Dict[str, Dict[str, float]]],
+            tolerance: float) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    Returns:
+        One message per metric that regressed by more than tolerance.
+    """
+    regressions = []
+    for profile, formats in results.items():
+        for format, result in formats.items():
+            base = baseline.get(profile, {}).get(format)
+            if base is None:
+                continue
+            for metric, higher_is_better in METRICS:
+                old, new = base[metric], result[metric]
+                if not old:
+                    continue
+                change = (new - old) / old
+                if (-change if higher_is_better else change) > tolerance:
+                    regressions.append(f"{profile}/{format}: {metric} {old} -> {new} "
+                                       f"({change:+.0%})")
+    return regressions
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == '--worker':
+        worker(*sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=['small', 'mixed'])
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--trees', help='Directory to generate trees in and reuse them from')
+    parser.add_argument('--save-baseline', metavar='NAME')
+    parser.add_argument('--compare', metavar='NAME')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trees = args.trees or tmp
+        results: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for profile in args.profiles:
+            spec = PROFILES[profile]
+            root = os.path.join(trees, f"{profile}-{spec.seed}")
+            if not os.path.isdir(root):
+                counts = generate_tree(root, spec)
+                print(f"Generated {profile}: {counts['files']} files, "
+                      f"{counts['bytes'] / 1e6:.1f} MB", file=sys.stderr)
+
+            results[profile] = {}
+            for format in args.formats:
+                output = os.path.join(tmp, f"output.{format}")
+                result = measure(root, format, output, args.repeat)
+                results[profile][format] = result
+                print(f"{profile:<12} {format:<5} {result['seconds']:8.3f}s  "
+                      f"{result['files_per_s']:9.0f} files/s  {result['mb_per_s']:7.1f} MB/s  "
+                      f"{result['peak_rss_mb']:7.1f} MB peak RSS")
+
+    if args.save_baseline:
+        os.makedirs(BASELINES, exist_ok=True)
+        path = os.path.join(BASELINES, f"{args.save_baseline}.json")
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINES, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,13 @@ from setuptools import setup, find_packages
 setup(
     name="sourcesnatcher",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(exclude=["tests", "tests.*", "benchmarks", "benchmarks.*"]),
     install_requires=[
         "pyyaml>=6.0.2",
     ],
     entry_points={
         'console_scripts': [
-            'capture-project=capture_project:main',
+            'capture-project=sourcesnatcher.cli:main',
         ],
     },
     python_requires=">=3.13",
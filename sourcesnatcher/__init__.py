@@ -2,7 +2,14 @@
 Source Snatcher - A tool to capture and analyze project structures and contents.
 """
 
-from .capture_project import ProjectCapture, main
-
 __version__ = "0.1.0"
-__all__ = ['ProjectCapture', 'main'] 
\ No newline at end of file
+__all__ = ['ProjectCapture', 'main']
+
+
+def __getattr__(name):
+    # Imported on first access, so `import sourcesnatcher.pack` and the
+    # other submodules do not pull in the whole capture module
+    if name in __all__:
+        from . import capture_project
+        return getattr(capture_project, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
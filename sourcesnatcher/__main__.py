@@ -2,7 +2,7 @@
 Main entry point for the sourcesnatcher package.
 """
 
-from .capture_project import main
+from .cli import main
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
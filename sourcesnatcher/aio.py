@@ -0,0 +1,150 @@
+"""
+Asyncio front end for ProjectCapture.
+
+Nothing here blocks the event loop: the walk and every file read run on
+threads. iter_files streams (relpath, contents) pairs while the walk is
+still running, with a bounded number of reads in flight and a bounded
+number of walked files waiting, so a slow consumer holds the walk back
+instead of letting files pile up in memory. Cancelling the consuming task
+or closing the iterator stops the walk at its next file.
+"""
+
+import asyncio
+import functools
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from typing import AsyncIterator, Optional, Tuple
+
+from .budget import ByteBudget
+
+# Queued by the walk thread after its last file
+_DONE = object()
+
+
+class CaptureCancelled(Exception):
+    """Raised inside a capture's threads once it has been cancelled."""
+
+
+async def acapture(capturer, startpath: str, output_file: str,
+                   format: str = 'text', debug: bool = False, stats=None) -> None:
+    """
+    Run capturer.capture_structure on the loop's default executor.
+
+    If the awaiting task is cancelled, the capture is told to stop and is
+    waited for, so its output is closed before the cancellation propagates.
+    """
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+    future = loop.run_in_executor(None, functools.partial(
+        capturer.capture_structure, startpath, output_file, format, debug, stats,
+        cancel=cancel))
+    try:
+        await asyncio.shield(future)
+    except asyncio.CancelledError:
+        cancel.set()
+        with suppress(CaptureCancelled):
+            await future
+        raise
+
+
+async def iter_files(capturer, startpath: str, workers: Optional[int] = None,
+                     window: Optional[int] = None,
+                     debug: bool = False) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Yield (relpath, contents) for each file the capture would include.
+
+    Files come in the same order as in a capture, and the configured size
+    budgets apply: truncated files are yielded truncated and files past
+    max_total_bytes are left out. A token budget needs the whole walk to
+    rank the files, so budget_tokens is not supported here.
+
+    Args:
+        capturer: The ProjectCapture whose configuration is used
+        startpath: Path to the project directory
+        workers: Reads in flight at once (default: the workers setting)
+        window: Walked files that may wait for the consumer (default: 4
+            per worker); the walk pauses while the window is full
+        debug: Whether to print debug information
+    """
+    if capturer.config.get('budget_tokens') is not None:
+        raise ValueError("budget_tokens cannot be applied while streaming; use acapture")
+    loop = asyncio.get_running_loop()
+    source = await loop.run_in_executor(None, capturer._prepare, startpath)
+    workers = max(1, workers or capturer.config.get('workers', 1))
+    window = window or workers * 4
+
+    queue: asyncio.Queue = asyncio.Queue()
+    # One slot per walked file not yet taken by the consumer
+    slots = threading.Semaphore(window)
+    cancel = threading.Event()
+
+    def on_file(entry) -> None:
+        slots.acquire()
+        if cancel.is_set():
+            raise CaptureCancelled(entry.relpath)
+        loop.call_soon_threadsafe(queue.put_nowait, entry)
+
+    def walk() -> None:
+        try:
+            capturer._scan(source, debug, on_file)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+    budget = ByteBudget(capturer.config.get('max_file_bytes'),
+                        capturer.config.get('max_total_bytes'))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    walker = loop.run_in_executor(None, walk)
+    pending = deque()
+    walk_done = False
+    completed = False
+
+    try:
+        while True:
+            # Start reads up to the worker limit, without waiting on the walk
+            # while a finished read could be yielded instead
+            while not walk_done and len(pending) < workers:
+                if pending and queue.empty():
+                    break
+                entry = await queue.get()
+                slots.release()
+                if entry is _DONE:
+                    walk_done = True
+                    break
+                read = budget.take(entry)
+                if read is None:
+                    continue
+                pending.append((entry, loop.run_in_executor(
+                    executor, capturer._read_entry, entry, source.cache, debug,
+                    read.limit, source.git)))
+
+            if not pending:
+                if walk_done:
+                    break
+                continue
+
+            entry, future = pending.popleft()
+            contents, _ = await future
+            if debug:
+                print(f"Processing file: {entry.path}", file=sys.stderr)
+            yield entry.relpath, contents
+
+        # Surface any error from the walk
+        await walker
+        completed = True
+    finally:
+        # Stop the walk at its next file, even if it is waiting for a slot
+        cancel.set()
+        slots.release(window)
+        for _, future in pending:
+            future.cancel()
+        with suppress(Exception):
+            await walker
+        await loop.run_in_executor(None, functools.partial(
+            executor.shutdown, wait=True, cancel_futures=True))
+        if source.git is not None:
+            source.git.close()
+        if completed and source.cache is not None:
+            await loop.run_in_executor(None, source.cache.save)
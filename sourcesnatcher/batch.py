@@ -0,0 +1,182 @@
+"""
+Batch capture of many projects in one process pool.
+
+Each worker process builds its ProjectCapture once, so the configuration
+is compiled once per worker rather than once per project, and the
+interpreter start-up is paid once per worker rather than once per
+project. Every project is captured independently: an error in one is
+recorded in the summary and the others carry on.
+
+A worker that dies outright (killed for memory, or a crash in an
+extension) breaks the whole pool and fails every pending future. The
+pool is then rebuilt: projects that had not started are submitted again,
+and those that were running are captured again one at a time in a pool
+of their own, so only the project that kills its worker is lost.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .defaults import DEFAULT_SUFFIXES
+
+SUMMARY_FILE = 'summary.json'
+
+# The worker process's capturer, built once by _init_worker, and the
+# queue it reports each project on as it starts
+_capturer = None
+_started = None
+
+
+class BatchResult(NamedTuple):
+    """Outcome of capturing one project."""
+    directory: str
+    output: str
+    ok: bool
+    error: Optional[str]
+    seconds: float
+
+
+def read_batch_file(path: str) -> List[str]:
+    """Read project directories from a file, one per line; '#' starts a comment."""
+    with open(path) as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+def output_paths(directories: Iterable[str], output_dir: str, format: str,
+                 suffix: str = '') -> List[str]:
+    """
+    Name each project's output after its directory, as the CLI does,
+    adding a numeric suffix when two projects share a name.
+    """
+    seen: Dict[str, int] = {}
+    outputs = []
+    for directory in directories:
+        name = os.path.basename(os.path.normpath(directory))
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            name = f"{name}-{seen[name]}"
+        outputs.append(os.path.join(output_dir, f"{name}_contents.{format}{suffix}"))
+    return outputs
+
+
+def _init_worker(config: Optional[Dict], started=None) -> None:
+    global _capturer, _started
+    from .capture_project import ProjectCapture
+    _capturer = ProjectCapture(config)
+    _started = started
+
+
+def _capture_one(job: Tuple[str, str, str]) -> BatchResult:
+    directory, output, format = job
+    start = time.perf_counter()
+    try:
+        _capturer.capture_structure(directory, output, format)
+    except Exception as e:
+        return BatchResult(directory, output, False, str(e), time.perf_counter() - start)
+    return BatchResult(directory, output, True, None, time.perf_counter() - start)
+
+
+def _capture_started(i: int, job: Tuple[str, str, str]) -> BatchResult:
+    _started.put(i)
+    return _capture_one(job)
+
+
+def _pool_round(config: Optional[Dict], job_list: List[Tuple[str, str, str]],
+                indexes: List[int], jobs: Optional[int]
+                ) -> Tuple[Dict[int, BatchResult], List[int], Optional[BrokenProcessPool]]:
+    """
+    Capture the given jobs on one pool until they finish or the pool breaks.
+
+    Returns:
+        The results by job index, the jobs that were running when the pool
+        broke, and the error it broke with (None if it did not).
+    """
+    context = multiprocessing.get_context()
+    started = context.SimpleQueue()
+    results: Dict[int, BatchResult] = {}
+    broken = None
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context,
+                             initializer=_init_worker, initargs=(config, started)) as pool:
+        futures = {pool.submit(_capture_started, i, job_list[i]): i for i in indexes}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except BrokenProcessPool as e:
+                broken = e
+
+    running: Set[int] = set()
+    while not started.empty():
+        running.add(started.get())
+    started.close()
+    return results, sorted(running - set(results)), broken
+
+
+def capture_many(config: Optional[Dict], directories: List[str], output_dir: str,
+                 format: str = 'text', jobs: Optional[int] = None,
+                 summary_file: Optional[str] = SUMMARY_FILE) -> List[BatchResult]:
+    """
+    Capture many projects, one output file each, on a process pool.
+
+    Args:
+        config: ProjectCapture configuration shared by every project
+        directories: Project directories to capture
+        output_dir: Directory that receives the outputs and the summary
+        format: Output format ('text', 'json', 'yaml', or 'pack')
+        jobs: Worker processes (default: one per CPU); 1 captures in-process
+        summary_file: Name of the JSON summary written to output_dir, or
+            None to skip it
+
+    Returns:
+        One BatchResult per directory, in input order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    suffix = DEFAULT_SUFFIXES.get((config or {}).get('compression'), '')
+    outputs = output_paths(directories, output_dir, format, suffix)
+    job_list = list(zip(directories, outputs, [format] * len(directories)))
+    results: List[Optional[BatchResult]] = [None] * len(job_list)
+    start = time.perf_counter()
+
+    if jobs == 1:
+        _init_worker(config)
+        results = [_capture_one(job) for job in job_list]
+    else:
+        pending = list(range(len(job_list)))
+        while pending:
+            done, running, broken = _pool_round(config, job_list, pending, jobs)
+            for i, result in done.items():
+                results[i] = result
+            if broken is not None and not running:
+                # The pool broke before any project started; retrying
+                # would only break it again
+                running = [i for i in pending if results[i] is None]
+            # One of the projects that were running killed its worker;
+            # capture each alone so only that one is lost
+            for i in running:
+                alone, _, broken = _pool_round(config, job_list, [i], 1)
+                if i in alone:
+                    results[i] = alone[i]
+                else:
+                    directory, output, _ = job_list[i]
+                    results[i] = BatchResult(directory, output, False,
+                                             f"Worker process died: {broken}", 0.0)
+            pending = [i for i in pending if results[i] is None]
+
+    if summary_file:
+        summary = {
+            'format': format,
+            'projects': len(results),
+            'succeeded': sum(1 for r in results if r.ok),
+            'failed': sum(1 for r in results if not r.ok),
+            'seconds': round(time.perf_counter() - start, 3),
+            'results': [dict(r._asdict(), seconds=round(r.seconds, 3)) for r in results],
+        }
+        with open(os.path.join(output_dir, summary_file), 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    return results
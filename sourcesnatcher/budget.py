@@ -0,0 +1,166 @@
+"""
+Size budgets for captured file contents.
+
+The budget is planned from the walk's stat results before any file is
+read, so every read is issued with its final byte limit: oversized files
+are read only up to max_file_bytes, and once max_total_bytes is used up
+the remaining files are skipped without being opened at all.
+
+A token budget (budget_tokens) is planned the same way, over the files
+in priority order (see the priority module) instead of tree order. Tokens
+are estimated from sizes at BYTES_PER_TOKEN, which is close to what
+common subword tokenizers produce for source code and English text, so
+no file has to be read to know whether it fits.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .priority import priority_key
+from .walker import FileEntry
+
+SKIPPED_TOTAL_BUDGET = 'max_total_bytes'
+SKIPPED_TOKEN_BUDGET = 'budget_tokens'
+
+# Average bytes per token assumed by the token budget
+BYTES_PER_TOKEN = 4
+
+
+def estimate_tokens(size: int) -> int:
+    """Approximate number of tokens in size bytes of text."""
+    return -(-size // BYTES_PER_TOKEN)
+
+
+class PlannedRead(NamedTuple):
+    """A file to read and the most bytes that may be read from it."""
+    entry: FileEntry
+    limit: Optional[int]
+
+
+class BudgetPlan(NamedTuple):
+    """Reads that fit the budget and the files left out of it."""
+    reads: List[PlannedRead]
+    skipped: Dict[str, str]
+
+
+class ByteBudget:
+    """
+    Per-file and total byte budgets applied one file at a time, in order.
+
+    Used directly when files arrive while the walk is still running;
+    plan_byte_budget applies the same rules to a complete list.
+    """
+
+    def __init__(self, max_file_bytes: Optional[int] = None,
+                 max_total_bytes: Optional[int] = None):
+        self.max_file_bytes = max_file_bytes
+        self.remaining = max_total_bytes
+
+    def take(self, entry: FileEntry) -> Optional[PlannedRead]:
+        """Return the read for entry, or None once the total budget is spent."""
+        remaining = self.remaining
+        if remaining is None:
+            return PlannedRead(entry, self.max_file_bytes)
+        if remaining <= 0:
+            return None
+
+        limit = remaining if self.max_file_bytes is None else min(self.max_file_bytes, remaining)
+        try:
+            size = entry.size()
+        except OSError:
+            size = 0
+        self.remaining = remaining - min(size, limit)
+        return PlannedRead(entry, limit)
+
+
+def plan_byte_budget(files: List[FileEntry],
+                     max_file_bytes: Optional[int] = None,
+                     max_total_bytes: Optional[int] = None) -> BudgetPlan:
+    """
+    Assign each file a read limit within the per-file and total budgets.
+
+    Args:
+        files: Files in output order
+        max_file_bytes: Largest number of bytes read from one file
+        max_total_bytes: Largest number of bytes read from all files
+
+    Returns:
+        BudgetPlan whose reads keep the input order. The file that crosses
+        max_total_bytes is truncated to what is left; later files are
+        reported in skipped, keyed by relpath.
+    """
+    if max_file_bytes is None and max_total_bytes is None:
+        return BudgetPlan([PlannedRead(entry, None) for entry in files], {})
+
+    budget = ByteBudget(max_file_bytes, max_total_bytes)
+    reads: List[PlannedRead] = []
+    skipped: Dict[str, str] = {}
+    for entry in files:
+        read = budget.take(entry)
+        if read is None:
+            skipped[entry.relpath] = SKIPPED_TOTAL_BUDGET
+        else:
+            reads.append(read)
+
+    return BudgetPlan(reads, skipped)
+
+
+def plan_token_budget(files: List[FileEntry], budget_tokens: int,
+                      max_file_bytes: Optional[int] = None,
+                      max_total_bytes: Optional[int] = None) -> BudgetPlan:
+    """
+    Choose the files that fit a token budget, most important first.
+
+    Args:
+        files: Files in tree order
+        budget_tokens: Largest estimated number of tokens read from all files
+        max_file_bytes: Largest number of bytes read from one file
+        max_total_bytes: Largest number of bytes read from all files
+
+    Returns:
+        BudgetPlan whose reads are in priority order, which is also the
+        order they are written in. The file that crosses the budget is
+        truncated to what is left; later files are reported in skipped.
+    """
+    token_bytes = budget_tokens * BYTES_PER_TOKEN
+    byte_limit = token_bytes if max_total_bytes is None else min(max_total_bytes, token_bytes)
+    reason = SKIPPED_TOKEN_BUDGET if byte_limit == token_bytes else SKIPPED_TOTAL_BUDGET
+
+    budget = ByteBudget(max_file_bytes, byte_limit)
+    reads: List[PlannedRead] = []
+    skipped: Dict[str, str] = {}
+    for entry in sorted(files, key=priority_key):
+        read = budget.take(entry)
+        if read is None:
+            skipped[entry.relpath] = reason
+        else:
+            reads.append(read)
+
+    return BudgetPlan(reads, skipped)
+
+
+def budget_metadata(max_file_bytes: Optional[int], max_total_bytes: Optional[int],
+                    plan: BudgetPlan,
+                    budget_tokens: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Return the metadata written with a budgeted capture, or None without
+    budgets. 'truncated' is filled in as the files are read.
+    """
+    if max_file_bytes is None and max_total_bytes is None and budget_tokens is None:
+        return None
+    metadata = {
+        'max_file_bytes': max_file_bytes,
+        'max_total_bytes': max_total_bytes,
+        'truncated': [],
+        'skipped': plan.skipped,
+    }
+    if budget_tokens is not None:
+        planned = 0
+        for read in plan.reads:
+            try:
+                size = read.entry.size()
+            except OSError:
+                continue
+            planned += size if read.limit is None else min(size, read.limit)
+        metadata['budget_tokens'] = budget_tokens
+        metadata['estimated_tokens'] = estimate_tokens(planned)
+    return metadata
@@ -0,0 +1,154 @@
+"""
+Persistent manifest cache for incremental captures.
+
+The cache remembers each captured file's (size, mtime_ns, inode) along
+with a content hash. Contents are stored once per hash under objects/, so
+a later run can serve unchanged files from the cache and only re-read the
+paths that changed. The total size of the stored contents is capped by
+evicting the least recently used entries when the cache is saved.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .defaults import DEFAULT_CACHE_DIR
+
+__all__ = ['DEFAULT_CACHE_DIR', 'DEFAULT_MAX_BYTES', 'INDEX_VERSION', 'ManifestCache']
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+INDEX_VERSION = 1
+
+# Positions in an index entry
+SIZE, MTIME, INODE, HASH, BLOB_SIZE, USED = range(6)
+
+
+class ManifestCache:
+    """On-disk cache of file contents keyed by path and stat signature."""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._now = time.time()
+        self._lock = threading.Lock()
+        self._replaced = set()
+        self._entries: Dict[str, List] = self._load_index()
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, 'index.json')
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, 'objects', digest[:2], digest[2:])
+
+    def _load_index(self) -> Dict[str, List]:
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get('version') != INDEX_VERSION:
+            return {}
+        return index.get('entries', {})
+
+    def get(self, path: str, st: os.stat_result) -> Optional[str]:
+        """
+        Return the cached contents of path if it is unchanged, else None.
+        """
+        found = self.lookup(path, st)
+        return None if found is None else found[0]
+
+    def lookup(self, path: str, st: os.stat_result) -> Optional[Tuple[str, int, str]]:
+        """
+        Like get, but also return the stored size and sha256 of the contents
+        (UTF-8 encoded), or None if path changed.
+        """
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if (entry is None or entry[SIZE] != st.st_size
+                or entry[MTIME] != st.st_mtime_ns or entry[INODE] != st.st_ino):
+            self.misses += 1
+            return None
+
+        try:
+            with open(self._blob_path(entry[HASH]), 'rb') as f:
+                contents = f.read().decode('utf-8', errors='surrogatepass')
+        except OSError:
+            self.misses += 1
+            return None
+
+        with self._lock:
+            entry[USED] = self._now
+        self.hits += 1
+        return contents, entry[BLOB_SIZE], entry[HASH]
+
+    def put(self, path: str, st: os.stat_result, contents: str) -> None:
+        """Store the contents of path under its current stat signature."""
+        data = contents.encode('utf-8', errors='surrogatepass')
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+
+        key = os.path.abspath(path)
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None and previous[HASH] != digest:
+                self._replaced.add(previous[HASH])
+            self._entries[key] = [
+                st.st_size, st.st_mtime_ns, st.st_ino, digest, len(data), self._now
+            ]
+
+    def _remove_blob(self, digest: str) -> None:
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the blobs fit max_bytes."""
+        refs: Dict[str, int] = {}
+        blob_sizes: Dict[str, int] = {}
+        for entry in self._entries.values():
+            refs[entry[HASH]] = refs.get(entry[HASH], 0) + 1
+            blob_sizes[entry[HASH]] = entry[BLOB_SIZE]
+
+        # Contents of files that changed since they were cached
+        for digest in self._replaced - refs.keys():
+            self._remove_blob(digest)
+        self._replaced.clear()
+
+        total = sum(blob_sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1][USED]):
+            if total <= self.max_bytes:
+                break
+            del self._entries[key]
+            refs[entry[HASH]] -= 1
+            if refs[entry[HASH]] == 0:
+                total -= entry[BLOB_SIZE]
+                self._remove_blob(entry[HASH])
+
+    def save(self) -> None:
+        """Apply eviction and write the index atomically."""
+        with self._lock:
+            self._evict()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': INDEX_VERSION, 'entries': self._entries}, f)
+            os.replace(tmp_path, self._index_path)
@@ -1,21 +1,59 @@
 #!/usr/bin/env python3
+# Annotations are not evaluated, so the optional backends below only need
+# importing for type checkers
+from __future__ import annotations
+
 import os
-import subprocess
-import argparse
-import mimetypes
-import json
-import yaml
 import sys
-from pathlib import Path
-from typing import List, Set, Dict
-from shutil import which
+import threading
+import time
+from contextlib import nullcontext
+from typing import (TYPE_CHECKING, AsyncIterator, Callable, List, NamedTuple, Dict,
+                    Optional, Tuple, Union)
+
+# Only what every capture needs is imported here. asyncio, process pools,
+# git, the cache, hashing and YAML are imported by the code paths that
+# use them.
+from .budget import (BudgetPlan, PlannedRead, budget_metadata, plan_byte_budget,
+                     plan_token_budget)
+# The command line; re-exported so capture_project:main keeps working
+from .cli import main
+from .defaults import DEFAULT_CACHE_DIR
+from .filters import FileFilter, read_ignore_file
+from .model import BLOB, CaptureResult, FileRecord, build_tree
+from .reader import MMAP_MIN_BYTES, RawContents, decode_text, read_in_order, read_mapped
+from .sinks import STDOUT, compression_for, open_sink
+from .sniff import DEFAULT_SNIFF_BYTES, Sniffer
+from .stats import CaptureStats, TimedStream
+from .walker import (FileEntry, ScanResult, is_symlink, linked_groups, scan_paths,
+                     scan_project)
+from .writers import get_writer
+
+if TYPE_CHECKING:
+    from .batch import BatchResult
+    from .cache import ManifestCache
+    from .dedup import DedupIndex, DedupRead
+    from .gitsource import GitSource
+
+
+class CaptureSource(NamedTuple):
+    """The project root and the cache, git source and filters for one capture."""
+    startpath: str
+    cache: Optional[ManifestCache]
+    git: Optional[GitSource]
+    include_dir: Callable[[str], bool]
+    include_file: Callable[[str], bool]
+    follow_symlinks: bool = True
+    max_depth: Optional[int] = None
+
 
 class ProjectCapture:
     def __init__(self, config: Dict = None):
         """Initialize with default or custom configuration."""
         self.config = {
             'excluded_dirs': ['.git', '.terraform', 'lib', '__pycache__', 
-                            'venv', 'node_modules', 'autoload', 'backup', 'pack'],
+                            'venv', 'node_modules', 'autoload', 'backup', 'pack',
+                            DEFAULT_CACHE_DIR],
             'excluded_files': ['credentials.txt', '.gitignore'],
             'text_extensions': ['.yml', '.yaml', '.json', '.j2', '.conf', 
                               '.txt', '.md', '.py', '.gitignore'],
@@ -23,54 +61,229 @@ class ProjectCapture:
         }
         if config:
             self.config.update(config)
-        
+        # Compile the include/exclude rules once for every capture
+        self._filter = FileFilter(self.config)
+        self._sniffer = None
+        if self.config.get('sniff_binary'):
+            self._sniffer = Sniffer(self.config.get('sniff_bytes', DEFAULT_SNIFF_BYTES))
+
     def is_text_file(self, file_path: str) -> bool:
         """
         Check if a file is a text file based on:
         1. If it's in the include_files list (if not empty)
         2. If it has a text extension
         3. If it has a text mime type
+        With sniff_binary enabled, the first sniff_bytes of the file decide
+        for any name that is not a known binary type.
         """
-        # Get just the filename
-        filename = os.path.basename(file_path)
-        
-        # If include_files is not empty, only those files are considered text files
-        if self.config['include_files']:
-            return filename in self.config['include_files']
-        
-        # Otherwise, check extensions and mime type
-        if any(filename.endswith(ext) for ext in self.config['text_extensions']):
-            return True
-        
-        # Check mime type only if not in text_extensions
-        mime_type, _ = mimetypes.guess_type(file_path)
-        return mime_type is not None and mime_type.startswith('text')
+        if not self._filter.is_text_name(os.path.basename(file_path)):
+            return False
+        return self._sniffer is None or self._sniffer.is_text(file_path)
 
     def _should_include_file(self, file_path: str) -> bool:
         """
         Check if a file should be included in the output.
         """
         filename = os.path.basename(file_path)
-        return (filename not in self.config['excluded_files'] and 
+        return (filename not in self._filter.excluded_files and
                 self.is_text_file(file_path))
 
     def check_dependencies(self) -> None:
-        if not which('tree'):
-            raise RuntimeError("The 'tree' command is not installed. Please install it first.")
+        """
+        Check for external tools the capture needs.
+
+        The tree is rendered in Python and nothing else is run, so there
+        is nothing to check; kept for callers of the public API.
+        """
 
     def capture_structure(self, startpath: str, output_file: str, 
-                         format: str = 'text', debug: bool = False) -> None:
+                         format: str = 'text', debug: bool = False,
+                         stats: Optional[CaptureStats] = None,
+                         cancel: Optional[threading.Event] = None) -> None:
         """
         Capture the structure and contents of a project directory.
         
         Args:
             startpath: Path to the project directory
-            output_file: Path to save the output
-            format: Output format ('text', 'json', or 'yaml')
+            output_file: Path to save the output, or '-' for stdout. A .gz,
+                .xz or .bz2 suffix compresses the output
+            format: Output format ('text', 'json', 'yaml', or 'pack')
             debug: Whether to print debug information
+            stats: Collects phase timings and counters when given
+            cancel: When set, the capture raises CaptureCancelled at the
+                next directory or file
         """
+        started = time.perf_counter()
         self.check_dependencies()
         
+        source = self._prepare(startpath, stats)
+        startpath = source.startpath
+
+        if cancel is not None:
+            from .aio import CaptureCancelled
+            include_dir = source.include_dir
+
+            def cancellable_include_dir(relpath: str) -> bool:
+                if cancel.is_set():
+                    raise CaptureCancelled(startpath)
+                return include_dir(relpath)
+
+            source = source._replace(include_dir=cancellable_include_dir)
+
+        with stats.phase('walk') if stats is not None else nullcontext():
+            scan = self._scan(source, debug)
+
+        self._capture_scan(source, scan, output_file, format, debug, stats, cancel)
+
+        if stats is not None:
+            stats.add_time('total', time.perf_counter() - started)
+
+    def _capture_scan(self, source: CaptureSource, scan: ScanResult, output_file: str,
+                      format: str = 'text', debug: bool = False,
+                      stats: Optional[CaptureStats] = None,
+                      cancel: Optional[threading.Event] = None) -> None:
+        """
+        Read and write the files of a finished walk, then close the git
+        source and save the cache.
+        """
+        # Stream the output: each file is read, written and released in turn
+        if debug:
+            print("Capturing file contents...", file=sys.stderr)
+
+        # Size budgets are planned up front so each read gets its final limit
+        plan, metadata = self._plan_reads(scan.files)
+
+        if stats is not None:
+            stats.count('files_included', len(scan.files) - len(plan.skipped))
+            stats.skip('filtered', stats.counters.pop('files_seen_rejected', 0))
+            stats.count('dirs_excluded', stats.counters.pop('dirs_seen_rejected', 0))
+            for reason in plan.skipped.values():
+                stats.skip(reason)
+            for read in plan.reads:
+                try:
+                    size = read.entry.size()
+                except OSError:
+                    continue
+                stats.count('bytes_included', size if read.limit is None else min(size, read.limit))
+
+        cache, git = source.cache, source.git
+        try:
+            self._write_output(output_file, format, scan, plan, metadata,
+                               cache, git, debug, stats, cancel)
+        finally:
+            if git is not None:
+                git.close()
+
+        if cache is not None:
+            cache.save()
+            if debug:
+                print(f"Cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr)
+            if stats is not None:
+                stats.count('cache_hits', cache.hits)
+                stats.count('cache_misses', cache.misses)
+
+    def capture(self, startpath: str, debug: bool = False) -> CaptureResult:
+        """
+        Capture a project into an in-memory model instead of a file.
+
+        The walk, filters and size budgets are the same as for
+        capture_structure, but no contents are read: each FileRecord
+        reads its own when asked. Close the result when done with it.
+
+        Args:
+            startpath: Path to the project directory
+            debug: Whether to print debug information
+
+        Returns:
+            CaptureResult with the tree model and the file records.
+        """
+        source = self._prepare(startpath)
+        kept_dirs: List[str] = []
+        include_dir = source.include_dir
+
+        def recording_include_dir(relpath: str) -> bool:
+            if include_dir(relpath):
+                kept_dirs.append(relpath)
+                return True
+            return False
+
+        try:
+            scan = self._scan(source._replace(include_dir=recording_include_dir), debug)
+        except BaseException:
+            if source.git is not None:
+                source.git.close()
+            raise
+
+        plan, _ = self._plan_reads(scan.files)
+        limits = {read.entry.relpath: read.limit for read in plan.reads}
+        records = []
+        included = []
+        for entry in scan.files:
+            if entry.object_id is not None:
+                record = FileRecord(entry.relpath, entry.size(), None, BLOB,
+                                    object_id=entry.object_id)
+            else:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    record = FileRecord(entry.relpath, 0, None)
+                else:
+                    record = FileRecord(entry.relpath, st.st_size, st.st_mtime)
+            if entry.relpath in limits:
+                record.limit = limits[entry.relpath]
+                included.append(record)
+            else:
+                record.limit = 0
+            records.append(record)
+
+        root = source.startpath
+        git = source.git
+        cache = source.cache
+
+        def load(record: FileRecord) -> Tuple[str, bool]:
+            entry = FileEntry(os.path.join(root, record.relpath), record.relpath,
+                              object_id=record.object_id)
+            return self._read_entry(entry, cache, debug, record.limit, git)
+
+        def close() -> None:
+            if git is not None:
+                git.close()
+            if cache is not None:
+                cache.save()
+
+        # Git listings only show directories that contain a selected file
+        tree = build_tree(os.path.basename(root), records, kept_dirs if git is None else ())
+        result = CaptureResult(root, tree, included, plan.skipped, load, close)
+        for record in records:
+            record._capture = result
+        return result
+
+    def _plan_reads(self, files: List[FileEntry]) -> Tuple[BudgetPlan, Optional[Dict]]:
+        """
+        Apply the configured budgets to files in tree order.
+
+        With budget_tokens the files are chosen, and written, in priority
+        order; otherwise the tree order is kept.
+
+        Returns:
+            The plan and the budget metadata written with the capture.
+        """
+        max_file_bytes = self.config.get('max_file_bytes')
+        max_total_bytes = self.config.get('max_total_bytes')
+        budget_tokens = self.config.get('budget_tokens')
+        if budget_tokens is not None:
+            plan = plan_token_budget(files, budget_tokens, max_file_bytes, max_total_bytes)
+        else:
+            plan = plan_byte_budget(files, max_file_bytes, max_total_bytes)
+        return plan, budget_metadata(max_file_bytes, max_total_bytes, plan, budget_tokens)
+
+    def _prepare(self, startpath: str,
+                 stats: Optional[CaptureStats] = None) -> CaptureSource:
+        """
+        Resolve the project root and set up its cache, git source and filters.
+
+        With stats, the filters are timed and counted.
+        """
         if not os.path.exists(startpath):
             raise FileNotFoundError(f"Directory not found: {startpath}")
 
@@ -80,138 +293,424 @@ class ProjectCapture:
             if not os.path.exists(startpath):
                 raise FileNotFoundError(f"'src' directory not found in {startpath}")
 
-        result = {
-            'tree': '',
-            'files': {}
-        }
+        # Incremental mode: unchanged files are served from the cache
+        cache = None
+        cache_relpath = None
+        if self.config.get('cache_dir'):
+            from .cache import DEFAULT_MAX_BYTES, ManifestCache
+            cache_dir = os.path.join(startpath, self.config['cache_dir'])
+            cache = ManifestCache(cache_dir,
+                                  self.config.get('cache_max_bytes', DEFAULT_MAX_BYTES))
+            # Never capture the cache itself when it lives inside the project
+            cache_relpath = os.path.relpath(cache.cache_dir, os.path.abspath(startpath))
 
-        def generate_tree(path: str, prefix: str = '') -> str:
-            """Generate a tree-like structure of the directory."""
-            if debug:
-                print(f"Generating tree for: {path}", file=sys.stderr)
-            
-            tree_lines = []
-            entries = sorted(os.listdir(path))
-            
-            for i, entry in enumerate(entries):
-                entry_path = os.path.join(path, entry)
-                is_last = i == len(entries) - 1
-                
-                # Skip excluded directories
-                if os.path.isdir(entry_path):
-                    if entry in self.config['excluded_dirs']:
-                        if debug:
-                            print(f"Skipping excluded directory: {entry}", file=sys.stderr)
-                        continue
-                    
-                    # Add directory to tree
-                    tree_lines.append(f"{prefix}{'└── ' if is_last else '├── '}{entry}")
-                    
-                    # Recursively process subdirectory
-                    extension = '    ' if is_last else '│   '
-                    tree_lines.extend(
-                        generate_tree(entry_path, prefix + extension)
-                    )
-                else:
-                    # Skip non-text files
-                    if not self._should_include_file(entry_path):
-                        if debug:
-                            print(f"Skipping non-text file: {entry}", file=sys.stderr)
-                        continue
-                    
-                    # Add file to tree
-                    tree_lines.append(f"{prefix}{'└── ' if is_last else '├── '}{entry}")
-                
-            return tree_lines
-
-        # Generate tree structure
-        tree_lines = [os.path.basename(startpath)]
-        tree_lines.extend(generate_tree(startpath))
-        result['tree'] = '\n'.join(tree_lines)
-
-        # Capture file contents
-        processed_files: Set[str] = set()
-        
+        file_filter = self._filter
+        if self.config.get('use_gitignore'):
+            file_filter = file_filter.with_patterns(
+                read_ignore_file(os.path.join(startpath, '.gitignore')))
+
+        source = self.config.get('source', 'filesystem')
+        if source not in ('filesystem', 'git'):
+            raise ValueError(f"Unknown source: {source}")
+        git = None
+        if source == 'git':
+            from .gitsource import GitSource
+            git = GitSource(startpath, self.config.get('git_rev'))
+
+        # Blobs at a revision may not exist on disk, so they cannot be sniffed
+        if self._sniffer is not None and (git is None or git.rev is None):
+            sniffer = self._sniffer
+
+            def include_file(relpath: str) -> bool:
+                # Names first; only open files that survive them
+                return (file_filter.include_file(relpath) and
+                        sniffer.is_text(os.path.join(startpath, relpath)))
+        else:
+            include_file = file_filter.include_file
+
+        def include_dir(relpath: str) -> bool:
+            return relpath != cache_relpath and file_filter.include_dir(relpath)
+
+        if stats is not None:
+            include_dir = stats.timed('filter', include_dir, 'dirs_seen')
+            include_file = stats.timed('filter', include_file, 'files_seen')
+
+        symlinks = self.config.get('symlinks', 'follow')
+        if symlinks not in ('follow', 'skip'):
+            raise ValueError(f"Unknown symlink policy: {symlinks}")
+        max_depth = self.config.get('max_depth')
+        if max_depth is not None and max_depth < 1:
+            raise ValueError("max_depth must be at least 1")
+
+        return CaptureSource(startpath, cache, git, include_dir, include_file,
+                             symlinks == 'follow', max_depth)
+
+    def _scan(self, source: CaptureSource, debug: bool = False,
+              on_file: Optional[Callable[[FileEntry], None]] = None) -> ScanResult:
+        """
+        Walk (or, for git, list) the project once.
+
+        on_file is called with each selected file as soon as it is known,
+        in output order, so contents can be streamed before the walk ends.
+        """
+        startpath, git = source.startpath, source.git
+        if git is None:
+            # Walk the tree once; the same pass renders the tree and selects
+            # the files whose contents are captured
+            return scan_project(startpath, source.include_dir, source.include_file,
+                                debug=debug, on_file=on_file,
+                                follow_symlinks=source.follow_symlinks,
+                                max_depth=source.max_depth)
+
+        # Tracked files only, straight from the index or a revision
         if debug:
-            print("Capturing file contents...", file=sys.stderr)
-            
-        for root, dirs, files in os.walk(startpath):
-            # Filter out excluded directories
-            dirs[:] = [d for d in dirs if d not in self.config['excluded_dirs']]
-            
-            # Filter and process files
-            for file in files:
-                file_path = os.path.join(root, file)
-                if file_path in processed_files:
-                    if debug:
-                        print(f"Skipping already processed file: {file}", file=sys.stderr)
-                    continue
-                    
-                processed_files.add(file_path)
-                
-                if not self._should_include_file(file_path):
-                    if debug:
-                        print(f"Skipping file: {file}", file=sys.stderr)
-                    continue
+            print(f"Listing git files for: {startpath}", file=sys.stderr)
+        entries = [
+            FileEntry(os.path.join(startpath, f.relpath), f.relpath,
+                      object_id=f.object_id if git.rev else None,
+                      object_size=f.size)
+            for f in git.list_files()
+        ]
+        return scan_paths(startpath, entries, source.include_dir, source.include_file,
+                          debug=debug, on_file=on_file)
+
+    async def acapture(self, startpath: str, output_file: str,
+                       format: str = 'text', debug: bool = False,
+                       stats: Optional[CaptureStats] = None) -> None:
+        """
+        Run capture_structure without blocking the event loop.
+
+        The capture runs on the loop's default executor. Cancelling the
+        awaiting task stops the capture at the next directory or file and
+        waits for it to close its output, which is left incomplete.
+        """
+        from . import aio
+        await aio.acapture(self, startpath, output_file, format, debug, stats)
+
+    def aiter_files(self, startpath: str, workers: Optional[int] = None,
+                    window: Optional[int] = None,
+                    debug: bool = False) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream (relpath, contents) for each captured file, in tree order.
+
+        Files are yielded while the walk is still running. The walk and the
+        reads run off the event loop; see aio.iter_files for the details.
+
+        Args:
+            startpath: Path to the project directory
+            workers: Concurrent reads (default: the workers setting)
+            window: Files the walk may run ahead of the consumer
+                (default: 4 per worker)
+            debug: Whether to print debug information
+        """
+        from . import aio
+        return aio.iter_files(self, startpath, workers, window, debug)
+
+    def watch(self, startpath: str, output_file: str, format: str = 'text',
+              interval: float = 1.0, debounce: float = 0.5, debug: bool = False,
+              stop: Optional[threading.Event] = None,
+              on_update: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Capture once, then keep the output up to date until stop is set.
+
+        Changes are found by polling every interval seconds; once none
+        have been seen for debounce seconds, only the changed files are
+        read and the output is replaced. See the watch module.
+
+        Args:
+            startpath: Path to the project directory
+            output_file: Path to save the output
+            format: Output format ('text', 'json', 'yaml', or 'pack')
+            interval: Seconds between polls
+            debounce: Quiet seconds before the output is rewritten
+            debug: Whether to print debug information
+            stop: Ends the watch when set (default: run until interrupted)
+            on_update: Called with the number of changes after each rewrite
+        """
+        from .watch import Watcher
+        watcher = Watcher(self, startpath, output_file, format, interval, debounce,
+                          debug, on_update)
+        watcher.run(stop)
+
+    def capture_many(self, directories: List[str], output_dir: str,
+                     format: str = 'text', jobs: Optional[int] = None) -> List[BatchResult]:
+        """
+        Capture many projects with this configuration on a process pool.
+
+        Args:
+            directories: Project directories to capture
+            output_dir: Directory for the per-project outputs and summary.json
+            format: Output format ('text', 'json', 'yaml', or 'pack')
+            jobs: Worker processes (default: one per CPU); 1 runs in-process
+
+        Returns:
+            One BatchResult per directory, in input order. A project that
+            fails is reported in its result and does not stop the others.
+        """
+        from . import batch
+        return batch.capture_many(self.config, directories, output_dir, format, jobs)
+
+    def _write_output(self, output_file: str, format: str, scan: ScanResult,
+                      plan: BudgetPlan, metadata: Optional[Dict],
+                      cache: Optional[ManifestCache], git: Optional[GitSource],
+                      debug: bool, stats: Optional[CaptureStats] = None,
+                      cancel: Optional[threading.Event] = None) -> None:
+        """Read the planned files in order and stream them to the output."""
+        # Identical contents are written once; later copies become references
+        dedup = None
+        if self.config.get('dedup'):
+            from .dedup import DedupIndex
+            dedup = DedupIndex()
 
+        if dedup is None:
+            def read_file(read: PlannedRead) -> Tuple[Union[str, RawContents], bool]:
+                return self._read_entry(read.entry, cache, debug, read.limit, git, raw=True)
+        else:
+            def read_file(read: PlannedRead) -> DedupRead:
+                return self._read_entry_dedup(read.entry, dedup, cache, debug,
+                                              read.limit, git)
+
+        # Hard links and symlinks to the same file are read once, through
+        # the first of them; the contents are kept until the last is
+        # written. With dedup, copies after the first path that is not a
+        # symlink are written as references to it.
+        links: Dict[str, List[str]] = {}
+        link_originals: Dict[str, str] = {}
+        for group in linked_groups(read.entry for read in plan.reads if read.limit is None):
+            relpaths = [entry.relpath for entry in group]
+            for relpath in relpaths:
+                links[relpath] = relpaths
+            link_originals[relpaths[0]] = next(
+                (entry.relpath for entry in group if not is_symlink(entry)), relpaths[0])
+        link_contents: Dict[str, Tuple[str, bool]] = {}
+        if links:
+            read_contents = read_file
+
+            def read_file(read: PlannedRead) -> Tuple:
+                group = links.get(read.entry.relpath)
+                if group is None:
+                    return read_contents(read)
+                if read.entry.relpath != group[0]:
+                    return None, False
+                return self._read_entry(read.entry, cache, debug, read.limit, git)
+
+        if stats is not None:
+            untimed_read = read_file
+
+            def read_file(read: PlannedRead) -> Tuple[Tuple, float]:
+                # Timed on the worker, recorded by the consumer below
+                start = time.perf_counter()
+                return untimed_read(read), time.perf_counter() - start
+
+        split_mb = self.config.get('split_mb')
+        split_bytes = int(split_mb * 1024 * 1024) if split_mb else None
+        compression = self.config.get('compression')
+        if compression is None and output_file != STDOUT:
+            compression = compression_for(output_file)
+        # Pack offsets index the file itself, which must stay mappable
+        if format == 'pack' and (compression or split_bytes):
+            raise ValueError("The pack format cannot be compressed or split")
+
+        with open_sink(output_file, compression, split_bytes) as f:
+            if stats is not None:
+                f = TimedStream(f, stats)
+                write_before = stats.phases['write']
+                output_time = 0.0
+
+            writer = get_writer(format, f, self.config.get('json_compact', False))
+            writer.begin('\n'.join(scan.tree_lines))
+            contents = read_in_order(plan.reads, read_file,
+                                     workers=self.config.get('workers', 1))
+            for read, result in contents:
+                if cancel is not None and cancel.is_set():
+                    from .aio import CaptureCancelled
+                    raise CaptureCancelled(read.entry.relpath)
+                if stats is not None:
+                    result, seconds = result
+                    chars = len(result[0]) if result[0] is not None else 0
+                    stats.add_time('read', seconds)
+                    stats.record_file(read.entry.relpath, seconds, chars)
+                    stats.count('chars_read', chars)
                 if debug:
-                    print(f"Processing file: {file_path}", file=sys.stderr)
-                    
-                try:
-                    with open(file_path, 'r', errors='ignore') as f:
-                        result['files'][os.path.relpath(file_path, startpath)] = f.read()
-                except Exception as e:
-                    error_msg = f"Error reading file: {str(e)}"
-                    result['files'][os.path.relpath(file_path, startpath)] = error_msg
-                    if debug:
-                        print(f"Error reading file {file_path}: {e}", file=sys.stderr)
-
-        # Write output in specified format
-        with open(output_file, 'w') as f:
-            if format == 'json':
-                json.dump(result, f, indent=2)
-            elif format == 'yaml':
-                yaml.dump(result, f)
-            else:  # text format
-                f.write(result['tree'])
-                for file_path, contents in result['files'].items():
-                    f.write(f"\n\n# File: {file_path}\n\n{contents}")
-
-def main():
-    parser = argparse.ArgumentParser(
-        description='Capture project structure and file contents'
-    )
-    parser.add_argument('directory', help='Project directory to capture')
-    parser.add_argument('--output', '-o', 
-                       help='Output file name (default: <project_name>_contents.<format>)')
-    parser.add_argument('--format', '-f', choices=['text', 'json', 'yaml'],
-                       default='text', help='Output format (default: text)')
-    parser.add_argument('--debug', action='store_true', 
-                       help='Enable debug output')
-    parser.add_argument('--config', help='Path to configuration file')
-
-    args = parser.parse_args()
-    
-    # Load custom configuration if provided
-    config = None
-    if args.config:
-        with open(args.config) as f:
-            config = yaml.safe_load(f)
-
-    # Generate output filename if not provided
-    if not args.output:
-        project_name = os.path.basename(os.path.normpath(args.directory))
-        args.output = f"{project_name}_contents.{args.format}"
-
-    try:
-        capturer = ProjectCapture(config)
-        print(f"Preparing to capture project structure for {args.directory}")
-        capturer.capture_structure(args.directory, args.output, 
-                                 args.format, args.debug)
-        print(f"Output saved to {args.output}")
-    except Exception as e:
-        print(f"Error: {str(e)}", file=sys.stderr)
-        sys.exit(1)
+                    print(f"Processing file: {read.entry.path}", file=sys.stderr)
+
+                relpath = read.entry.relpath
+                original = None
+                group = links.get(relpath)
+                if group is not None:
+                    if relpath == group[0]:
+                        link_contents[relpath] = result
+                    text, truncated = link_contents[group[0]]
+                    if relpath == group[-1]:
+                        del link_contents[group[0]]
+                    link_original = link_originals[group[0]]
+                    if dedup is not None and group.index(relpath) > group.index(link_original):
+                        original = link_original
+                elif dedup is None:
+                    text, truncated = result
+                else:
+                    text, truncated, key, data = result
+                    if key is not None:
+                        original = dedup.original(key)
+                        if original is not None:
+                            dedup.duplicate(key)
+                        else:
+                            dedup.written(key, relpath)
+                            if text is None:
+                                # Another copy was decoded, but this one comes first
+                                text = decode_text(data)
+
+                if stats is not None:
+                    start = time.perf_counter()
+                if original is not None:
+                    writer.write_duplicate(relpath, original)
+                elif isinstance(text, RawContents):
+                    # Copied or decoded by the writer, whichever its format needs
+                    writer.write_raw(relpath, text, truncated)
+                    text.close()
+                else:
+                    writer.write_file(relpath, text, truncated)
+                if stats is not None:
+                    output_time += time.perf_counter() - start
+
+                if truncated:
+                    metadata['truncated'].append(relpath)
+                    if stats is not None:
+                        stats.count('files_truncated')
+            if debug and plan.skipped:
+                reasons = ', '.join(sorted(set(plan.skipped.values())))
+                print(f"Skipped {len(plan.skipped)} files: {reasons} reached",
+                      file=sys.stderr)
+            writer.end(metadata)
+
+            if links:
+                copies = len(links) - len(link_originals)
+                if debug:
+                    print(f"Read {copies} linked copies through another path",
+                          file=sys.stderr)
+                if stats is not None:
+                    stats.count('files_linked', copies)
+            if dedup is not None:
+                if debug:
+                    print(f"Deduplicated {dedup.duplicates} files "
+                          f"({dedup.bytes_saved} bytes)", file=sys.stderr)
+                if stats is not None:
+                    stats.count('files_deduplicated', dedup.duplicates)
+                    stats.count('bytes_deduplicated', dedup.bytes_saved)
+
+            if stats is not None:
+                # Writer time not spent inside the sink's write() is encoding
+                stats.add_time('serialize', output_time - (stats.phases['write'] - write_before))
+
+    def _read_bytes(self, entry: FileEntry, limit: Optional[int] = None,
+                    git: Optional[GitSource] = None) -> Tuple[bytes, bool]:
+        """Read up to limit bytes of a file or git blob, and whether more remain."""
+        if entry.object_id is not None:
+            return git.read_blob(entry.object_id, limit)
+        with open(entry.path, 'rb') as f:
+            if limit is None:
+                return f.read(), False
+            data = f.read(limit)
+            return data, f.read(1) != b''
+
+    def _cache_stat(self, entry: FileEntry, cache: Optional[ManifestCache],
+                    limit: Optional[int]) -> Optional[os.stat_result]:
+        """Stat a file for the cache, or None if the cache does not apply to it."""
+        if cache is None or entry.object_id is not None:
+            return None
+        try:
+            st = entry.stat()
+        except OSError:
+            return None
+        # The cache only holds complete files
+        if limit is not None and st.st_size > limit:
+            return None
+        return st
+
+    def _read_error(self, entry: FileEntry, error: Exception, debug: bool) -> str:
+        if debug:
+            if entry.object_id is not None:
+                print(f"Error reading blob {entry.relpath}: {error}", file=sys.stderr)
+            else:
+                print(f"Error reading file {entry.path}: {error}", file=sys.stderr)
+        return f"Error reading file: {str(error)}"
+
+    def _read_entry(self, entry: FileEntry, cache: Optional[ManifestCache] = None,
+                    debug: bool = False, limit: Optional[int] = None,
+                    git: Optional[GitSource] = None,
+                    raw: bool = False) -> Tuple[Union[str, RawContents], bool]:
+        """
+        Read a file's contents, returning an error message if it cannot be read.
+
+        When a cache is given, files whose size, mtime and inode are unchanged
+        are served from it and freshly read files are added to it. With a
+        limit, at most that many bytes are read. Entries with a git object id
+        are read from the object database through git.
+
+        With raw, files of at least MMAP_MIN_BYTES are mapped, and contents
+        that need no decoding are returned as RawContents, which the caller
+        must close once written.
+
+        Returns:
+            The contents and whether they were truncated to the limit.
+        """
+        st = self._cache_stat(entry, cache, limit)
+        if st is not None:
+            cached = cache.get(entry.path, st)
+            if cached is not None:
+                return cached, False
+
+        try:
+            if raw and entry.object_id is None and entry.size() >= MMAP_MIN_BYTES:
+                contents, truncated = read_mapped(entry.path, limit)
+                if st is not None and not truncated:
+                    cache.put(entry.path, st, contents if isinstance(contents, str)
+                              else contents.decode())
+                return contents, truncated
+            data, truncated = self._read_bytes(entry, limit, git)
+        except Exception as e:
+            return self._read_error(entry, e, debug), False
+
+        contents = decode_text(data)
+        if st is not None and not truncated:
+            cache.put(entry.path, st, contents)
+        return contents, truncated
+
+    def _read_entry_dedup(self, entry: FileEntry, dedup: DedupIndex,
+                          cache: Optional[ManifestCache] = None, debug: bool = False,
+                          limit: Optional[int] = None,
+                          git: Optional[GitSource] = None) -> DedupRead:
+        """
+        Read a file like _read_entry, hashing its contents as they are read.
+
+        Contents another read has already decoded are returned undecoded
+        (and are not added to the cache).
+        """
+        from .dedup import ContentKey, DedupRead, content_key
+
+        st = self._cache_stat(entry, cache, limit)
+        if st is not None:
+            found = cache.lookup(entry.path, st)
+            if found is not None:
+                contents, size, digest = found
+                key = ContentKey(size, digest)
+                dedup.claim(key)
+                return DedupRead(contents, False, key)
+
+        try:
+            data, truncated = self._read_bytes(entry, limit, git)
+        except Exception as e:
+            return DedupRead(self._read_error(entry, e, debug), False, None)
+
+        if truncated:
+            return DedupRead(decode_text(data), True, None)
+        key = content_key(data)
+        if not dedup.claim(key):
+            return DedupRead(None, False, key, data)
+        contents = decode_text(data)
+        if st is not None:
+            cache.put(entry.path, st, contents)
+        return DedupRead(contents, False, key)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,284 @@
+"""
+Command line interface: capture-project.
+
+Kept apart from capture_project so that argument parsing (and --help)
+only imports argparse and the defaults module; the capture machinery is
+imported once the arguments are known.
+"""
+
+# Annotations are not evaluated, which spares importing typing at startup
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from .defaults import COMPRESSIONS, DEFAULT_CACHE_DIR, DEFAULT_SUFFIXES, STDOUT
+
+
+def main():
+    if sys.argv[1:2] == ['serve']:
+        run_serve(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description='Capture project structure and file contents',
+        epilog="Run 'capture-project serve --help' for the capture server."
+    )
+    parser.add_argument('directory', nargs='?', help='Project directory to capture')
+    parser.add_argument('--batch', metavar='FILE',
+                       help='Capture every project directory listed in FILE, one per line')
+    parser.add_argument('--batch-jobs', type=int,
+                       help='Projects captured in parallel with --batch (default: CPU count)')
+    parser.add_argument('--output', '-o', 
+                       help='Output file name, or - for stdout '
+                            '(default: <project_name>_contents.<format>); '
+                            'with --batch, the output directory')
+    parser.add_argument('--format', '-f', choices=['text', 'json', 'yaml', 'pack'],
+                       default='text', help='Output format (default: text)')
+    parser.add_argument('--compact', action='store_true',
+                       help='Write JSON without indentation')
+    parser.add_argument('--compress', choices=COMPRESSIONS,
+                       help='Compress the output (default: from the --output suffix)')
+    parser.add_argument('--split-mb', type=float,
+                       help='Split the output into parts of this many MB plus an index file')
+    parser.add_argument('--stats', '--profile', action='store_true',
+                       help='Write phase timings and counters as JSON to stderr')
+    parser.add_argument('--stats-file', metavar='FILE',
+                       help='Write the --stats report to FILE instead (implies --stats)')
+    parser.add_argument('--debug', action='store_true', 
+                       help='Enable debug output')
+    parser.add_argument('--config', help='Path to configuration file')
+    parser.add_argument('--jobs', '-j', type=int,
+                       help='Number of threads used to read files (default: 1)')
+    parser.add_argument('--source', choices=['filesystem', 'git'],
+                       help='Walk the directory, or list tracked files through git '
+                            '(default: filesystem)')
+    parser.add_argument('--rev',
+                       help='With --source git, read contents from this revision')
+    parser.add_argument('--gitignore', action='store_true',
+                       help="Also apply the project's .gitignore rules")
+    parser.add_argument('--sniff', action='store_true',
+                       help='Classify files as text or binary from their first bytes')
+    parser.add_argument('--watch', action='store_true',
+                       help='Keep the output up to date as files change (Ctrl-C to stop)')
+    parser.add_argument('--watch-interval', type=float, default=1.0, metavar='SECONDS',
+                       help='Seconds between checks for changes with --watch (default: 1)')
+    parser.add_argument('--dedup', action='store_true',
+                       help='Write files with identical contents once, then as references')
+    parser.add_argument('--symlinks', choices=['follow', 'skip'],
+                       help='Follow symlinks, each target once, or leave them out '
+                            '(default: follow)')
+    parser.add_argument('--max-depth', type=int, metavar='N',
+                       help='Do not enter directories more than N levels below the project')
+    parser.add_argument('--max-file-bytes', type=int,
+                       help='Truncate files larger than this many bytes')
+    parser.add_argument('--max-total-bytes', type=int,
+                       help='Stop reading files once this many bytes are captured')
+    parser.add_argument('--budget-tokens', type=int, metavar='N',
+                       help='Fit the capture into about N tokens, reading READMEs, entry '
+                            'points and configuration first and tests last')
+    parser.add_argument('--cache', action='store_true',
+                       help='Reuse unchanged files from an incremental cache in '
+                            f'<project>/{DEFAULT_CACHE_DIR}')
+    parser.add_argument('--cache-dir', metavar='DIR',
+                       help='Keep the incremental cache in DIR instead (implies --cache)')
+
+    args = parser.parse_args()
+    if (args.directory is None) == (args.batch is None):
+        parser.error('give either a project directory or --batch FILE')
+    
+    # Load custom configuration if provided
+    config = load_config(args.config) if args.config else None
+
+    # Command line options override the configuration file
+    overrides = {}
+    if args.jobs is not None:
+        overrides['workers'] = args.jobs
+    if args.max_file_bytes is not None:
+        overrides['max_file_bytes'] = args.max_file_bytes
+    if args.max_total_bytes is not None:
+        overrides['max_total_bytes'] = args.max_total_bytes
+    if args.budget_tokens is not None:
+        overrides['budget_tokens'] = args.budget_tokens
+    if args.cache_dir is not None:
+        overrides['cache_dir'] = args.cache_dir
+    elif args.cache:
+        overrides['cache_dir'] = DEFAULT_CACHE_DIR
+    if args.compress is not None:
+        overrides['compression'] = args.compress
+    if args.split_mb is not None:
+        overrides['split_mb'] = args.split_mb
+    if args.source is not None:
+        overrides['source'] = args.source
+    if args.rev is not None:
+        overrides['git_rev'] = args.rev
+    if args.gitignore:
+        overrides['use_gitignore'] = True
+    if args.sniff:
+        overrides['sniff_binary'] = True
+    if args.dedup:
+        overrides['dedup'] = True
+    if args.symlinks is not None:
+        overrides['symlinks'] = args.symlinks
+    if args.max_depth is not None:
+        overrides['max_depth'] = args.max_depth
+    if args.compact:
+        overrides['json_compact'] = True
+    if overrides:
+        config = {**(config or {}), **overrides}
+
+    if args.batch:
+        run_batch(args, config)
+        return
+
+    # Generate output filename if not provided
+    if not args.output:
+        project_name = os.path.basename(os.path.normpath(args.directory))
+        args.output = f"{project_name}_contents.{args.format}"
+        if args.compress:
+            args.output += DEFAULT_SUFFIXES[args.compress]
+
+    if args.watch:
+        run_watch(args, config)
+        return
+
+    # Keep stdout clean when the capture itself is written there
+    status = sys.stderr if args.output == STDOUT else sys.stdout
+
+    from .capture_project import ProjectCapture
+    from .stats import CaptureStats
+
+    try:
+        capturer = ProjectCapture(config)
+        print(f"Preparing to capture project structure for {args.directory}", file=status)
+        stats = CaptureStats() if args.stats or args.stats_file else None
+        capturer.capture_structure(args.directory, args.output, 
+                                 args.format, args.debug, stats)
+        print(f"Output saved to {args.output}", file=status)
+        if stats is not None:
+            if args.stats_file is None:
+                stats.write_report(sys.stderr)
+            else:
+                with open(args.stats_file, 'w') as f:
+                    stats.write_report(f)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+def run_watch(args: argparse.Namespace, config: dict | None) -> None:
+    """Keep args.output up to date until interrupted."""
+    from .capture_project import ProjectCapture
+
+    def report(changes: int) -> None:
+        print(f"Updated {args.output} ({changes} changes)")
+
+    try:
+        capturer = ProjectCapture(config)
+        print(f"Watching {args.directory} for changes (Ctrl-C to stop)")
+        capturer.watch(args.directory, args.output, args.format,
+                       interval=args.watch_interval, debug=args.debug, on_update=report)
+    except KeyboardInterrupt:
+        print(f"Output saved to {args.output}")
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+def run_batch(args: argparse.Namespace, config: dict | None) -> None:
+    """Capture every project listed in args.batch and report a summary."""
+    from .batch import SUMMARY_FILE, read_batch_file
+    from .capture_project import ProjectCapture
+
+    try:
+        directories = read_batch_file(args.batch)
+        output_dir = args.output or '.'
+        jobs = args.batch_jobs or (config or {}).get('batch_workers')
+        print(f"Capturing {len(directories)} projects into {output_dir}")
+        results = ProjectCapture(config).capture_many(directories, output_dir,
+                                                      args.format, jobs)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    failed = [result for result in results if not result.ok]
+    for result in failed:
+        print(f"Error: {result.directory}: {result.error}", file=sys.stderr)
+    print(f"Captured {len(results) - len(failed)} of {len(results)} projects; "
+          f"summary saved to {os.path.join(output_dir, SUMMARY_FILE)}")
+    if failed:
+        sys.exit(1)
+
+
+def load_config(path: str) -> dict | None:
+    """Read a YAML configuration file."""
+    import yaml
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def run_serve(argv: list) -> None:
+    """Run the capture server until interrupted."""
+    from .serve import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES
+
+    parser = argparse.ArgumentParser(
+        prog='capture-project serve',
+        description='Serve captures over HTTP, sharing them between clients'
+    )
+    parser.add_argument('--host', default='127.0.0.1',
+                       help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765,
+                       help='Port to listen on (default: 8765)')
+    parser.add_argument('--unix-socket', metavar='PATH',
+                       help='Listen on a Unix socket instead of a TCP port')
+    parser.add_argument('--cache-dir',
+                       help='Directory for cached captures (default: a temporary directory)')
+    parser.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES,
+                       help=f'Captures kept in the cache (default: {DEFAULT_MAX_ENTRIES})')
+    parser.add_argument('--max-mb', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                       help='Total size of the cached captures in MB '
+                            f'(default: {DEFAULT_MAX_BYTES // 1024 // 1024})')
+    parser.add_argument('--config', help='Path to configuration file; requests may only '
+                                         'override its budgets, json_compact and dedup')
+    parser.add_argument('--allow-root', action='append', metavar='PATH', required=True,
+                       help='Only capture projects inside PATH (repeatable; required)')
+    parser.add_argument('--debug', action='store_true',
+                       help='Enable debug output and request logging')
+    args = parser.parse_args(argv)
+
+    import shutil
+    import tempfile
+
+    from .serve import CaptureCache, CaptureService, make_server
+
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix='sourcesnatcher-serve-')
+    try:
+        cache = CaptureCache(cache_dir, args.max_entries, int(args.max_mb * 1024 * 1024))
+        service = CaptureService(load_config(args.config) if args.config else None,
+                                 cache, args.debug, args.allow_root)
+        server = make_server(service, args.host, args.port, args.unix_socket)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    import signal
+
+    # Stop cleanly under service managers too, which send SIGTERM
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    where = args.unix_socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Serving captures on {where} (Ctrl-C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        cache.clear()
+        if args.cache_dir is None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Content-addressed deduplication of captured files.
+
+Contents are hashed as they are read. The first file with a given
+(size, sha256) in output order is written in full, and later copies are
+written as references to it. Reads that find their contents already
+claimed by another read skip decoding them: the text is only decoded if
+that copy turns out to be the first one written.
+
+The hash is taken over the bytes as read, which for UTF-8 files with
+'\\n' line endings is also what the incremental cache hashes, so cached
+and freshly read copies share a key.
+"""
+
+import hashlib
+import threading
+from typing import Dict, NamedTuple, Optional, Set
+
+
+class ContentKey(NamedTuple):
+    """Identity of a file's contents."""
+    size: int
+    digest: str
+
+
+def content_key(data: bytes) -> ContentKey:
+    """Hash raw contents."""
+    return ContentKey(len(data), hashlib.sha256(data).hexdigest())
+
+
+class DedupRead(NamedTuple):
+    """
+    A file read with deduplication.
+
+    contents is None when another read already decoded the same bytes;
+    data then holds them, in case this copy is written first after all.
+    key is None for contents that are never deduplicated (truncated
+    files and read errors).
+    """
+    contents: Optional[str]
+    truncated: bool
+    key: Optional[ContentKey]
+    data: Optional[bytes] = None
+
+
+class DedupIndex:
+    """Contents seen by the readers and the path each was first written under."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._claimed: Set[ContentKey] = set()
+        self._written: Dict[ContentKey, str] = {}
+        self.duplicates = 0
+        self.bytes_saved = 0
+
+    def claim(self, key: ContentKey) -> bool:
+        """Return True for the first read of key, which should decode it."""
+        with self._lock:
+            if key in self._claimed:
+                return False
+            self._claimed.add(key)
+            return True
+
+    def original(self, key: ContentKey) -> Optional[str]:
+        """Return the path key was first written under, if any."""
+        return self._written.get(key)
+
+    def written(self, key: ContentKey, relpath: str) -> None:
+        """Record that key has been written in full under relpath."""
+        self._written.setdefault(key, relpath)
+
+    def duplicate(self, key: ContentKey) -> None:
+        """Record a copy of key written as a reference."""
+        self.duplicates += 1
+        self.bytes_saved += key.size
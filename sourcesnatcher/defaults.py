@@ -0,0 +1,17 @@
+"""
+Constants the command line needs before anything else is imported.
+
+This module imports nothing, so building the argument parser (and
+answering --help) stays cheap; sinks and cache re-export these names.
+"""
+
+# Output path meaning stdout
+STDOUT = '-'
+
+COMPRESSIONS = ('gzip', 'lzma', 'bz2')
+
+# Compression name -> suffix added to default output names
+DEFAULT_SUFFIXES = {'gzip': '.gz', 'lzma': '.xz', 'bz2': '.bz2'}
+
+# Incremental cache location, relative to the project
+DEFAULT_CACHE_DIR = '.sourcesnatcher-cache'
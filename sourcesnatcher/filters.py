@@ -0,0 +1,232 @@
+"""
+Compiled include/exclude rules for ProjectCapture.
+
+The configuration lists are turned into frozensets, a suffix tuple and a
+regular expression matcher once, when the capture is configured, instead
+of being scanned linearly for every path. Entries in excluded_dirs and
+excluded_files may be glob patterns, and exclude_patterns accepts
+.gitignore-style rules; both are handled by the same PatternMatcher.
+"""
+
+import functools
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_GLOB_CHARS = frozenset('*?[')
+
+
+@functools.lru_cache(maxsize=None)
+def _mime_is_text(suffix: str) -> bool:
+    """Memoized mimetypes lookup, keyed by the suffix that decides it."""
+    # Imported on first use: only names without a text extension need it
+    import mimetypes
+    mime_type, _ = mimetypes.guess_type('x' + suffix)
+    return mime_type is not None and mime_type.startswith('text')
+
+
+@functools.lru_cache(maxsize=None)
+def _mime_not_binary(suffix: str) -> bool:
+    """Like _mime_is_text, but also accepts suffixes with no known type."""
+    import mimetypes
+    mime_type, _ = mimetypes.guess_type('x' + suffix)
+    return mime_type is None or mime_type.startswith('text')
+
+
+def _mime_suffix(filename: str) -> str:
+    """Return the part of filename that mimetypes.guess_type looks at."""
+    dot = filename.rfind('.')
+    # Like os.path.splitext, leading dots do not start an extension
+    if dot <= 0 or not filename[:dot].lstrip('.'):
+        return ''
+    ext = filename[dot:]
+    import mimetypes
+    # Compression and alias suffixes (.gz, .tgz, ...) defer to the one before
+    if ext in mimetypes.encodings_map or ext in mimetypes.suffix_map:
+        ext = os.path.splitext(filename[:dot])[1] + ext
+    return ext
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob to a regex matching '/'-separated paths."""
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2 if pattern.startswith('[!', i) else i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append('[' + body + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return ''.join(parts)
+
+
+def compile_pattern(line: str) -> Optional[Tuple[str, bool, bool]]:
+    """
+    Compile one .gitignore-style line.
+
+    Returns:
+        (regex, negate, dir_only), or None for blank lines and comments.
+    """
+    line = line.rstrip('\n')
+    if not line.endswith('\\ '):
+        line = line.rstrip()
+    if not line or line.startswith('#'):
+        return None
+
+    negate = line.startswith('!')
+    if negate or line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the project root;
+    # otherwise it matches the name at any depth
+    if '/' in line:
+        regex = _translate_glob(line.lstrip('/'))
+    else:
+        regex = '(?:.*/)?' + _translate_glob(line)
+    return regex, negate, dir_only
+
+
+def read_ignore_file(path: str) -> List[str]:
+    """Return the lines of a .gitignore-style file, or [] if it is missing."""
+    try:
+        with open(path, errors='ignore') as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+
+class PatternMatcher:
+    """
+    Ordered set of .gitignore-style rules matched against relative paths.
+
+    Without negated rules, every rule of a kind is folded into one regex so
+    a path is matched with a single call; otherwise the last matching rule
+    decides, as in .gitignore.
+    """
+
+    def __init__(self, lines: Iterable[str] = ()):
+        compiled = [rule for rule in map(compile_pattern, lines) if rule]
+        self._has_negation = any(negate for _, negate, _ in compiled)
+        self._rules = [(re.compile(regex + r'\Z'), negate, dir_only)
+                       for regex, negate, dir_only in compiled]
+        self._any = self._join([regex for regex, _, _ in compiled])
+        self._any_file = self._join([regex for regex, _, dir_only in compiled if not dir_only])
+
+    @staticmethod
+    def _join(regexes: List[str]) -> Optional[re.Pattern]:
+        if not regexes:
+            return None
+        return re.compile('(?:' + '|'.join(regexes) + r')\Z')
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def matches(self, relpath: str, is_dir: bool) -> bool:
+        """Return True if relpath (using '/' separators) is excluded."""
+        if not self._has_negation:
+            pattern = self._any if is_dir else self._any_file
+            return pattern is not None and pattern.match(relpath) is not None
+
+        for regex, negate, dir_only in reversed(self._rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relpath):
+                return not negate
+        return False
+
+
+class FileFilter:
+    """The capture's include/exclude rules, compiled once."""
+
+    def __init__(self, config: Dict, extra_patterns: Iterable[str] = ()):
+        self._config = config
+        self._extra_patterns = list(extra_patterns)
+        excluded_dirs = config['excluded_dirs']
+        excluded_files = config['excluded_files']
+
+        self.excluded_dirs = frozenset(d for d in excluded_dirs if not _GLOB_CHARS & set(d))
+        self.excluded_files = frozenset(f for f in excluded_files if not _GLOB_CHARS & set(f))
+        self.include_files = frozenset(config['include_files'])
+        # str.endswith with a tuple does the whole suffix scan in C
+        self.text_suffixes = tuple(config['text_extensions'])
+        # When content sniffing decides, names only rule out known binaries
+        self.sniff = bool(config.get('sniff_binary'))
+        self._mime_ok = _mime_not_binary if self.sniff else _mime_is_text
+
+        # Globs from the exclusion lists become basename rules for the
+        # matcher, alongside any .gitignore-style rules
+        self._lines = (
+            [d + '/' for d in excluded_dirs if _GLOB_CHARS & set(d)]
+            + [f for f in excluded_files if _GLOB_CHARS & set(f)]
+            + list(config.get('exclude_patterns') or [])
+            + self._extra_patterns
+        )
+        self.patterns = PatternMatcher(self._lines)
+        self._match = self.patterns.matches if self.patterns else None
+
+    def with_patterns(self, lines: Iterable[str]) -> 'FileFilter':
+        """Return a filter that also applies the given .gitignore lines."""
+        lines = list(lines)
+        if not lines:
+            return self
+        return FileFilter(self._config, self._extra_patterns + lines)
+
+    def is_text_name(self, filename: str) -> bool:
+        """
+        Apply the include_files / text_extensions / MIME rules to a name.
+
+        In sniffing mode this only rules out names with a known non-text
+        MIME type; the file's contents make the final decision.
+        """
+        if self.include_files:
+            return filename in self.include_files
+        if filename.endswith(self.text_suffixes):
+            return True
+        return self._mime_ok(_mime_suffix(filename))
+
+    def include_dir(self, relpath: str) -> bool:
+        """Return True if the walk should descend into relpath."""
+        if relpath.rpartition(os.sep)[2] in self.excluded_dirs:
+            return False
+        return self._match is None or not self._match(relpath.replace(os.sep, '/'), True)
+
+    def include_file(self, relpath: str) -> bool:
+        """Return True if the file at relpath should be captured."""
+        name = relpath.rpartition(os.sep)[2]
+        if name in self.excluded_files:
+            return False
+        # is_text_name, inlined: this runs once for every file in the tree
+        if self.include_files:
+            if name not in self.include_files:
+                return False
+        elif not name.endswith(self.text_suffixes) and not self._mime_ok(_mime_suffix(name)):
+            return False
+        return self._match is None or not self._match(relpath.replace(os.sep, '/'), False)
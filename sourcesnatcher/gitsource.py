@@ -0,0 +1,125 @@
+"""
+Enumerate and read project files through git instead of walking the tree.
+
+Tracked files come from the index (git ls-files) or, for a given
+revision, from the tree object (git ls-tree), which also reports blob
+sizes. Untracked build output never appears in either listing, and
+git's own .gitignore handling applies. With a revision, contents are
+streamed from the object database through a single git cat-file --batch
+process.
+"""
+
+import os
+import subprocess
+import threading
+from typing import List, NamedTuple, Optional, Tuple
+
+# Modes of entries that are not regular files: symlinks and submodules
+_SKIPPED_MODES = ('120000', '160000')
+
+
+class GitFile(NamedTuple):
+    """A tracked file, relative to the capture root."""
+    relpath: str
+    object_id: str
+    size: Optional[int]
+
+
+def _git(root: str, *args: str) -> bytes:
+    try:
+        result = subprocess.run(['git', '-C', root, *args],
+                                capture_output=True, check=True)
+    except FileNotFoundError:
+        raise RuntimeError("The 'git' command is not installed.") from None
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode(errors='replace').strip()
+        raise RuntimeError(f"git {args[0]} failed: {message}") from None
+    return result.stdout
+
+
+class GitSource:
+    """Tracked files of the git checkout containing root."""
+
+    def __init__(self, root: str, rev: Optional[str] = None):
+        self.root = root
+        self.rev = rev
+        self._batch: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def list_files(self) -> List[GitFile]:
+        """
+        List the regular files tracked under root, sorted by path.
+
+        Paths are relative to root and use the platform separator. Without
+        a revision, files deleted from the working tree are left out.
+        """
+        files = {}
+        if self.rev is None:
+            # <mode> <object> <stage>\t<path>
+            output = _git(self.root, 'ls-files', '-z', '--cached', '--stage')
+            for record in output.split(b'\0'):
+                if not record:
+                    continue
+                info, _, path = record.partition(b'\t')
+                mode, object_id, _ = info.decode().split(' ')
+                relpath = os.fsdecode(path).replace('/', os.sep)
+                if mode in _SKIPPED_MODES or relpath in files:
+                    continue
+                if not os.path.lexists(os.path.join(self.root, relpath)):
+                    continue
+                files[relpath] = GitFile(relpath, object_id, None)
+        else:
+            # <mode> <type> <object> <size>\t<path>
+            output = _git(self.root, 'ls-tree', '-r', '-z', '-l', self.rev)
+            for record in output.split(b'\0'):
+                if not record:
+                    continue
+                info, _, path = record.partition(b'\t')
+                mode, kind, object_id, size = info.decode().split()
+                if mode in _SKIPPED_MODES or kind != 'blob':
+                    continue
+                relpath = os.fsdecode(path).replace('/', os.sep)
+                files[relpath] = GitFile(relpath, object_id, int(size))
+
+        return sorted(files.values(), key=lambda f: f.relpath.split(os.sep))
+
+    def read_blob(self, object_id: str, limit: Optional[int] = None) -> Tuple[bytes, bool]:
+        """
+        Read a blob from the object database.
+
+        Returns:
+            The first limit bytes of the blob (all of it without a limit)
+            and whether it was truncated.
+        """
+        with self._lock:
+            if self._batch is None:
+                self._batch = subprocess.Popen(
+                    ['git', '-C', self.root, 'cat-file', '--batch'],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            batch = self._batch
+            batch.stdin.write(object_id.encode() + b'\n')
+            batch.stdin.flush()
+
+            # <object> <type> <size>\n<contents>\n, or <object> missing\n
+            header = batch.stdout.readline().split()
+            if len(header) != 3:
+                raise FileNotFoundError(f"git object not found: {object_id}")
+            size = int(header[2])
+            keep = size if limit is None else min(size, limit)
+            data = batch.stdout.read(keep)
+            # Drain the rest of the blob so the next request starts cleanly
+            remaining = size - keep + 1
+            while remaining:
+                chunk = batch.stdout.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+            return data, keep < size
+
+    def close(self) -> None:
+        """Stop the cat-file process, if one was started."""
+        with self._lock:
+            if self._batch is not None:
+                self._batch.stdin.close()
+                self._batch.wait()
+                self._batch = None
@@ -0,0 +1,222 @@
+"""
+In-memory capture model returned by ProjectCapture.capture.
+
+A capture is a tree of DirNode and FileRecord objects. Both use
+__slots__, and a FileRecord holds only the file's metadata: its contents
+are read from disk (or git) each time they are asked for and are not
+kept, so hundreds of thousands of records can be filtered and queried
+without holding every body in memory. The text tree is rendered from the
+model on demand.
+"""
+
+import fnmatch
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+FILE = 'file'
+BLOB = 'blob'
+
+
+class FileRecord:
+    """
+    One captured file.
+
+    Attributes:
+        relpath: Path relative to the capture root
+        size: Size in bytes
+        mtime: Modification time in seconds, or None for git blobs
+        kind: FILE for files read from disk, BLOB for git objects
+        limit: Most bytes read from the file, or None for all of it
+        object_id: The git object id of a BLOB
+    """
+
+    __slots__ = ('relpath', 'size', 'mtime', 'kind', 'limit', 'object_id', '_capture')
+
+    def __init__(self, relpath: str, size: int, mtime: Optional[float], kind: str = FILE,
+                 limit: Optional[int] = None, object_id: Optional[str] = None,
+                 capture: Optional['CaptureResult'] = None):
+        self.relpath = relpath
+        self.size = size
+        self.mtime = mtime
+        self.kind = kind
+        self.limit = limit
+        self.object_id = object_id
+        self._capture = capture
+
+    def __repr__(self) -> str:
+        return f"FileRecord({self.relpath!r}, size={self.size}, kind={self.kind!r})"
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.relpath)
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the contents are cut short by the size budget."""
+        return self.limit is not None and self.size > self.limit
+
+    @property
+    def contents(self) -> str:
+        """The file's contents, read on every access and not kept."""
+        return self.read()
+
+    def read(self) -> str:
+        """Read the file's contents (up to limit bytes)."""
+        if self._capture is None:
+            raise ValueError(f"{self.relpath} is not attached to a capture")
+        return self._capture._load(self)
+
+
+class DirNode:
+    """A directory in the capture tree; children are sorted by name."""
+
+    __slots__ = ('name', 'children')
+
+    def __init__(self, name: str, children: Optional[List[Union['DirNode', FileRecord]]] = None):
+        self.name = name
+        self.children = children if children is not None else []
+
+    def __repr__(self) -> str:
+        return f"DirNode({self.name!r}, {len(self.children)} children)"
+
+    def walk(self) -> Iterator[FileRecord]:
+        """Yield the records below this directory in tree order."""
+        # Iterative, like the walker, so deep trees cannot hit the
+        # recursion limit
+        stack = [iter(self.children)]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+            elif isinstance(child, DirNode):
+                stack.append(iter(child.children))
+            else:
+                yield child
+
+    def render(self) -> str:
+        """Render the tree as the text output shows it, this node first."""
+        lines = [self.name]
+        # One frame per open directory: its children, the index of the next
+        # one and the prefix of its lines
+        stack = [[self.children, 0, '']]
+        while stack:
+            frame = stack[-1]
+            children, i, prefix = frame
+            if i == len(children):
+                stack.pop()
+                continue
+            frame[1] = i + 1
+
+            child = children[i]
+            is_last = i == len(children) - 1
+            lines.append(f"{prefix}{'└── ' if is_last else '├── '}{child.name}")
+            if isinstance(child, DirNode):
+                stack.append([child.children, 0, prefix + ('    ' if is_last else '│   ')])
+        return '\n'.join(lines)
+
+
+def build_tree(root_name: str, records: Iterable[FileRecord],
+               dirs: Iterable[str] = ()) -> DirNode:
+    """
+    Nest records (and any extra, possibly empty, directories) into a tree.
+
+    Args:
+        root_name: Name shown for the root
+        records: Files, relative to the root
+        dirs: Directory relpaths to include even if they contain no files
+    """
+    root = DirNode(root_name)
+    nodes: Dict[str, DirNode] = {'': root}
+
+    def directory(relpath: str) -> DirNode:
+        # Find the nearest existing ancestor, then create the missing
+        # directories below it top down
+        missing = []
+        while relpath not in nodes:
+            missing.append(relpath)
+            relpath = os.path.dirname(relpath)
+        node = nodes[relpath]
+        for path in reversed(missing):
+            child = nodes[path] = DirNode(os.path.basename(path))
+            node.children.append(child)
+            node = child
+        return node
+
+    for relpath in dirs:
+        directory(relpath)
+    for record in records:
+        directory(os.path.dirname(record.relpath)).children.append(record)
+    for node in nodes.values():
+        node.children.sort(key=lambda child: child.name)
+    return root
+
+
+class CaptureResult:
+    """
+    The tree and file records of one capture.
+
+    Iterating yields the FileRecords whose contents are included, in tree
+    order; files left out by max_total_bytes are still in the tree and are
+    listed in skipped. Close the result (or use it as a context manager)
+    to release the git process and save the cache, if either is used.
+    """
+
+    def __init__(self, root: str, tree: DirNode, files: List[FileRecord],
+                 skipped: Dict[str, str], load: Callable[[FileRecord], Tuple[str, bool]],
+                 close: Optional[Callable[[], None]] = None):
+        self.root = root
+        self.tree = tree
+        self.files = files
+        self.skipped = skipped
+        self._loader = load
+        self._closer = close
+        self._index: Optional[Dict[str, FileRecord]] = None
+
+    def _load(self, record: FileRecord) -> str:
+        return self._loader(record)[0]
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __iter__(self) -> Iterator[FileRecord]:
+        return iter(self.files)
+
+    def __contains__(self, relpath: str) -> bool:
+        return self.get(relpath) is not None
+
+    def __getitem__(self, relpath: str) -> FileRecord:
+        record = self.get(relpath)
+        if record is None:
+            raise KeyError(relpath)
+        return record
+
+    def get(self, relpath: str) -> Optional[FileRecord]:
+        """Return the record for relpath, if it is included."""
+        if self._index is None:
+            self._index = {record.relpath: record for record in self.files}
+        return self._index.get(relpath)
+
+    def select(self, pattern: str) -> List[FileRecord]:
+        """Return the records whose relpath matches a glob pattern."""
+        return [record for record in self.files if fnmatch.fnmatchcase(record.relpath, pattern)]
+
+    @property
+    def total_size(self) -> int:
+        """Bytes of contents included, after the size budget."""
+        return sum(record.size if record.limit is None else min(record.size, record.limit)
+                   for record in self.files)
+
+    def render_tree(self) -> str:
+        """The directory tree as rendered in the text output."""
+        return self.tree.render()
+
+    def close(self) -> None:
+        if self._closer is not None:
+            self._closer()
+            self._closer = None
+
+    def __enter__(self) -> 'CaptureResult':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,160 @@
+"""
+The pack capture format and its random-access reader.
+
+A pack file is laid out as:
+
+    header   MAGIC, format version
+    blobs    the tree, then each file's contents, UTF-8 encoded
+    index    JSON: columns of paths, offsets and lengths, plus the
+             truncated paths, duplicates and metadata
+    trailer  index offset, index length, MAGIC
+
+The index comes after the blobs so a capture can be streamed (even to
+stdout) without knowing the file sizes in advance; the fixed-size trailer
+says where to find it. Duplicate files point at their original's blob.
+
+CaptureReader memory-maps a pack and only touches the header, trailer,
+index and the blobs that are asked for.
+"""
+
+import json
+import mmap
+import struct
+from typing import Any, Dict, Iterator, List, Optional
+
+MAGIC = b'SSNPACK\0'
+VERSION = 1
+
+# MAGIC, version
+HEADER = struct.Struct('<8sI')
+# index offset, index length, MAGIC
+TRAILER = struct.Struct('<QQ8s')
+
+
+class PackFormatError(ValueError):
+    """Raised for a file that is not a readable pack."""
+
+
+class CaptureReader:
+    """
+    Random access to the files in a pack capture.
+
+    Use as a context manager, or call close(). Memoryviews returned by
+    read_bytes are released when the reader is closed, and raise
+    ValueError if used after that.
+
+    Args:
+        path: Path to a .pack file written with format='pack'
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                raise PackFormatError(f"Not a pack file: {path}") from None
+        try:
+            self._index = self._load_index()
+        except Exception:
+            self._map.close()
+            raise
+        self._positions = {path: i for i, path in enumerate(self._index['paths'])}
+        self._truncated = frozenset(self._index.get('truncated', ()))
+        # Views handed out by read_bytes, released by close()
+        self._views: List[memoryview] = []
+
+    def _load_index(self) -> Dict[str, Any]:
+        data = self._map
+        if len(data) < HEADER.size + TRAILER.size:
+            raise PackFormatError(f"Not a pack file: {self.path}")
+        magic, version = HEADER.unpack_from(data, 0)
+        end_magic = data[-len(MAGIC):]
+        if magic != MAGIC or end_magic != MAGIC:
+            raise PackFormatError(f"Not a pack file: {self.path}")
+        if version != VERSION:
+            raise PackFormatError(f"Unsupported pack version {version}: {self.path}")
+        offset, length, _ = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+        return json.loads(data[offset:offset + length])
+
+    def close(self) -> None:
+        """
+        Release the views returned by read_bytes and unmap the file.
+
+        Views sliced from those views hold the mapping open themselves; the
+        file is then unmapped once the last of them is released or freed.
+        """
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> 'CaptureReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, relpath: str) -> bool:
+        return relpath in self._positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index['paths'])
+
+    def paths(self) -> List[str]:
+        """All captured paths (duplicates included), in capture order."""
+        return list(self._index['paths'])
+
+    @property
+    def tree(self) -> str:
+        """The rendered directory tree."""
+        offset, length = self._index['tree']
+        return self._map[offset:offset + length].decode('utf-8')
+
+    @property
+    def metadata(self) -> Optional[Dict[str, Any]]:
+        """The capture's budget metadata, if any."""
+        return self._index.get('metadata')
+
+    @property
+    def duplicates(self) -> Dict[str, str]:
+        """Paths written as duplicates, mapped to their original path."""
+        return self._index.get('duplicates', {})
+
+    def is_truncated(self, relpath: str) -> bool:
+        """Whether a file's contents were cut short by the size budget."""
+        return relpath in self._truncated
+
+    def read_bytes(self, relpath: str) -> memoryview:
+        """
+        Return a file's UTF-8 contents as a zero-copy view of the mapping.
+
+        Raises:
+            KeyError: If relpath is not in the capture
+        """
+        view = self._view(relpath)
+        self._views.append(view)
+        return view
+
+    def _view(self, relpath: str) -> memoryview:
+        i = self._positions[relpath]
+        offset = self._index['offsets'][i]
+        with memoryview(self._map) as whole:
+            return whole[offset:offset + self._index['lengths'][i]]
+
+    def read(self, relpath: str) -> str:
+        """
+        Return a file's contents.
+
+        Raises:
+            KeyError: If relpath is not in the capture
+        """
+        with self._view(relpath) as view:
+            return str(view, 'utf-8', 'surrogatepass')
@@ -0,0 +1,85 @@
+"""
+Priority order for token-budgeted captures.
+
+When a capture has to fit a token budget, the files that explain a
+project best are read first: READMEs, then entry points, then build and
+configuration files, then the rest of the sources, with tests, lock files
+and generated-looking files last. Within a class, recently modified
+files come first, so the parts of a project under active work survive a
+tight budget.
+
+Scoring only looks at names and stat results the walk already has, so
+files are ordered without being opened.
+"""
+
+import os
+import re
+from typing import Tuple
+
+from .walker import FileEntry
+
+# Priority classes, best first
+README, ENTRY_POINT, CONFIG, SOURCE, TEST, LAST = range(6)
+
+ENTRY_POINT_NAMES = frozenset([
+    '__main__.py', 'main.py', 'app.py', 'cli.py', 'manage.py', 'wsgi.py', 'asgi.py',
+    'index.js', 'index.ts', 'main.js', 'main.ts', 'server.js', 'main.go',
+    'main.rs', 'lib.rs', 'main.c', 'main.cpp',
+])
+
+CONFIG_NAMES = frozenset([
+    'pyproject.toml', 'setup.py', 'setup.cfg', 'requirements.txt', 'Pipfile',
+    'tox.ini', 'package.json', 'tsconfig.json', 'Cargo.toml', 'go.mod',
+    'Makefile', 'Dockerfile', 'docker-compose.yml', 'docker-compose.yaml',
+    'config.yaml', 'config.yml', 'config.json', 'settings.py',
+])
+
+CONFIG_SUFFIXES = ('.toml', '.ini', '.cfg', '.conf', '.yaml', '.yml', '.j2', '.tf')
+
+# Large, machine-written files that rarely help a reader
+LAST_NAMES = frozenset([
+    'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock',
+    'Pipfile.lock', 'Cargo.lock', 'go.sum', 'composer.lock',
+])
+
+_TEST_DIRS = frozenset(['test', 'tests', 'testing', 'spec', '__tests__'])
+_TEST_NAME = re.compile(r'^(test_.*|.*_test\.\w+|.*\.(test|spec)\.\w+|conftest\.py)$')
+_LAST_NAME = re.compile(r'.*\.min\.(js|css)$|.*\.(map|lock)$')
+
+
+def classify(relpath: str) -> int:
+    """Return the priority class of a path (lower is read first)."""
+    name = os.path.basename(relpath)
+    if name in LAST_NAMES or _LAST_NAME.match(name):
+        return LAST
+    parts = relpath.split(os.sep)
+    if _TEST_NAME.match(name) or any(part in _TEST_DIRS for part in parts[:-1]):
+        return TEST
+    if name.lower().startswith('readme'):
+        return README
+    if name in ENTRY_POINT_NAMES:
+        return ENTRY_POINT
+    if name in CONFIG_NAMES or name.endswith(CONFIG_SUFFIXES):
+        return CONFIG
+    return SOURCE
+
+
+def priority_key(entry: FileEntry) -> Tuple:
+    """
+    Sort key that orders files best first.
+
+    Files sort by class; READMEs, entry points and configuration files
+    nearer the root come first within their class. Then the most
+    recently modified come first, and the path breaks ties so the order
+    is stable. Git blobs at a revision have no mtime and sort as oldest.
+    """
+    relpath = entry.relpath
+    category = classify(relpath)
+    depth = relpath.count(os.sep) if category < SOURCE else 0
+    mtime = 0.0
+    if entry.object_id is None:
+        try:
+            mtime = entry.stat().st_mtime
+        except OSError:
+            pass
+    return category, depth, -mtime, relpath
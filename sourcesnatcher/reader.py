@@ -0,0 +1,161 @@
+"""
+Ordered, optionally parallel file reading for ProjectCapture.
+
+Large files can also be read through mmap without decoding: contents
+that are plain ASCII without carriage returns decode to the same bytes in
+any ASCII-compatible encoding, so writers that emit bytes can copy them
+to the output as they are and only the other formats pay for a str.
+"""
+
+import locale
+import mmap
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, Tuple, TypeVar, Union
+
+# The encoding open() uses in text mode when none is given
+_TEXT_ENCODING = locale.getpreferredencoding(False)
+
+# Files at least this large are mapped instead of read into a bytes object
+MMAP_MIN_BYTES = 256 * 1024
+
+# Mapped contents are checked for non-ASCII bytes this much at a time
+_CHECK_CHUNK = 64 * 1024
+
+_ASCII = bytes(range(128))
+
+
+def ascii_compatible(encoding: Optional[str]) -> bool:
+    """Whether encoding writes ASCII text as the same bytes."""
+    if not encoding:
+        return False
+    try:
+        return _ASCII.decode('ascii').encode(encoding) == _ASCII
+    except (LookupError, UnicodeError):
+        return False
+
+
+_RAW_INPUT = ascii_compatible(_TEXT_ENCODING)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def read_in_order(items: Iterable[T], read: Callable[[T], R],
+                  workers: int = 1,
+                  window: Optional[int] = None) -> Iterator[Tuple[T, R]]:
+    """
+    Apply read to each item, yielding (item, result) in input order.
+
+    With more than one worker the reads run on a thread pool. At most
+    window reads are in flight or waiting to be consumed at any time, so
+    a slow consumer (for example the output writer) applies back-pressure
+    instead of letting finished contents pile up in memory.
+
+    Args:
+        items: Items to read, in the order results should be yielded
+        read: Function called with each item
+        workers: Number of reader threads; 1 reads inline
+        window: Maximum number of outstanding reads (default: 4 per worker)
+    """
+    if workers <= 1:
+        for item in items:
+            yield item, read(item)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    window = window or workers * 4
+    iterator = iter(items)
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for item in islice(iterator, window):
+                pending.append((item, pool.submit(read, item)))
+
+            while pending:
+                item, future = pending.popleft()
+                result = future.result()
+                for next_item in islice(iterator, 1):
+                    pending.append((next_item, pool.submit(read, next_item)))
+                yield item, result
+        finally:
+            # Consumer stopped early or a read failed: drop queued work
+            for _, future in pending:
+                future.cancel()
+
+
+def _is_raw_text(view: memoryview) -> bool:
+    """Whether view is ASCII without '\r', i.e. already its own decoded text."""
+    if view.obj.find(b'\r', 0, len(view)) != -1:
+        return False
+    # Small copies keep bytes.isascii's speed without copying the file
+    return all(bytes(view[i:i + _CHECK_CHUNK]).isascii()
+               for i in range(0, len(view), _CHECK_CHUNK))
+
+
+class RawContents:
+    """
+    Undecoded contents of a mapped file, known to be ASCII without '\r'.
+
+    data is a view of the mapping; close() releases it once written.
+    """
+
+    __slots__ = ('data', '_map')
+
+    def __init__(self, data: memoryview, mapping: mmap.mmap):
+        self.data = data
+        self._map = mapping
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def decode(self) -> str:
+        """The contents as text, for writers that need a str."""
+        return str(self.data, 'ascii')
+
+    def close(self) -> None:
+        self.data.release()
+        self._map.close()
+
+
+def read_mapped(path: str, limit: Optional[int] = None) -> Tuple[Union[str, RawContents], bool]:
+    """
+    Read a file through mmap, decoding only when its bytes are not already text.
+
+    Returns:
+        RawContents (or the decoded text) and whether the contents were
+        truncated to limit.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return '', False
+
+    truncated = limit is not None and len(mapping) > limit
+    view = memoryview(mapping)[:limit] if truncated else memoryview(mapping)
+    if _RAW_INPUT and _is_raw_text(view):
+        return RawContents(view, mapping), truncated
+    try:
+        return decode_text(view), truncated
+    finally:
+        view.release()
+        mapping.close()
+
+
+def decode_text(data: bytes) -> str:
+    """
+    Decode file contents the way open(path, 'r', errors='ignore') would.
+
+    Undecodable bytes are dropped, which also covers a multi-byte character
+    cut in half by a read limit, and line endings are translated to '\n'.
+    Any bytes-like object is accepted, so mapped files decode without an
+    intermediate copy.
+    """
+    text = str(data, _TEXT_ENCODING, 'ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
@@ -0,0 +1,452 @@
+"""
+Capture server: share captures of the same trees between clients.
+
+A long-running process answers capture requests over HTTP on a local
+port or a Unix socket. Each request walks the project once; the walk's
+tree and stat results (size, mtime, inode, or the git object id) are
+hashed into a fingerprint. If a capture with the same root, settings,
+format and fingerprint is in the cache, it is sent without reading a
+single file. Otherwise the same walk is used to write a fresh capture
+into the cache, and the capture is sent from there. The cache keeps the
+most recently used captures on disk, up to a number of entries and a
+total size.
+
+Requests for a project that is already being captured with the same
+settings wait for that capture instead of walking the tree again, and
+are answered with its result.
+
+Endpoints:
+    GET  /capture?root=PATH&format=json
+    POST /capture with a JSON body {"root": ..., "format": ..., "config": {...}}
+    GET  /stats
+
+Responses carry X-Capture-Cache (hit, miss or shared) and
+X-Capture-Fingerprint headers; errors are JSON {"error": message}.
+
+Any local client can send requests, so they may only override the
+settings in REQUEST_OVERRIDES; the filters, source, cache and everything
+else come from the server's configuration. Roots outside the service's
+allowed_roots are refused with 403, and a service without any refuses
+every root. Symlinks are left out of served captures, so a link cannot
+lead outside the allowed roots.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import socketserver
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import IO, Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .walker import ScanResult
+
+FORMATS = ('text', 'json', 'yaml', 'pack')
+
+CONTENT_TYPES = {
+    'text': 'text/plain; charset=utf-8',
+    'json': 'application/json',
+    'yaml': 'application/yaml; charset=utf-8',
+    'pack': 'application/octet-stream',
+}
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Settings that only make sense when writing to a named file, and symlinks,
+# which could lead a capture out of the allowed roots
+_SERVER_OVERRIDES = {'compression': None, 'split_mb': None, 'symlinks': 'skip'}
+
+# Settings a request may override; filters, the source and the cache
+# would let clients read or write outside the projects they ask for
+REQUEST_OVERRIDES = frozenset([
+    'max_file_bytes', 'max_total_bytes', 'budget_tokens', 'json_compact', 'dedup',
+])
+
+HIT, MISS, SHARED = 'hit', 'miss', 'shared'
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """Stable hash of a capture configuration."""
+    data = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def tree_fingerprint(scan: ScanResult) -> str:
+    """
+    Hash a walk's tree and the stat signature of each selected file.
+
+    Any file that is added, removed, renamed or modified changes the
+    fingerprint, without any file being read.
+    """
+    digest = hashlib.sha256()
+    for line in scan.tree_lines:
+        digest.update(line.encode('utf-8', 'surrogatepass'))
+        digest.update(b'\n')
+    for entry in scan.files:
+        if entry.object_id is not None:
+            signature = f"{entry.relpath}\0{entry.object_id}\n"
+        else:
+            try:
+                st = entry.stat()
+            except OSError:
+                signature = f"{entry.relpath}\0missing\n"
+            else:
+                signature = f"{entry.relpath}\0{st.st_size}\0{st.st_mtime_ns}\0{st.st_ino}\n"
+        digest.update(signature.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+class CaptureCache:
+    """
+    Captures on disk, evicted least recently used first.
+
+    Args:
+        directory: Where the captures are stored
+        max_entries: Most captures kept
+        max_bytes: Most bytes kept; a single larger capture is still
+            served, then evicted by the next one
+    """
+
+    def __init__(self, directory: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple, Tuple[str, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def open(self, key: Tuple) -> Optional[IO[bytes]]:
+        """
+        Open the capture stored under key and mark it as recently used.
+
+        The file is opened under the lock, so it stays readable even if
+        it is evicted while being sent.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return open(entry[0], 'rb')
+
+    def new_path(self) -> str:
+        """Return a fresh path in the cache directory to write a capture to."""
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        return path
+
+    def put(self, key: Tuple, path: str) -> IO[bytes]:
+        """
+        Store the capture written to path under key and open it.
+
+        Returns:
+            The stored capture, opened for reading.
+        """
+        size = os.path.getsize(path)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._remove(*old)
+            self._entries[key] = (path, size)
+            self._bytes += size
+            f = open(path, 'rb')
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or
+                                              self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._remove(*evicted)
+        return f
+
+    def _remove(self, path: str, size: int) -> None:
+        self._bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Remove every stored capture."""
+        with self._lock:
+            for entry in self._entries.values():
+                self._remove(*entry)
+            self._entries.clear()
+
+
+class _Flight:
+    """A capture in progress that other requests can wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.key: Optional[Tuple] = None
+        self.fingerprint: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class CaptureService:
+    """
+    Answers capture requests from the cache, coalescing concurrent ones.
+
+    Args:
+        config: Base configuration; requests may override the keys in
+            REQUEST_OVERRIDES
+        cache: Where captures are kept
+        debug: Whether to print debug information
+        allowed_roots: Directories that requested roots must be inside;
+            without any, every root is refused
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]], cache: CaptureCache,
+                 debug: bool = False, allowed_roots: Optional[List[str]] = None):
+        self.config = dict(config or {})
+        self.cache = cache
+        self.debug = debug
+        self.allowed_roots = [os.path.realpath(path) for path in allowed_roots or []]
+        self.counts = dict.fromkeys([HIT, MISS, SHARED], 0)
+        self._flights: Dict[Tuple, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def capture(self, root: str, format: str = 'text',
+                overrides: Optional[Dict[str, Any]] = None) -> Tuple[IO[bytes], str, str]:
+        """
+        Return a capture of root, from the cache when the tree is unchanged.
+
+        Args:
+            root: Path to the project directory
+            format: Output format ('text', 'json', 'yaml', or 'pack')
+            overrides: Configuration keys replacing the service's own
+
+        Returns:
+            The capture opened for reading (the caller closes it), HIT, MISS
+            or SHARED, and the tree fingerprint.
+
+        Raises:
+            PermissionError: If root is outside the allowed roots
+            FileNotFoundError: If root is not a directory
+            ValueError: For an unknown format, an override that requests
+                may not set, or an invalid configuration
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format: {format}")
+        refused = sorted(set(overrides or {}) - REQUEST_OVERRIDES)
+        if refused:
+            raise ValueError(f"Settings not allowed in requests: {', '.join(refused)}")
+        root = os.path.realpath(root)
+        if not self.root_allowed(root):
+            raise PermissionError(f"Root not allowed: {root}")
+        if not os.path.isdir(root):
+            raise FileNotFoundError(f"Directory not found: {root}")
+        config = {**self.config, **(overrides or {}), **_SERVER_OVERRIDES}
+        request = (root, config_hash(config), format)
+
+        while True:
+            with self._lock:
+                flight = self._flights.get(request)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[request] = _Flight()
+
+            if leader:
+                try:
+                    f, status = self._capture(request, config, flight)
+                except BaseException as e:
+                    flight.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        del self._flights[request]
+                    flight.done.set()
+                self._count(status)
+                return f, status, flight.fingerprint
+
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            f = self.cache.open(flight.key)
+            if f is not None:
+                self._count(SHARED)
+                return f, SHARED, flight.fingerprint
+            # Evicted before it could be opened; capture again
+
+    def root_allowed(self, root: str) -> bool:
+        """Whether a resolved root is inside one of the allowed roots."""
+        return any(os.path.commonpath([allowed, root]) == allowed
+                   for allowed in self.allowed_roots)
+
+    def _count(self, status: str) -> None:
+        with self._lock:
+            self.counts[status] += 1
+
+    def _capture(self, request: Tuple, config: Dict[str, Any],
+                 flight: _Flight) -> Tuple[IO[bytes], str]:
+        from .capture_project import ProjectCapture
+
+        root, _, format = request
+        capturer = ProjectCapture(config)
+        source = capturer._prepare(root)
+        try:
+            scan = capturer._scan(source, self.debug)
+        except BaseException:
+            if source.git is not None:
+                source.git.close()
+            raise
+
+        flight.fingerprint = tree_fingerprint(scan)
+        flight.key = request + (flight.fingerprint,)
+        f = self.cache.open(flight.key)
+        if f is not None:
+            if source.git is not None:
+                source.git.close()
+            return f, HIT
+
+        if self.debug:
+            print(f"Capturing {root} ({format})", file=sys.stderr)
+        path = self.cache.new_path()
+        try:
+            capturer._capture_scan(source, scan, path, format, self.debug)
+        except BaseException:
+            os.remove(path)
+            raise
+        return self.cache.put(flight.key, path), MISS
+
+    def stats(self) -> Dict[str, int]:
+        """Request counts and cache usage."""
+        with self._lock:
+            counts = dict(self.counts)
+        counts['entries'] = len(self.cache)
+        counts['bytes'] = self.cache.total_bytes
+        return counts
+
+
+class CaptureRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a CaptureService (server.service)."""
+
+    server_version = 'sourcesnatcher'
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self) -> str:
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.service.debug:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == '/stats':
+            self._send_json(200, self.server.service.stats())
+        elif url.path == '/capture':
+            query = parse_qs(url.query)
+            self._capture({name: values[-1] for name, values in query.items()})
+        else:
+            self._send_json(404, {'error': f"Unknown path: {url.path}"})
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != '/capture':
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError("the body must be a JSON object")
+        except ValueError as e:
+            self._send_json(400, {'error': f"Invalid request: {e}"})
+            return
+        self._capture(body)
+
+    def _capture(self, params: Dict[str, Any]) -> None:
+        root = params.get('root')
+        format = params.get('format', 'text')
+        overrides = params.get('config') or {}
+        if not root:
+            self._send_json(400, {'error': "Missing root"})
+            return
+        if not isinstance(overrides, dict):
+            self._send_json(400, {'error': "config must be a JSON object"})
+            return
+
+        try:
+            f, status, fingerprint = self.server.service.capture(root, format, overrides)
+        except PermissionError as e:
+            self._send_json(403, {'error': str(e)})
+            return
+        except FileNotFoundError as e:
+            self._send_json(404, {'error': str(e)})
+            return
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+
+        with f:
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPES[format])
+            self.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+            self.send_header('X-Capture-Cache', status)
+            self.send_header('X-Capture-Fingerprint', fingerprint)
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+
+
+class CaptureHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server on a TCP port."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: CaptureService):
+        self.service = service
+        super().__init__(address, CaptureRequestHandler)
+
+
+class UnixCaptureServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded HTTP server on a Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, service: CaptureService):
+        self.service = service
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, CaptureRequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+
+def make_server(service: CaptureService, host: str = '127.0.0.1', port: int = 8765,
+                unix_socket: Optional[str] = None) -> socketserver.BaseServer:
+    """Bind a server for service to a Unix socket if given, else to host and port."""
+    if unix_socket is not None:
+        return UnixCaptureServer(unix_socket, service)
+    return CaptureHTTPServer((host, port), service)
@@ -0,0 +1,160 @@
+"""
+Output sinks: plain files, stdout, stdlib compression and size-split parts.
+
+The writers only ever see a text stream; open_sink stacks a text wrapper,
+an optional compressor and the destination (a file, stdout, or a series
+of fixed-size part files with an index) underneath it, so every
+combination keeps streaming one file at a time.
+"""
+
+import io
+import json
+import os
+import sys
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, TextIO
+
+from .defaults import COMPRESSIONS, DEFAULT_SUFFIXES, STDOUT
+
+# The constants live in defaults so the CLI can use them without importing
+# this module; they are re-exported here
+__all__ = ['COMPRESSIONS', 'DEFAULT_SUFFIXES', 'STDOUT', 'SUFFIXES', 'SplitFile',
+           'compression_for', 'open_sink']
+
+# Suffix -> compression name
+SUFFIXES = {
+    '.gz': 'gzip',
+    '.xz': 'lzma',
+    '.lzma': 'lzma',
+    '.bz2': 'bz2',
+}
+
+
+def compression_for(output: str) -> Optional[str]:
+    """Return the compression implied by an output file's suffix."""
+    return SUFFIXES.get(os.path.splitext(output)[1].lower())
+
+
+def _compressor(name: str, raw: io.RawIOBase):
+    """Wrap a binary stream in a stdlib compressor, imported on demand."""
+    if name == 'gzip':
+        import gzip
+        return gzip.GzipFile(fileobj=raw, mode='wb')
+    if name == 'lzma':
+        import lzma
+        return lzma.LZMAFile(raw, mode='wb')
+    if name == 'bz2':
+        import bz2
+        return bz2.BZ2File(raw, mode='wb')
+    raise ValueError(f"Unknown compression: {name}")
+
+
+class SplitFile(io.RawIOBase):
+    """
+    Binary file that rolls over to a new part every part_bytes bytes.
+
+    Parts are named <output>.part0001, <output>.part0002, ... and closing
+    the file writes <output>.index.json listing them in order, so the
+    original stream is the concatenation of the parts.
+    """
+
+    def __init__(self, output: str, part_bytes: int, compression: Optional[str] = None):
+        if part_bytes <= 0:
+            raise ValueError("part_bytes must be positive")
+        self.output = output
+        self.part_bytes = part_bytes
+        self.compression = compression
+        self.parts: List[str] = []
+        self.sizes: List[int] = []
+        self._current = None
+        self._written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def _next_part(self) -> None:
+        if self._current is not None:
+            self._current.close()
+        name = f"{self.output}.part{len(self.parts) + 1:04d}"
+        self._current = open(name, 'wb')
+        self.parts.append(name)
+        self.sizes.append(0)
+        self._written = 0
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast('B')
+        total = len(view)
+        while view:
+            if self._current is None or self._written >= self.part_bytes:
+                self._next_part()
+            chunk = view[:self.part_bytes - self._written]
+            self._current.write(chunk)
+            self._written += len(chunk)
+            self.sizes[-1] += len(chunk)
+            view = view[len(chunk):]
+        return total
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self._current is None:
+            self._next_part()
+        self._current.close()
+        index = {
+            'parts': [os.path.basename(part) for part in self.parts],
+            'sizes': self.sizes,
+            'total_bytes': sum(self.sizes),
+            'compression': self.compression,
+        }
+        with open(f"{self.output}.index.json", 'w') as f:
+            json.dump(index, f, indent=2)
+        super().close()
+
+
+@contextmanager
+def open_sink(output: str, compression: Optional[str] = None,
+              split_bytes: Optional[int] = None) -> Iterator[TextIO]:
+    """
+    Open the text stream a capture is written to.
+
+    Args:
+        output: Output path, or '-' for stdout
+        compression: 'gzip', 'lzma' or 'bz2'; by default taken from the
+            output suffix (.gz, .xz/.lzma, .bz2)
+        split_bytes: Split the (compressed) output into parts of this size
+    """
+    if compression is None and output != STDOUT:
+        compression = compression_for(output)
+
+    if compression is None and split_bytes is None:
+        if output == STDOUT:
+            yield sys.stdout
+            sys.stdout.flush()
+        else:
+            with open(output, 'w') as f:
+                yield f
+        return
+
+    if split_bytes is not None:
+        if output == STDOUT:
+            raise ValueError("Cannot split output written to stdout")
+        raw = io.BufferedWriter(SplitFile(output, split_bytes, compression))
+    elif output == STDOUT:
+        sys.stdout.flush()
+        raw = sys.stdout.buffer
+    else:
+        raw = open(output, 'wb')
+
+    binary = _compressor(compression, raw) if compression else raw
+    text = io.TextIOWrapper(binary)
+    try:
+        yield text
+    finally:
+        text.flush()
+        text.detach()
+        if binary is not raw:
+            binary.close()
+        if raw is sys.stdout.buffer:
+            raw.flush()
+        else:
+            raw.close()
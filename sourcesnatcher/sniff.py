@@ -0,0 +1,73 @@
+"""
+Content sniffing for text/binary classification.
+
+Only a bounded prefix of each file is read, so deciding that a large file
+is binary never pulls the whole file into memory. Decisions are cached per
+(st_dev, st_ino, st_mtime_ns) so repeated captures in the same process do
+not reopen unchanged files.
+"""
+
+import codecs
+import os
+import threading
+from typing import Dict, Tuple
+
+DEFAULT_SNIFF_BYTES = 8192
+
+# Bytes that commonly appear in text files besides the printable range
+_TEXT_CONTROL = frozenset(b'\t\n\r\f\b\x1b')
+_NON_TEXT = bytes(b for b in range(32) if b not in _TEXT_CONTROL) + b'\x7f'
+
+
+def looks_like_text(prefix: bytes) -> bool:
+    """
+    Classify a file from the first bytes of its contents.
+
+    A NUL byte means binary. Otherwise the share of control characters
+    decides: up to 30% is accepted for valid UTF-8 (allowing a character
+    cut off at the end of the prefix), and up to 10% for anything else,
+    which is assumed to be text in a legacy 8-bit encoding.
+    """
+    if not prefix:
+        return True
+    if b'\0' in prefix:
+        return False
+
+    control = (len(prefix) - len(prefix.translate(None, _NON_TEXT))) / len(prefix)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return control <= 0.1
+    return control <= 0.3
+
+
+class Sniffer:
+    """Reads bounded file prefixes and caches the resulting decisions."""
+
+    def __init__(self, prefix_bytes: int = DEFAULT_SNIFF_BYTES):
+        self.prefix_bytes = prefix_bytes
+        self._cache: Dict[Tuple[int, int, int], bool] = {}
+        self._lock = threading.Lock()
+
+    def is_text(self, path: str) -> bool:
+        """Return True if the file at path looks like text."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            with open(path, 'rb') as f:
+                result = looks_like_text(f.read(self.prefix_bytes))
+        except OSError:
+            return False
+
+        with self._lock:
+            self._cache[key] = result
+        return result
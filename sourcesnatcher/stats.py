@@ -0,0 +1,148 @@
+"""
+Timing and counter instrumentation for captures.
+
+A CaptureStats passed to ProjectCapture.capture_structure records the wall
+time of each phase, file and byte counters, skip reasons and the slowest
+reads. Without one, the capture takes none of the timing paths: the
+filters, reader and output stream are only wrapped when stats are being
+collected.
+"""
+
+import heapq
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+# 'filter' is the time spent in the include/exclude rules, which run
+# during (and so are also counted in) 'walk'. 'read' is summed over all
+# reader threads.
+PHASES = ('walk', 'filter', 'read', 'serialize', 'write')
+
+
+class CaptureStats:
+    """
+    Collects per-phase timings and counters for one or more captures.
+
+    Args:
+        slowest: How many of the slowest file reads to keep
+        on_phase: Called with (phase, seconds) whenever a phase finishes
+        on_file: Called with (relpath, seconds, chars) after each file read
+    """
+
+    def __init__(self, slowest: int = 10,
+                 on_phase: Optional[Callable[[str, float], None]] = None,
+                 on_file: Optional[Callable[[str, float, int], None]] = None):
+        self.slowest = slowest
+        self.on_phase = on_phase
+        self.on_file = on_file
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.counters: Counter = Counter()
+        self.skipped: Counter = Counter()
+        self._slowest: List[Tuple[float, str, int]] = []
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        """Add seconds to a phase."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        if self.on_phase is not None:
+            self.on_phase(phase, seconds)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as part of a phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increment a counter."""
+        self.counters[name] += amount
+
+    def skip(self, reason: str, amount: int = 1) -> None:
+        """Record files left out of the capture, by reason."""
+        self.skipped[reason] += amount
+
+    def record_file(self, relpath: str, seconds: float, chars: int) -> None:
+        """Record one file read; keeps the slowest reads in a bounded heap."""
+        item = (seconds, relpath, chars)
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, item)
+        elif self.slowest:
+            heapq.heappushpop(self._slowest, item)
+        if self.on_file is not None:
+            self.on_file(relpath, seconds, chars)
+
+    def timed(self, phase: str, func: Callable, counter: Optional[str] = None) -> Callable:
+        """
+        Wrap func so that every call is timed as part of phase.
+
+        If counter is given, every call also increments it, and every call
+        that returns a false value increments '<counter>_rejected'.
+        """
+        clock = time.perf_counter
+        phases = self.phases
+        counters = self.counters
+        rejected = f"{counter}_rejected"
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                phases[phase] += clock() - start
+            if counter is not None:
+                counters[counter] += 1
+                if not result:
+                    counters[rejected] += 1
+            return result
+
+        return wrapper
+
+    def report(self) -> Dict[str, Any]:
+        """Return the collected statistics as a JSON-serializable dict."""
+        return {
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'counters': dict(self.counters),
+            'skipped': dict(self.skipped),
+            'slowest_files': [
+                {'path': relpath, 'seconds': round(seconds, 6), 'chars': chars}
+                for seconds, relpath, chars in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+    def write_report(self, stream: TextIO) -> None:
+        """Write the report as indented JSON."""
+        json.dump(self.report(), stream, indent=2)
+        stream.write('\n')
+
+
+class TimedStream:
+    """
+    Text stream proxy that times and counts writes to the output sink.
+
+    Time spent inside write() is the 'write' phase; the writers' own work
+    around it is what the capture reports as 'serialize'. Bytes written
+    straight to the buffer count as characters, since only ASCII is.
+    """
+
+    def __init__(self, stream: TextIO, stats: CaptureStats):
+        self._stream = stream
+        self._stats = stats
+
+    def write(self, data) -> int:
+        start = time.perf_counter()
+        result = self._stream.write(data)
+        self._stats.phases['write'] += time.perf_counter() - start
+        self._stats.counters['output_chars'] += len(data)
+        return result
+
+    @property
+    def buffer(self) -> 'TimedStream':
+        """The binary buffer underneath, timed the same way."""
+        return TimedStream(self._stream.buffer, self._stats)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
@@ -0,0 +1,296 @@
+"""
+Single-pass directory traversal used by ProjectCapture.
+
+The walker visits each directory once with os.scandir, applies the
+directory and file filters a single time per entry and produces both the
+rendered tree lines and the manifest of files whose contents should be
+captured.
+
+Directories and files are identified by (st_dev, st_ino), so a symlink
+cycle, or a second path to the same directory, is listed once and not
+entered again, and hard links and symlinked copies of a file are read
+once. The walk keeps an explicit stack rather than recursing, so deep
+trees cannot hit the interpreter's recursion limit.
+"""
+
+import os
+import sys
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class FileEntry(NamedTuple):
+    """A file selected for capture during the walk."""
+    path: str
+    relpath: str
+    dirent: Optional[os.DirEntry] = None
+    # Set when the contents come from a git blob rather than the file
+    object_id: Optional[str] = None
+    object_size: Optional[int] = None
+    # Relative path of an earlier file that is the same physical file
+    same_as: Optional[str] = None
+
+    def stat(self) -> os.stat_result:
+        """Stat the file, reusing the DirEntry's cached result when available."""
+        if self.dirent is not None:
+            return self.dirent.stat()
+        return os.stat(self.path)
+
+    def size(self) -> int:
+        """Size of the contents that will be read, in bytes."""
+        if self.object_size is not None:
+            return self.object_size
+        return self.stat().st_size
+
+
+class ScanResult(NamedTuple):
+    """Tree lines and file manifest produced by a single walk."""
+    tree_lines: List[str]
+    files: List[FileEntry]
+
+
+def list_dir(path: str, relbase: str,
+             include_dir: Callable[[str], bool],
+             include_file: Callable[[str], bool],
+             debug: bool = False,
+             follow_symlinks: bool = True) -> List[Tuple[os.DirEntry, str, bool]]:
+    """
+    List the entries of one directory that pass the filters.
+
+    Args:
+        path: Directory to list
+        relbase: Its path relative to the project root ('' for the root)
+        include_dir: Called with a directory's relative path
+        include_file: Called with a file's relative path
+        debug: Whether to print debug information
+        follow_symlinks: Whether to keep symlinks; when False they are
+            left out
+
+    Returns:
+        (entry, relpath, is_dir) for each kept entry, sorted by name.
+    """
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+
+    kept = []
+    for entry in entries:
+        relpath = os.path.join(relbase, entry.name) if relbase else entry.name
+        if not follow_symlinks and entry.is_symlink():
+            if debug:
+                print(f"Skipping symlink: {entry.name}", file=sys.stderr)
+            continue
+        # DirEntry caches the d_type from readdir, so this is usually
+        # answered without an extra stat call
+        if entry.is_dir():
+            if not include_dir(relpath):
+                if debug:
+                    print(f"Skipping excluded directory: {entry.name}", file=sys.stderr)
+                continue
+            kept.append((entry, relpath, True))
+        else:
+            if not include_file(relpath):
+                if debug:
+                    print(f"Skipping non-text file: {entry.name}", file=sys.stderr)
+                continue
+            kept.append((entry, relpath, False))
+    return kept
+
+
+def depth(relpath: str) -> int:
+    """Depth of a path below the project root (1 for the root's entries)."""
+    return relpath.count(os.sep) + 1
+
+
+def identity(st: os.stat_result) -> Tuple[int, int]:
+    """The (device, inode) pair that identifies a physical file or directory."""
+    return st.st_dev, st.st_ino
+
+
+def scan_project(startpath: str,
+                 include_dir: Callable[[str], bool],
+                 include_file: Callable[[str], bool],
+                 debug: bool = False,
+                 on_file: Optional[Callable[[FileEntry], None]] = None,
+                 follow_symlinks: bool = True,
+                 max_depth: Optional[int] = None) -> ScanResult:
+    """
+    Walk a project directory once and collect its tree and file manifest.
+
+    Args:
+        startpath: Path to the project directory
+        include_dir: Called with a directory's relative path, returns False
+            to prune it
+        include_file: Called with a file's relative path, returns False to
+            skip it
+        debug: Whether to print debug information
+        on_file: Called with each selected file, in tree order, as soon as
+            its directory has been listed
+        follow_symlinks: Whether to follow symlinks; when False they are
+            left out of the tree and the manifest
+        max_depth: Directories this many levels below the root are shown
+            but not entered; None for no limit
+
+    Returns:
+        ScanResult with the tree lines (root name first) and the files in
+        tree order. A file that is the same physical file as an earlier one
+        has same_as set to the earlier file's relative path.
+    """
+    tree_lines = [os.path.basename(startpath)]
+    files: List[FileEntry] = []
+    seen_dirs = {identity(os.stat(startpath))}
+    seen_files: Dict[Tuple[int, int], str] = {}
+
+    def listing(path: str, relbase: str) -> List[Tuple[os.DirEntry, str, bool]]:
+        if debug:
+            print(f"Generating tree for: {path}", file=sys.stderr)
+        # Filter first so the connectors reflect the entries actually shown
+        return list_dir(path, relbase, include_dir, include_file, debug, follow_symlinks)
+
+    # One frame per open directory: its kept entries, the index of the next
+    # entry to render and the prefix of its lines
+    stack = [[listing(startpath, ''), 0, '']]
+    while stack:
+        frame = stack[-1]
+        kept, i, prefix = frame
+        if i == len(kept):
+            stack.pop()
+            continue
+        frame[1] = i + 1
+
+        entry, relpath, is_dir = kept[i]
+        is_last = i == len(kept) - 1
+        connector = '└── ' if is_last else '├── '
+        if is_dir:
+            try:
+                key = identity(entry.stat())
+            except OSError:
+                key = None
+            enter = key is not None and key not in seen_dirs
+            if key in seen_dirs:
+                if debug:
+                    print(f"Skipping directory already listed: {relpath}", file=sys.stderr)
+            elif enter and max_depth is not None and depth(relpath) >= max_depth:
+                enter = False
+                if debug:
+                    print(f"Skipping directory below max depth: {relpath}", file=sys.stderr)
+
+            name = entry.name
+            if not enter and entry.is_symlink():
+                name = f"{name} -> {os.readlink(entry.path)}"
+            tree_lines.append(f"{prefix}{connector}{name}")
+            if enter:
+                seen_dirs.add(key)
+                extension = '    ' if is_last else '│   '
+                stack.append([listing(entry.path, relpath), 0, prefix + extension])
+        else:
+            tree_lines.append(f"{prefix}{connector}{entry.name}")
+            same_as = None
+            try:
+                first = seen_files.setdefault(identity(entry.stat()), relpath)
+            except OSError:
+                # Broken symlinks fail when read, as before
+                first = relpath
+            if first != relpath:
+                same_as = first
+                if debug:
+                    print(f"Linked copy of {first}: {relpath}", file=sys.stderr)
+            selected = FileEntry(entry.path, relpath, entry, same_as=same_as)
+            files.append(selected)
+            if on_file is not None:
+                on_file(selected)
+
+    return ScanResult(tree_lines, files)
+
+
+def linked_groups(entries: Iterable[FileEntry]) -> List[List[FileEntry]]:
+    """
+    Group files that are the same physical file (hard links and symlinks).
+
+    Returns:
+        Each group of two or more entries, in the given order.
+    """
+    groups: Dict[str, List[FileEntry]] = {}
+    for entry in entries:
+        groups.setdefault(entry.same_as or entry.relpath, []).append(entry)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def is_symlink(entry: FileEntry) -> bool:
+    """Whether a walked file is reached through a symlink."""
+    if entry.dirent is not None:
+        return entry.dirent.is_symlink()
+    return os.path.islink(entry.path)
+
+
+def scan_paths(startpath: str,
+               files: Iterable[FileEntry],
+               include_dir: Callable[[str], bool],
+               include_file: Callable[[str], bool],
+               debug: bool = False,
+               on_file: Optional[Callable[[FileEntry], None]] = None) -> ScanResult:
+    """
+    Build the tree and file manifest from an existing list of files.
+
+    Used when the files come from somewhere other than a directory walk,
+    such as a git index. Only directories that contain a selected file
+    appear in the tree.
+
+    Args:
+        startpath: Path to the project directory
+        files: Candidate files, relative to startpath
+        include_dir: Called with a directory's relative path, returns False
+            to drop everything below it
+        include_file: Called with a file's relative path, returns False to
+            skip it
+        debug: Whether to print debug information
+        on_file: Called with each selected file, in tree order
+
+    Returns:
+        ScanResult with the tree lines and the files in tree order.
+    """
+    root: Dict = {}
+    dir_decisions: Dict[str, bool] = {}
+
+    for entry in files:
+        parts = entry.relpath.split(os.sep)
+        included = True
+        for depth in range(1, len(parts)):
+            dir_relpath = os.sep.join(parts[:depth])
+            decision = dir_decisions.get(dir_relpath)
+            if decision is None:
+                decision = dir_decisions[dir_relpath] = include_dir(dir_relpath)
+                if debug and not decision:
+                    print(f"Skipping excluded directory: {parts[depth - 1]}", file=sys.stderr)
+            if not decision:
+                included = False
+                break
+        if not included:
+            continue
+        if not include_file(entry.relpath):
+            if debug:
+                print(f"Skipping non-text file: {parts[-1]}", file=sys.stderr)
+            continue
+
+        node = root
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = entry
+
+    tree_lines = [os.path.basename(startpath)]
+    selected: List[FileEntry] = []
+
+    def render(node: Dict, prefix: str) -> None:
+        names = sorted(node)
+        last = len(names) - 1
+        for i, name in enumerate(names):
+            is_last = i == last
+            tree_lines.append(f"{prefix}{'└── ' if is_last else '├── '}{name}")
+            child = node[name]
+            if isinstance(child, dict):
+                render(child, prefix + ('    ' if is_last else '│   '))
+            else:
+                selected.append(child)
+                if on_file is not None:
+                    on_file(child)
+
+    render(root, '')
+    return ScanResult(tree_lines, selected)
@@ -0,0 +1,380 @@
+"""
+Watch mode: keep a capture up to date as the project changes.
+
+After one full capture the watcher keeps the tree and every file's
+(size, mtime, inode) in memory and polls with stat: a directory whose
+mtime changed is listed again (new subdirectories are walked, removed
+ones dropped), and a file whose signature changed is counted as a
+change. File contents are not kept in memory; they go through a
+ManifestCache (the configured cache_dir, or a temporary one for the
+session), so once the changes settle for the debounce period, only the
+changed files are read from the project and the rest are served from
+the cache. The output is streamed to a temporary file that replaces the
+old one, so readers never see a half-written capture.
+
+Text and pack output also record where each entry was written, so an
+update copies the bytes of unchanged entries from the previous output
+and serializes only the changed ones; other formats and compressed
+output are serialized in full. The copy is still a pass over the
+output's bytes, and each poll still stats every file and directory, so
+polling is linear in the size of the project. Dedup and stats are not
+applied in watch mode, and linked copies of a file are read under each
+path, but each directory is still listed once, so symlink cycles are
+safe.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .sinks import STDOUT, compression_for, open_sink
+from .walker import FileEntry, depth, identity, list_dir
+from .writers import get_writer
+
+
+class _WatchedFile:
+    __slots__ = ('path', 'signature')
+
+    def __init__(self, path: str, signature: Tuple[int, int, int]):
+        self.path = path
+        self.signature = signature
+
+
+class _Span(NamedTuple):
+    """Where an entry was written in the last output, and from what."""
+    signature: Tuple[int, int, int]
+    limit: Optional[int]
+    offset: int
+    length: int
+    truncated: bool
+
+
+def _signature(st: os.stat_result) -> Tuple[int, int, int]:
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class Watcher:
+    """
+    Keeps one capture output in sync with a project directory.
+
+    Args:
+        capturer: The ProjectCapture whose configuration is used
+        startpath: Path to the project directory
+        output_file: Path to the output; compression follows its suffix
+            or the compression setting
+        format: Output format ('text', 'json', 'yaml', or 'pack')
+        interval: Seconds between polls
+        debounce: Seconds without further changes before the output is
+            rewritten
+        debug: Whether to print debug information
+        on_update: Called with the number of changes after each rewrite
+    """
+
+    def __init__(self, capturer, startpath: str, output_file: str,
+                 format: str = 'text', interval: float = 1.0, debounce: float = 0.5,
+                 debug: bool = False,
+                 on_update: Optional[Callable[[int], None]] = None):
+        if output_file == STDOUT:
+            raise ValueError("Watch mode needs an output file")
+        if capturer.config.get('split_mb'):
+            raise ValueError("Watch mode cannot split the output")
+        if capturer.config.get('source', 'filesystem') != 'filesystem':
+            raise ValueError("Watch mode only supports the filesystem source")
+        self.capturer = capturer
+        self.output_file = output_file
+        self.format = format
+        self.interval = interval
+        self.debounce = debounce
+        self.debug = debug
+        self.on_update = on_update
+        self._source = capturer._prepare(startpath)
+        self.startpath = self._source.startpath
+        # Without a configured cache, unchanged contents are kept in a
+        # temporary one for the session rather than in memory
+        self._cache_tmp = None
+        if self._source.cache is None:
+            from .cache import DEFAULT_MAX_BYTES, ManifestCache
+            self._cache_tmp = tempfile.TemporaryDirectory(prefix='sourcesnatcher-watch-')
+            cache = ManifestCache(self._cache_tmp.name,
+                                  capturer.config.get('cache_max_bytes', DEFAULT_MAX_BYTES))
+            self._source = self._source._replace(cache=cache)
+        # Directory relpath ('' for the root) -> (mtime_ns, kept children,
+        # (device, inode))
+        self._dirs: Dict[str, Tuple[int, List[Tuple[str, str, bool]], Tuple[int, int]]] = {}
+        # (device, inode) -> the relpath a directory is watched under, so a
+        # symlink cycle or a second path to it is not listed again
+        self._dir_paths: Dict[Tuple[int, int], str] = {}
+        self._files: Dict[str, _WatchedFile] = {}
+        # The output and its temporary file are not watched when they fall
+        # inside the project, or each rewrite would be seen as a change
+        directory, name = os.path.split(output_file)
+        self._tmp_path = os.path.join(directory, f".{name}.tmp")
+        self._outputs = {os.path.realpath(output_file), os.path.realpath(self._tmp_path)}
+        # Where each entry was written in the last output, for the formats
+        # that can copy unchanged entries from it
+        self._spans: Dict[str, _Span] = {}
+        self._output_signature: Optional[Tuple[int, int, int]] = None
+
+    def _abspath(self, relpath: str) -> str:
+        return os.path.join(self.startpath, relpath) if relpath else self.startpath
+
+    def _list(self, relpath: str) -> None:
+        """
+        List a directory again, picking up new entries and dropping removed
+        ones, then list any new directories below it.
+        """
+        # An explicit stack, popped in tree order, so deep trees cannot hit
+        # the recursion limit and a directory reached through two paths is
+        # watched under the same one as in a full capture
+        stack = [relpath]
+        while stack:
+            stack.extend(reversed(self._list_one(stack.pop())))
+
+    def _list_one(self, relpath: str) -> List[str]:
+        """List one directory; returns its new subdirectories to list."""
+        path = self._abspath(relpath)
+        # Stat before listing so a change made during the listing is seen
+        # by the next poll
+        st = os.stat(path)
+        key = identity(st)
+        if self._dir_paths.setdefault(key, relpath) != relpath:
+            if self.debug:
+                print(f"Skipping directory already listed: {relpath}", file=sys.stderr)
+            return []
+        kept = list_dir(path, relpath, self._source.include_dir,
+                        self._source.include_file, self.debug,
+                        self._source.follow_symlinks)
+        real_path = os.path.realpath(path)
+        kept = [(entry, child, is_dir) for entry, child, is_dir in kept
+                if is_dir or not self._is_output(real_path, entry)]
+
+        old = self._dirs.get(relpath)
+        children = [(entry.name, child, is_dir) for entry, child, is_dir in kept]
+        self._dirs[relpath] = (st.st_mtime_ns, children, key)
+
+        if old is not None:
+            current = set(children)
+            for name, child, is_dir in old[1]:
+                if (name, child, is_dir) not in current:
+                    self._forget(child, is_dir)
+
+        max_depth = self._source.max_depth
+        new_dirs = []
+        for entry, child, is_dir in kept:
+            if is_dir:
+                if child not in self._dirs and (max_depth is None or depth(child) < max_depth):
+                    new_dirs.append(child)
+            elif child not in self._files:
+                self._files[child] = _WatchedFile(entry.path, _signature(entry.stat()))
+        return new_dirs
+
+    def _is_output(self, real_dir: str, entry: os.DirEntry) -> bool:
+        if entry.is_symlink():
+            return os.path.realpath(entry.path) in self._outputs
+        return os.path.join(real_dir, entry.name) in self._outputs
+
+    def _forget(self, relpath: str, is_dir: bool) -> None:
+        stack = [(relpath, is_dir)]
+        while stack:
+            relpath, is_dir = stack.pop()
+            if not is_dir:
+                self._files.pop(relpath, None)
+                continue
+            state = self._dirs.pop(relpath, None)
+            if state is not None:
+                if self._dir_paths.get(state[2]) == relpath:
+                    del self._dir_paths[state[2]]
+                stack.extend((child, child_is_dir) for _, child, child_is_dir in state[1])
+
+    def poll(self) -> int:
+        """
+        Stat the watched tree once and record what changed.
+
+        Returns:
+            The number of changed directories and files.
+        """
+        changes = 0
+        for relpath in list(self._dirs):
+            state = self._dirs.get(relpath)
+            if state is None:
+                # Dropped with a parent earlier in this poll
+                continue
+            try:
+                mtime = os.stat(self._abspath(relpath)).st_mtime_ns
+            except OSError:
+                # Removed; its parent's listing drops it
+                continue
+            if mtime != state[0]:
+                try:
+                    self._list(relpath)
+                except OSError:
+                    continue
+                # Writing the output inside the project changes its
+                # directory's mtime without changing what is watched
+                if self._dirs.get(relpath, state)[1] != state[1]:
+                    if self.debug:
+                        print(f"Changed directory: {relpath or '.'}", file=sys.stderr)
+                    changes += 1
+
+        for relpath, watched in list(self._files.items()):
+            try:
+                signature = _signature(os.stat(watched.path))
+            except OSError:
+                continue
+            if signature != watched.signature:
+                if self.debug:
+                    print(f"Changed file: {relpath}", file=sys.stderr)
+                watched.signature = signature
+                changes += 1
+        return changes
+
+    def _render(self) -> Tuple[List[str], List[str]]:
+        """Render the tree lines and list the files in tree order."""
+        tree_lines = [os.path.basename(self.startpath)]
+        files: List[str] = []
+
+        # One frame per open directory, as in walker.scan_project
+        stack = [[self._dirs[''][1], 0, '']]
+        while stack:
+            frame = stack[-1]
+            children, i, prefix = frame
+            if i == len(children):
+                stack.pop()
+                continue
+            frame[1] = i + 1
+
+            name, child, is_dir = children[i]
+            is_last = i == len(children) - 1
+            # Directories below max_depth, or already listed elsewhere,
+            # are shown but not expanded
+            if is_dir and child not in self._dirs:
+                path = self._abspath(child)
+                if os.path.islink(path):
+                    name = f"{name} -> {os.readlink(path)}"
+            tree_lines.append(f"{prefix}{'└── ' if is_last else '├── '}{name}")
+            if is_dir and child in self._dirs:
+                stack.append([self._dirs[child][1], 0, prefix + ('    ' if is_last else '│   ')])
+            elif not is_dir:
+                files.append(child)
+        return tree_lines, files
+
+    def write(self) -> None:
+        """
+        Rewrite the output, reading only the files that changed. In text
+        and pack output, unchanged entries are copied from the last output.
+        """
+        config = self.capturer.config
+        cache = self._source.cache
+        tree_lines, relpaths = self._render()
+        entries = [
+            FileEntry(self._files[relpath].path, relpath,
+                      object_size=self._files[relpath].signature[0])
+            for relpath in relpaths
+        ]
+        plan, metadata = self.capturer._plan_reads(entries)
+
+        tmp_path = self._tmp_path
+        compression = config.get('compression') or compression_for(self.output_file)
+        spans: Dict[str, _Span] = {}
+        previous = None if compression else self._previous_output()
+        try:
+            with open_sink(tmp_path, compression) as f:
+                writer = get_writer(self.format, f, config.get('json_compact', False))
+                writer.begin('\n'.join(tree_lines))
+                for read in plan.reads:
+                    relpath = read.entry.relpath
+                    signature = self._files[relpath].signature
+                    start = None if compression else writer.position()
+                    span = self._spans.get(relpath) if previous is not None else None
+                    if span is not None and span[:2] == (signature, read.limit):
+                        # Unchanged since the last write: copy its bytes
+                        truncated = span.truncated
+                        writer.write_copy(relpath, previous, span.offset, span.length,
+                                          truncated)
+                    else:
+                        # One file at a time, so memory does not grow with the project
+                        text, truncated = self._contents(read.entry, read.limit)
+                        writer.write_file(relpath, text, truncated)
+                    if start is not None:
+                        spans[relpath] = _Span(signature, read.limit, start,
+                                               writer.position() - start, truncated)
+                    if truncated:
+                        metadata['truncated'].append(relpath)
+                writer.end(metadata)
+            os.replace(tmp_path, self.output_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            if previous is not None:
+                previous.close()
+
+        self._spans = spans
+        self._output_signature = _signature(os.stat(self.output_file)) if spans else None
+        cache.save()
+
+    def _previous_output(self) -> Optional[BinaryIO]:
+        """Open the last output to copy from, unless it was changed since."""
+        if not self._spans:
+            return None
+        try:
+            previous = open(self.output_file, 'rb')
+        except OSError:
+            return None
+        if _signature(os.fstat(previous.fileno())) != self._output_signature:
+            previous.close()
+            return None
+        return previous
+
+    def _contents(self, entry: FileEntry, limit: Optional[int]) -> Tuple[str, bool]:
+        """Serve unchanged contents from the cache and read the rest."""
+        cache = self._source.cache
+        st = self.capturer._cache_stat(entry, cache, limit)
+        if st is not None:
+            cached = cache.get(entry.path, st)
+            if cached is not None:
+                return cached, False
+        if self.debug:
+            print(f"Processing file: {entry.path}", file=sys.stderr)
+        return self.capturer._read_entry(entry, cache, self.debug, limit)
+
+    def close(self) -> None:
+        """Remove the session's temporary cache, if one was made."""
+        if self._cache_tmp is not None:
+            self._cache_tmp.cleanup()
+            self._cache_tmp = None
+
+    def start(self) -> None:
+        """Walk the whole project and write the first capture."""
+        self._dirs.clear()
+        self._files.clear()
+        self._spans.clear()
+        self._list('')
+        self.write()
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        Capture once, then keep the output up to date until stop is set.
+        """
+        stop = stop or threading.Event()
+        try:
+            self.start()
+            pending = 0
+            last_change = 0.0
+            while not stop.wait(self.interval):
+                changes = self.poll()
+                now = time.monotonic()
+                if changes:
+                    pending += changes
+                    last_change = now
+                elif pending and now - last_change >= self.debounce:
+                    self.write()
+                    if self.on_update is not None:
+                        self.on_update(pending)
+                    pending = 0
+        finally:
+            self.close()
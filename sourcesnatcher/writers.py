@@ -0,0 +1,304 @@
+"""
+Streaming output writers for the supported capture formats.
+
+Each writer receives the tree once and then one file at a time, so a
+file's contents can be released as soon as they have been written and
+memory use stays bounded by the largest single file.
+
+Files whose contents repeat an earlier file's can be written as
+references: inline in text output, and as a 'duplicates' mapping of path
+to original path after 'files' in JSON and YAML. The pack format is
+binary and written to the stream's underlying buffer.
+
+The text and pack writers can also copy an entry's bytes from an earlier
+output of the same writer, which watch mode uses to rewrite only the
+entries that changed.
+
+The YAML writer lives in the yamlwriter module so that PyYAML is only
+imported for YAML output.
+"""
+
+import importlib
+import json
+from typing import Any, BinaryIO, Dict, List, Optional, TextIO, Tuple, Union
+
+from .pack import HEADER, MAGIC, TRAILER, VERSION
+from .reader import RawContents, ascii_compatible
+
+# Bytes copied at a time by copy_span
+COPY_CHUNK = 1024 * 1024
+
+
+def copy_span(source: BinaryIO, dest: BinaryIO, offset: int, length: int) -> None:
+    """Copy length bytes at offset in source to the current end of dest."""
+    source.seek(offset)
+    while length:
+        chunk = source.read(min(length, COPY_CHUNK))
+        if not chunk:
+            raise ValueError("The earlier output ends before the copied span")
+        dest.write(chunk)
+        length -= len(chunk)
+
+
+class CaptureWriter:
+    """
+    Base class for the streaming writers.
+
+    Args:
+        stream: Text stream the capture is written to
+        compact: Leave out optional whitespace, where the format has any
+    """
+
+    def __init__(self, stream: TextIO, compact: bool = False):
+        self.stream = stream
+        self.compact = compact
+        self.duplicates: Dict[str, str] = {}
+
+    def begin(self, tree: str) -> None:
+        """Write the header of the capture, including the tree."""
+        raise NotImplementedError
+
+    def write_file(self, relpath: str, contents: str, truncated: bool = False) -> None:
+        """Write a single file entry."""
+        raise NotImplementedError
+
+    def write_raw(self, relpath: str, contents: RawContents, truncated: bool = False) -> None:
+        """
+        Write undecoded contents. Formats that escape or re-encode text
+        decode them; the byte-oriented writers copy them as they are.
+        """
+        self.write_file(relpath, contents.decode(), truncated)
+
+    def write_duplicate(self, relpath: str, original: str) -> None:
+        """Write a file whose contents are identical to an earlier file's."""
+        self.duplicates[relpath] = original
+
+    def position(self) -> Optional[int]:
+        """
+        The byte offset the next entry starts at, or None if entries
+        cannot be copied with write_copy.
+        """
+        return None
+
+    def write_copy(self, relpath: str, source: BinaryIO, offset: int, length: int,
+                   truncated: bool = False) -> None:
+        """
+        Write an entry by copying its bytes from an earlier output of this
+        writer, where position() was offset before the entry was written
+        and offset + length after.
+        """
+        raise NotImplementedError
+
+    def end(self, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Write the trailer of the capture, including any metadata."""
+
+
+class TextWriter(CaptureWriter):
+    """Plain text: the tree followed by one section per file."""
+
+    def __init__(self, stream: TextIO, compact: bool = False):
+        super().__init__(stream, compact)
+        # Raw ASCII contents can bypass the text layer when it would encode
+        # them to the same bytes
+        buffer = getattr(stream, 'buffer', None)
+        self._buffer = buffer if ascii_compatible(getattr(stream, 'encoding', None)) else None
+
+    def begin(self, tree: str) -> None:
+        self.stream.write(tree)
+
+    def write_file(self, relpath: str, contents: str, truncated: bool = False) -> None:
+        marker = " (truncated)" if truncated else ""
+        self.stream.write(f"\n\n# File: {relpath}{marker}\n\n")
+        self.stream.write(contents)
+
+    def write_raw(self, relpath: str, contents: RawContents, truncated: bool = False) -> None:
+        if self._buffer is None:
+            super().write_raw(relpath, contents, truncated)
+            return
+        marker = " (truncated)" if truncated else ""
+        self.stream.write(f"\n\n# File: {relpath}{marker}\n\n")
+        self.stream.flush()
+        self._buffer.write(contents.data)
+
+    def write_duplicate(self, relpath: str, original: str) -> None:
+        self.stream.write(f"\n\n# File: {relpath} (duplicate of {original})")
+
+    def position(self) -> Optional[int]:
+        buffer = getattr(self.stream, 'buffer', None)
+        if buffer is None:
+            return None
+        self.stream.flush()
+        return buffer.tell()
+
+    def write_copy(self, relpath: str, source: BinaryIO, offset: int, length: int,
+                   truncated: bool = False) -> None:
+        # The span includes the section header
+        self.stream.flush()
+        copy_span(source, self.stream.buffer, offset, length)
+
+    def end(self, metadata: Optional[Dict[str, Any]] = None) -> None:
+        if metadata and metadata.get('skipped'):
+            reasons = ', '.join(sorted(set(metadata['skipped'].values())))
+            self.stream.write(f"\n\n# Skipped {len(metadata['skipped'])} files "
+                              f"({reasons} reached)")
+
+
+class JsonWriter(CaptureWriter):
+    """
+    Incremental JSON encoder.
+
+    Produces the same document as json.dump({'tree': ..., 'files': ...},
+    indent=2) without holding the files mapping in memory. In compact
+    mode the document matches json.dump(..., separators=(',', ':')).
+    """
+
+    def _dumps(self, value: Any) -> str:
+        if self.compact:
+            return json.dumps(value, separators=(',', ':'))
+        return json.dumps(value, indent=2).replace('\n', '\n  ')
+
+    def _key(self, name: str) -> str:
+        return f',"{name}":' if self.compact else f',\n  "{name}": '
+
+    def begin(self, tree: str) -> None:
+        self.stream.write('{"tree":' if self.compact else '{\n  "tree": ')
+        self.stream.write(json.dumps(tree))
+        self.stream.write(self._key('files') + '{')
+        self._count = 0
+
+    def write_file(self, relpath: str, contents: str, truncated: bool = False) -> None:
+        if self.compact:
+            self.stream.write(',' if self._count else '')
+        else:
+            self.stream.write(',\n    ' if self._count else '\n    ')
+        self.stream.write(json.dumps(relpath))
+        self.stream.write(':' if self.compact else ': ')
+        self.stream.write(json.dumps(contents))
+        self._count += 1
+
+    def end(self, metadata: Optional[Dict[str, Any]] = None) -> None:
+        self.stream.write('\n  }' if self._count and not self.compact else '}')
+        if self.duplicates:
+            self.stream.write(self._key('duplicates'))
+            self.stream.write(self._dumps(self.duplicates))
+        if metadata is not None:
+            self.stream.write(self._key('metadata'))
+            self.stream.write(self._dumps(metadata))
+        self.stream.write('}' if self.compact else '\n}')
+
+
+class PackWriter(CaptureWriter):
+    """
+    Binary pack format with a path index; see the pack module.
+
+    Writes the UTF-8 bytes straight to the binary buffer under the text
+    stream, so the stream must have one and must not be compressed.
+    """
+
+    def __init__(self, stream: TextIO, compact: bool = False):
+        super().__init__(stream, compact)
+        stream.flush()
+        self._raw = stream.buffer
+        self._offset = 0
+        self._paths: List[str] = []
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        self._blobs: Dict[str, int] = {}
+        self._truncated: List[str] = []
+
+    def _write_blob(self, text: Union[str, RawContents]) -> Tuple[int, int]:
+        if isinstance(text, RawContents):
+            # ASCII is already UTF-8
+            data = text.data
+        else:
+            data = text.encode('utf-8', errors='surrogatepass')
+        offset = self._offset
+        self._raw.write(data)
+        self._offset += len(data)
+        return offset, len(data)
+
+    def _add(self, relpath: str, offset: int, length: int) -> None:
+        self._blobs[relpath] = len(self._paths)
+        self._paths.append(relpath)
+        self._offsets.append(offset)
+        self._lengths.append(length)
+
+    def begin(self, tree: str) -> None:
+        self._raw.write(HEADER.pack(MAGIC, VERSION))
+        self._offset = HEADER.size
+        self._tree = self._write_blob(tree)
+
+    def write_file(self, relpath: str, contents: str, truncated: bool = False) -> None:
+        self._add(relpath, *self._write_blob(contents))
+        if truncated:
+            self._truncated.append(relpath)
+
+    def write_raw(self, relpath: str, contents: RawContents, truncated: bool = False) -> None:
+        self.write_file(relpath, contents, truncated)
+
+    def write_duplicate(self, relpath: str, original: str) -> None:
+        super().write_duplicate(relpath, original)
+        i = self._blobs[original]
+        self._add(relpath, self._offsets[i], self._lengths[i])
+
+    def position(self) -> Optional[int]:
+        return self._offset
+
+    def write_copy(self, relpath: str, source: BinaryIO, offset: int, length: int,
+                   truncated: bool = False) -> None:
+        copy_span(source, self._raw, offset, length)
+        self._add(relpath, self._offset, length)
+        self._offset += length
+        if truncated:
+            self._truncated.append(relpath)
+
+    def end(self, metadata: Optional[Dict[str, Any]] = None) -> None:
+        index = {
+            'tree': self._tree,
+            'paths': self._paths,
+            'offsets': self._offsets,
+            'lengths': self._lengths,
+            'truncated': self._truncated,
+            'duplicates': self.duplicates,
+        }
+        if metadata is not None:
+            index['metadata'] = metadata
+        data = json.dumps(index, separators=(',', ':')).encode()
+        self._raw.write(data)
+        self._raw.write(TRAILER.pack(self._offset, len(data), MAGIC))
+        self._raw.flush()
+
+
+WRITERS = {
+    'text': TextWriter,
+    'json': JsonWriter,
+    'pack': PackWriter,
+}
+
+# Writers with heavier dependencies, imported the first time they are used
+LAZY_WRITERS = {
+    'yaml': ('.yamlwriter', 'YamlWriter'),
+}
+
+
+def _load_writer(format: str) -> type:
+    module, name = LAZY_WRITERS[format]
+    writer_class = getattr(importlib.import_module(module, __package__), name)
+    WRITERS[format] = writer_class
+    return writer_class
+
+
+def get_writer(format: str, stream: TextIO, compact: bool = False) -> CaptureWriter:
+    """Return the writer for a format, falling back to text."""
+    writer_class = WRITERS.get(format)
+    if writer_class is None:
+        writer_class = _load_writer(format) if format in LAZY_WRITERS else TextWriter
+    return writer_class(stream, compact)
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `from sourcesnatcher.writers import YamlWriter` working without
+    # importing yaml for every capture
+    if name in ('YamlWriter', 'DEFAULT_YAML_DUMPER'):
+        return getattr(importlib.import_module('.yamlwriter', __package__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
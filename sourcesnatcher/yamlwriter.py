@@ -0,0 +1,118 @@
+"""
+Streaming YAML writer.
+
+Kept apart from the other writers so that PyYAML is only imported when
+a capture is written as YAML; get_writer loads it on first use.
+"""
+
+import codecs
+import re
+from typing import Any, Dict, Optional, TextIO
+
+import yaml
+
+from .writers import CaptureWriter
+
+_YAML_STR_TAG = 'tag:yaml.org,2002:str'
+
+# Names that are not valid UTF-8 decode to lone surrogates, which only
+# the pure Python emitter can write (as escapes)
+_SURROGATES = re.compile('[\ud800-\udfff]')
+
+# Line breaks other than '\n', which only survive in double quotes
+_OTHER_BREAKS = re.compile('[\x85\u2028\u2029]')
+
+# libyaml's emitter when PyYAML was built with it, else the pure Python one
+try:
+    DEFAULT_YAML_DUMPER = yaml.CSafeDumper
+except AttributeError:
+    DEFAULT_YAML_DUMPER = yaml.SafeDumper
+
+
+class YamlWriter(CaptureWriter):
+    """
+    Event-based YAML emitter.
+
+    Feeds scalar events to PyYAML's emitter one file at a time instead of
+    building the whole document for yaml.dump. The emitter is libyaml's
+    when available, and multi-line values are written as literal blocks,
+    which keeps file bodies readable and avoids escaping every line
+    break; the emitter falls back to a quoted style when a value cannot
+    be a block (for example trailing spaces on a line). Values holding
+    other Unicode line breaks are double quoted instead, since a literal
+    block would read them back as '\n'. If the tree holds a path that is not
+    valid UTF-8, the pure Python emitter is used, which escapes it.
+
+    Args:
+        stream: Text stream the capture is written to
+        compact: Unused; YAML output has no optional whitespace
+        dumper: Dumper class to emit with (default: DEFAULT_YAML_DUMPER)
+    """
+
+    def __init__(self, stream: TextIO, compact: bool = False, dumper: Optional[type] = None):
+        super().__init__(stream, compact)
+        # Non-ASCII text can only be written unescaped to a UTF-8 stream
+        encoding = getattr(stream, 'encoding', None)
+        self._allow_unicode = encoding is None or codecs.lookup(encoding).name == 'utf-8'
+        self._dumper = (dumper or DEFAULT_YAML_DUMPER)(stream, allow_unicode=self._allow_unicode)
+
+    def _emit_scalar(self, value: str) -> None:
+        # Mirror the serializer: the tag may only be omitted when the
+        # scalar would resolve back to a string
+        implicit = (
+            self._dumper.resolve(yaml.ScalarNode, value, (True, False)) == _YAML_STR_TAG,
+            self._dumper.resolve(yaml.ScalarNode, value, (False, True)) == _YAML_STR_TAG,
+        )
+        if _OTHER_BREAKS.search(value):
+            # Only double quotes escape them; other styles fold them
+            style = '"'
+        else:
+            style = '|' if '\n' in value else None
+        self._dumper.emit(yaml.ScalarEvent(None, _YAML_STR_TAG, implicit, value, style=style))
+
+    def _emit_data(self, value: Any) -> None:
+        """Emit a small nested structure of dicts, lists and scalars."""
+        if isinstance(value, dict):
+            self._dumper.emit(yaml.MappingStartEvent(None, None, True, flow_style=False))
+            for key, item in value.items():
+                self._emit_data(key)
+                self._emit_data(item)
+            self._dumper.emit(yaml.MappingEndEvent())
+        elif isinstance(value, list):
+            self._dumper.emit(yaml.SequenceStartEvent(None, None, True, flow_style=False))
+            for item in value:
+                self._emit_data(item)
+            self._dumper.emit(yaml.SequenceEndEvent())
+        elif isinstance(value, str):
+            self._emit_scalar(value)
+        else:
+            node = self._dumper.represent_data(value)
+            self._dumper.emit(yaml.ScalarEvent(None, None, (True, False), node.value))
+
+    def begin(self, tree: str) -> None:
+        # Every path is in the tree, so it is the one place to check
+        if not isinstance(self._dumper, yaml.emitter.Emitter) and _SURROGATES.search(tree):
+            self._dumper = yaml.SafeDumper(self.stream, allow_unicode=self._allow_unicode)
+        self._dumper.emit(yaml.StreamStartEvent())
+        self._dumper.emit(yaml.DocumentStartEvent())
+        self._dumper.emit(yaml.MappingStartEvent(None, None, True, flow_style=False))
+        self._emit_scalar('tree')
+        self._emit_scalar(tree)
+        self._emit_scalar('files')
+        self._dumper.emit(yaml.MappingStartEvent(None, None, True, flow_style=False))
+
+    def write_file(self, relpath: str, contents: str, truncated: bool = False) -> None:
+        self._emit_scalar(relpath)
+        self._emit_scalar(contents)
+
+    def end(self, metadata: Optional[Dict[str, Any]] = None) -> None:
+        self._dumper.emit(yaml.MappingEndEvent())
+        if self.duplicates:
+            self._emit_scalar('duplicates')
+            self._emit_data(self.duplicates)
+        if metadata is not None:
+            self._emit_scalar('metadata')
+            self._emit_data(metadata)
+        self._dumper.emit(yaml.MappingEndEvent())
+        self._dumper.emit(yaml.DocumentEndEvent())
+        self._dumper.emit(yaml.StreamEndEvent())
@@ -1,4 +1,5 @@
 import os
+import sys
 import pytest
 from pathlib import Path
 
@@ -39,4 +40,41 @@ def config_file(temp_project_dir, sample_config):
     config_path = temp_project_dir / "config.yaml"
     with open(config_path, 'w') as f:
         yaml.dump(sample_config, f)
-    return config_path 
\ No newline at end of file
+    return config_path 
+
+@pytest.fixture
+def git_project_dir(temp_project_dir):
+    """Turn the sample project into a git checkout with one commit."""
+    import subprocess
+
+    def git(*args):
+        subprocess.run(["git", "-C", str(temp_project_dir), *args],
+                       check=True, capture_output=True)
+
+    (temp_project_dir / ".gitignore").write_text("build/\n")
+    git("init", "-q")
+    git("add", "test.txt", "test.json", "test.py", "src/test.py", ".gitignore")
+    git("-c", "user.email=test@example.com", "-c", "user.name=Test",
+        "commit", "-q", "-m", "Initial commit")
+    return temp_project_dir
+
+@pytest.fixture
+def deep_project_dir(tmp_path):
+    """
+    A project nested deeper than the recursion limit, which is lowered
+    for the test so the tree stays shallow enough to clean up.
+    """
+    project_dir = tmp_path / "deep"
+    path = project_dir
+    for _ in range(300):
+        path = path / "d"
+    path.mkdir(parents=True)
+    (path / "leaf.txt").write_text("leaf")
+
+    frame, depth = sys._getframe(), 0
+    while frame is not None:
+        frame, depth = frame.f_back, depth + 1
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(depth + 150)
+    yield project_dir
+    sys.setrecursionlimit(limit)
@@ -75,4 +75,110 @@ def test_cli_with_nonexistent_directory():
     ], capture_output=True, text=True)
     
     assert result.returncode == 1
-    assert "Error" in result.stderr 
\ No newline at end of file
+    assert "Error" in result.stderr 
+
+def test_cli_with_jobs(temp_project_dir):
+    """Test CLI with a parallel reader pool."""
+    output_file = temp_project_dir / "output.txt"
+    result = subprocess.run([
+        sys.executable, "-m", "sourcesnatcher",
+        str(temp_project_dir),
+        "-o", str(output_file),
+        "--jobs", "4"
+    ], capture_output=True, text=True)
+    
+    assert result.returncode == 0
+    content = output_file.read_text()
+    assert 'print("src test")' in content
+
+def test_cli_with_stdout_output(temp_project_dir):
+    """Test CLI writing the capture to stdout."""
+    result = subprocess.run([
+        sys.executable, "-m", "sourcesnatcher",
+        str(temp_project_dir),
+        "-o", "-",
+        "-f", "json"
+    ], capture_output=True, text=True)
+    
+    assert result.returncode == 0
+    import json
+    data = json.loads(result.stdout)
+    assert 'test.txt' in data['files']
+    assert "Output saved to -" in result.stderr
+
+def test_cli_with_stats_file(temp_project_dir, tmp_path):
+    """Test CLI writing a stats report to a file."""
+    output_file = temp_project_dir / "output.txt"
+    stats_file = tmp_path / "stats.json"
+    result = subprocess.run([
+        sys.executable, "-m", "sourcesnatcher",
+        str(temp_project_dir),
+        "-o", str(output_file),
+        "--stats-file", str(stats_file)
+    ], capture_output=True, text=True)
+    
+    assert result.returncode == 0
+    import json
+    report = json.loads(stats_file.read_text())
+    assert report['counters']['files_included'] == 4
+
+def test_cli_stats_before_directory(temp_project_dir):
+    """Test that --stats does not take the project directory as its value."""
+    output_file = temp_project_dir / "output.txt"
+    result = subprocess.run([
+        sys.executable, "-m", "sourcesnatcher",
+        "--stats", str(temp_project_dir),
+        "-o", str(output_file)
+    ], capture_output=True, text=True)
+
+    assert result.returncode == 0
+    assert '"files_included": 4' in result.stderr
+
+def test_cli_batch(temp_project_dir, tmp_path):
+    """Test CLI capturing the projects listed in a batch file."""
+    batch_file = tmp_path / "projects.txt"
+    batch_file.write_text(f"{temp_project_dir}\n{tmp_path / 'missing'}\n")
+    output_dir = tmp_path / "out"
+    result = subprocess.run([
+        sys.executable, "-m", "sourcesnatcher",
+        "--batch", str(batch_file),
+        "-o", str(output_dir),
+        "--batch-jobs", "2"
+    ], capture_output=True, text=True)
+    
+    assert result.returncode == 1
+    assert "Captured 1 of 2 projects" in result.stdout
+    assert (output_dir / f"{temp_project_dir.name}_contents.text").exists()
+    assert (output_dir / "summary.json").exists()
+
+def test_cli_startup_imports():
+    """Test that parsing arguments does not import the capture backends."""
+    heavy = ['sourcesnatcher.capture_project', 'yaml', 'asyncio', 'multiprocessing',
+             'subprocess', 'mimetypes', 'hashlib']
+    result = subprocess.run([
+        sys.executable, "-c",
+        "import sys\n"
+        "sys.argv = ['capture-project', '--help']\n"
+        "from sourcesnatcher.cli import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print([name for name in {heavy!r} if name in sys.modules], file=sys.stderr)"
+    ], capture_output=True, text=True)
+    
+    assert result.returncode == 0
+    assert "usage:" in result.stdout
+    assert result.stderr.strip() == "[]"
+
+def test_cli_cache_before_directory(temp_project_dir):
+    """Test that --cache does not take the project directory as its value."""
+    output_file = temp_project_dir / "output.txt"
+    result = subprocess.run([
+        sys.executable, "-m", "sourcesnatcher",
+        "--cache", str(temp_project_dir),
+        "-o", str(output_file)
+    ], capture_output=True, text=True)
+
+    assert result.returncode == 0
+    assert (temp_project_dir / ".sourcesnatcher-cache" / "index.json").exists()
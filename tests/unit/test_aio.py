@@ -0,0 +1,74 @@
+import asyncio
+import os
+import threading
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.aio import CaptureCancelled
+
+def collect(capturer, startpath, **kwargs):
+    async def run():
+        return [record async for record in capturer.aiter_files(startpath, **kwargs)]
+    return asyncio.run(run())
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_aiter_files_matches_capture_order(temp_project_dir, workers):
+    """Test that records come in tree order with the file contents."""
+    records = collect(ProjectCapture(), str(temp_project_dir), workers=workers)
+    assert records == [
+        (os.path.join('src', 'test.py'), 'print("src test")'),
+        ('test.json', '{"test": "content"}'),
+        ('test.py', 'print("test")'),
+        ('test.txt', 'test content'),
+    ]
+
+def test_aiter_files_applies_budget(temp_project_dir):
+    """Test that the total byte budget leaves later files out."""
+    records = collect(ProjectCapture({'max_total_bytes': 20}), str(temp_project_dir))
+    assert records == [
+        (os.path.join('src', 'test.py'), 'print("src test")'),
+        ('test.json', '{"t'),
+    ]
+
+def test_aiter_files_stops_walk_when_closed(tmp_path):
+    """Test that closing the iterator early stops the walk."""
+    for i in range(50):
+        (tmp_path / f"file{i:02d}.txt").write_text(str(i))
+    seen = []
+    capturer = ProjectCapture()
+    scan = capturer._scan
+
+    def counting_scan(source, debug=False, on_file=None):
+        def record(entry):
+            seen.append(entry.relpath)
+            on_file(entry)
+        return scan(source, debug, record)
+
+    capturer._scan = counting_scan
+
+    async def run():
+        records = capturer.aiter_files(str(tmp_path), workers=1, window=2)
+        first = await records.__anext__()
+        await records.aclose()
+        return first
+
+    assert asyncio.run(run()) == ('file00.txt', '0')
+    assert len(seen) < 10
+
+def test_aiter_files_missing_directory(tmp_path):
+    """Test that errors are raised in the consuming task."""
+    with pytest.raises(FileNotFoundError):
+        collect(ProjectCapture(), str(tmp_path / "missing"))
+
+def test_acapture_writes_output(temp_project_dir, tmp_path):
+    """Test the async wrapper around capture_structure."""
+    output_file = tmp_path / "output.txt"
+    asyncio.run(ProjectCapture().acapture(str(temp_project_dir), str(output_file)))
+    assert 'print("src test")' in output_file.read_text()
+
+def test_capture_structure_cancel(temp_project_dir, tmp_path):
+    """Test that a set cancel event stops the capture."""
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(CaptureCancelled):
+        ProjectCapture().capture_structure(str(temp_project_dir), str(tmp_path / "out.txt"),
+                                           cancel=cancel)
@@ -0,0 +1,62 @@
+import json
+import multiprocessing
+import os
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.batch import capture_many, output_paths, read_batch_file
+
+def test_output_paths_are_unique(tmp_path):
+    """Test that projects sharing a directory name get distinct outputs."""
+    outputs = output_paths(['a/app', 'b/app', 'c/lib/'], str(tmp_path), 'json')
+    assert [os.path.basename(p) for p in outputs] == [
+        'app_contents.json', 'app-2_contents.json', 'lib_contents.json']
+
+def test_read_batch_file(tmp_path):
+    """Test that blank lines and comments are ignored."""
+    batch_file = tmp_path / "projects.txt"
+    batch_file.write_text("# projects\n/src/one\n\n/src/two  # second\n")
+    assert read_batch_file(str(batch_file)) == ['/src/one', '/src/two']
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_capture_many_isolates_failures(temp_project_dir, tmp_path, jobs):
+    """Test that a failing project is reported without stopping the others."""
+    output_dir = tmp_path / "out"
+    missing = str(tmp_path / "missing")
+    results = ProjectCapture().capture_many(
+        [str(temp_project_dir), missing], str(output_dir), 'json', jobs)
+
+    assert [r.ok for r in results] == [True, False]
+    assert 'Directory not found' in results[1].error
+    data = json.loads((output_dir / f"{temp_project_dir.name}_contents.json").read_text())
+    assert 'test.txt' in data['files']
+
+    summary = json.loads((output_dir / "summary.json").read_text())
+    assert summary['succeeded'] == 1 and summary['failed'] == 1
+    assert summary['results'][1]['directory'] == missing
+
+def test_capture_many_without_summary(temp_project_dir, tmp_path):
+    """Test that the summary can be left out."""
+    results = capture_many(None, [str(temp_project_dir)], str(tmp_path), jobs=1,
+                           summary_file=None)
+    assert results[0].ok
+    assert not (tmp_path / "summary.json").exists()
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason="the patched capture only reaches forked workers")
+def test_capture_many_survives_dead_worker(temp_project_dir, tmp_path, monkeypatch):
+    """Test that a project killing its worker does not fail the others."""
+    capture_structure = ProjectCapture.capture_structure
+
+    def crash_on_marker(self, directory, *args, **kwargs):
+        if os.path.basename(directory) == 'crash':
+            os._exit(1)
+        return capture_structure(self, directory, *args, **kwargs)
+
+    monkeypatch.setattr(ProjectCapture, 'capture_structure', crash_on_marker)
+    crash = tmp_path / "crash"
+    crash.mkdir()
+    directories = [str(temp_project_dir)] * 2 + [str(crash)] + [str(temp_project_dir)] * 2
+    results = capture_many(None, directories, str(tmp_path / "out"), 'json', jobs=2)
+
+    assert [r.ok for r in results] == [True, True, False, True, True]
+    assert 'Worker process died' in results[2].error
@@ -0,0 +1,81 @@
+import json
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.budget import estimate_tokens, plan_byte_budget, plan_token_budget
+from sourcesnatcher.walker import FileEntry
+
+@pytest.fixture
+def sized_files(tmp_path):
+    files = []
+    for name, size in [('a.txt', 10), ('b.txt', 30), ('c.txt', 5), ('d.txt', 5)]:
+        path = tmp_path / name
+        path.write_text('x' * size)
+        files.append(FileEntry(str(path), name))
+    return files
+
+def test_plan_without_limits_reads_everything(sized_files):
+    """Test that no budget means unlimited reads."""
+    plan = plan_byte_budget(sized_files)
+    assert [read.limit for read in plan.reads] == [None] * 4
+    assert plan.skipped == {}
+
+def test_plan_with_file_and_total_limits(sized_files):
+    """Test that the total budget truncates the crossing file and skips the rest."""
+    plan = plan_byte_budget(sized_files, max_file_bytes=20, max_total_bytes=32)
+
+    assert [(read.entry.relpath, read.limit) for read in plan.reads] == [
+        ('a.txt', 20), ('b.txt', 20), ('c.txt', 2)
+    ]
+    assert plan.skipped == {'d.txt': 'max_total_bytes'}
+
+def test_capture_structure_reports_budget_metadata(temp_project_dir, tmp_path):
+    """Test that truncated and skipped files are reported in JSON metadata."""
+    (temp_project_dir / "big.txt").write_text("y" * 1000)
+    output_file = tmp_path / "output.json"
+
+    ProjectCapture({'max_file_bytes': 100, 'max_total_bytes': 136}).capture_structure(
+        str(temp_project_dir), str(output_file), format='json')
+
+    data = json.loads(output_file.read_text())
+    assert data['files']['big.txt'] == "y" * 100
+    assert data['metadata']['truncated'] == ['big.txt']
+    assert data['metadata']['skipped'] == {'test.py': 'max_total_bytes',
+                                           'test.txt': 'max_total_bytes'}
+
+def test_estimate_tokens_rounds_up():
+    """Test the size-based token estimate."""
+    assert [estimate_tokens(size) for size in (0, 1, 4, 5)] == [0, 1, 1, 2]
+
+def test_plan_token_budget_reads_priority_files_first(tmp_path):
+    """Test that the token budget is filled in priority order, tests last."""
+    files = []
+    for name, size in [('tests/test_app.py', 40), ('app.py', 40), ('util.py', 40),
+                       ('README.md', 40)]:
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text('x' * size)
+        files.append(FileEntry(str(path), name))
+
+    plan = plan_token_budget(files, budget_tokens=25)
+
+    assert [(read.entry.relpath, read.limit) for read in plan.reads] == [
+        ('README.md', 100), ('app.py', 60), ('util.py', 20)
+    ]
+    assert plan.skipped == {'tests/test_app.py': 'budget_tokens'}
+
+def test_capture_structure_with_token_budget(temp_project_dir, tmp_path):
+    """Test that a token budget skips files without reading them and reports it."""
+    (temp_project_dir / "README.md").write_text("r" * 40)
+    (temp_project_dir / "big.txt").write_text("y" * 1000)
+    output_file = tmp_path / "output.json"
+
+    ProjectCapture({'budget_tokens': 20}).capture_structure(
+        str(temp_project_dir), str(output_file), format='json')
+
+    data = json.loads(output_file.read_text())
+    # README first, then the most recently modified source, cut to what is left
+    assert data['files'] == {'README.md': "r" * 40, 'big.txt': "y" * 40}
+    assert data['metadata']['budget_tokens'] == 20
+    assert data['metadata']['estimated_tokens'] == 20
+    assert data['metadata']['truncated'] == ['big.txt']
+    assert set(data['metadata']['skipped'].values()) == {'budget_tokens'}
@@ -0,0 +1,58 @@
+import os
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.cache import ManifestCache
+
+def test_cache_hit_and_invalidation(tmp_path):
+    """Test that unchanged files hit and modified files miss."""
+    source = tmp_path / "a.txt"
+    source.write_text("first")
+    cache = ManifestCache(str(tmp_path / "cache"))
+
+    assert cache.get(str(source), os.stat(source)) is None
+    cache.put(str(source), os.stat(source), "first")
+    cache.save()
+
+    reloaded = ManifestCache(str(tmp_path / "cache"))
+    assert reloaded.get(str(source), os.stat(source)) == "first"
+
+    source.write_text("second!")
+    assert reloaded.get(str(source), os.stat(source)) is None
+
+def test_cache_eviction_respects_max_bytes(tmp_path):
+    """Test that saving evicts entries until the contents fit the cap."""
+    cache = ManifestCache(str(tmp_path / "cache"), max_bytes=25)
+    for i in range(5):
+        path = tmp_path / f"{i}.txt"
+        path.write_text(str(i) * 10)
+        cache.put(str(path), os.stat(path), str(i) * 10)
+    cache.save()
+
+    blobs = [name for _, _, names in os.walk(tmp_path / "cache" / "objects") for name in names]
+    assert len(blobs) == 2
+    assert len(ManifestCache(str(tmp_path / "cache"))._entries) == 2
+
+def test_capture_structure_with_cache(temp_project_dir, tmp_path):
+    """Test that a second capture is served from the cache."""
+    capturer = ProjectCapture({'cache_dir': '.sourcesnatcher-cache'})
+    first = tmp_path / "first.txt"
+    second = tmp_path / "second.txt"
+
+    capturer.capture_structure(str(temp_project_dir), str(first))
+    (temp_project_dir / "test.txt").write_text("changed content")
+    capturer.capture_structure(str(temp_project_dir), str(second))
+
+    content = second.read_text()
+    assert "changed content" in content
+    assert 'print("src test")' in content
+    assert ".sourcesnatcher-cache" not in content
+    assert (temp_project_dir / ".sourcesnatcher-cache" / "index.json").exists()
+
+def test_default_cache_dir_is_excluded(temp_project_dir, tmp_path):
+    """Test that a later capture without a cache leaves the default cache out."""
+    ProjectCapture({'cache_dir': '.sourcesnatcher-cache'}).capture_structure(
+        str(temp_project_dir), str(tmp_path / "cached.json"), 'json')
+    assert (temp_project_dir / ".sourcesnatcher-cache" / "index.json").exists()
+
+    output_file = tmp_path / "plain.json"
+    ProjectCapture().capture_structure(str(temp_project_dir), str(output_file), 'json')
+    assert '.sourcesnatcher-cache' not in output_file.read_text()
@@ -0,0 +1,79 @@
+import json
+import os
+import pytest
+import yaml
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.dedup import DedupIndex, content_key
+from sourcesnatcher.stats import CaptureStats
+
+@pytest.fixture
+def vendored_project(tmp_path):
+    """A project with the same LICENSE vendored in several places."""
+    project_dir = tmp_path / "vendored"
+    for name in ("a", "b", "c"):
+        (project_dir / name).mkdir(parents=True)
+        (project_dir / name / "LICENSE.txt").write_text("MIT License\n" * 50)
+    (project_dir / "main.py").write_text('print("main")')
+    return project_dir
+
+def test_claim_only_once():
+    """Test that only the first read of some contents decodes them."""
+    index = DedupIndex()
+    key = content_key(b"same")
+    assert index.claim(key)
+    assert not index.claim(key)
+    assert index.original(key) is None
+    index.written(key, 'a.txt')
+    index.written(key, 'b.txt')
+    assert index.original(key) == 'a.txt'
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_dedup_json(vendored_project, tmp_path, workers):
+    """Test that later copies are written as references to the first."""
+    output_file = tmp_path / "output.json"
+    ProjectCapture({'dedup': True, 'workers': workers}).capture_structure(
+        str(vendored_project), str(output_file), format='json')
+
+    data = json.loads(output_file.read_text())
+    first = os.path.join('a', 'LICENSE.txt')
+    assert data['files'][first] == "MIT License\n" * 50
+    assert set(data['files']) == {first, 'main.py'}
+    assert data['duplicates'] == {
+        os.path.join('b', 'LICENSE.txt'): first,
+        os.path.join('c', 'LICENSE.txt'): first,
+    }
+
+def test_dedup_yaml(vendored_project, tmp_path):
+    """Test duplicates in YAML output."""
+    output_file = tmp_path / "output.yaml"
+    ProjectCapture({'dedup': True}).capture_structure(
+        str(vendored_project), str(output_file), format='yaml')
+
+    data = yaml.safe_load(output_file.read_text())
+    assert len(data['files']) == 2
+    assert len(data['duplicates']) == 2
+
+def test_dedup_text_and_stats(vendored_project, tmp_path):
+    """Test inline references in text output and the dedup counters."""
+    output_file = tmp_path / "output.txt"
+    stats = CaptureStats()
+    ProjectCapture({'dedup': True}).capture_structure(
+        str(vendored_project), str(output_file), stats=stats)
+
+    content = output_file.read_text()
+    assert content.count("MIT License") == 50
+    assert f"# File: {os.path.join('c', 'LICENSE.txt')} (duplicate of " \
+           f"{os.path.join('a', 'LICENSE.txt')})" in content
+    assert stats.counters['files_deduplicated'] == 2
+    assert stats.counters['bytes_deduplicated'] == 2 * len("MIT License\n" * 50)
+
+def test_dedup_with_cache(vendored_project, tmp_path):
+    """Test that cached and freshly read copies share a key."""
+    capturer = ProjectCapture({'dedup': True, 'cache_dir': '.cache'})
+    outputs = []
+    for run in range(2):
+        output_file = tmp_path / f"output{run}.json"
+        capturer.capture_structure(str(vendored_project), str(output_file), format='json')
+        outputs.append(json.loads(output_file.read_text()))
+    assert outputs[0] == outputs[1]
+    assert len(outputs[1]['duplicates']) == 2
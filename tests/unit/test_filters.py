@@ -0,0 +1,59 @@
+import mimetypes
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.filters import FileFilter, PatternMatcher
+
+@pytest.mark.parametrize('filename', [
+    'notes.txt', 'page.html', 'style.CSS', 'archive.tar.gz', 'notes.txt.gz',
+    'bundle.tgz', 'image.png', 'Makefile', '.bashrc', 'data.csv', 'script.sh',
+])
+def test_memoized_mime_lookup_matches_mimetypes(filename):
+    """Test that the per-suffix MIME memo agrees with mimetypes.guess_type."""
+    config = {'excluded_dirs': [], 'excluded_files': [],
+              'text_extensions': [], 'include_files': []}
+    mime_type, _ = mimetypes.guess_type(filename)
+    expected = mime_type is not None and mime_type.startswith('text')
+    assert FileFilter(config).is_text_name(filename) == expected
+
+@pytest.mark.parametrize('lines,relpath,is_dir,excluded', [
+    (['*.log'], 'a/b/debug.log', False, True),
+    (['/build'], 'build', True, True),
+    (['/build'], 'src/build', True, False),
+    (['build/'], 'src/build', True, True),
+    (['build/'], 'build', False, False),
+    (['docs/**/*.md'], 'docs/a/b/c.md', False, True),
+    (['docs/**/*.md'], 'other/docs/c.md', False, False),
+    (['*.md', '!README.md'], 'README.md', False, False),
+    (['*.md', '!README.md'], 'CHANGES.md', False, True),
+    (['# comment', ''], 'anything', False, False),
+    (['file[0-9].txt'], 'file3.txt', False, True),
+])
+def test_pattern_matcher_gitignore_semantics(lines, relpath, is_dir, excluded):
+    """Test the supported subset of .gitignore rules."""
+    assert PatternMatcher(lines).matches(relpath, is_dir) == excluded
+
+def test_glob_entries_in_exclusion_lists():
+    """Test that excluded_dirs and excluded_files accept globs."""
+    config = {'excluded_dirs': ['*.egg-info', '.git'],
+              'excluded_files': ['*.min.js'],
+              'text_extensions': ['.js', '.txt'], 'include_files': []}
+    file_filter = FileFilter(config)
+
+    assert not file_filter.include_dir('pkg.egg-info')
+    assert not file_filter.include_dir('.git')
+    assert file_filter.include_dir('src')
+    assert not file_filter.include_file('static/app.min.js')
+    assert file_filter.include_file('static/app.js')
+
+def test_capture_structure_with_exclude_patterns(temp_project_dir, tmp_path):
+    """Test exclude_patterns and the project's .gitignore during a capture."""
+    (temp_project_dir / ".gitignore").write_text("src/\n")
+    capturer = ProjectCapture({'exclude_patterns': ['test.json'], 'use_gitignore': True})
+    output_file = tmp_path / "output.txt"
+
+    capturer.capture_structure(str(temp_project_dir), str(output_file))
+
+    content = output_file.read_text()
+    assert "test.txt" in content
+    assert "test.json" not in content
+    assert "src" not in content
@@ -0,0 +1,54 @@
+import os
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.gitsource import GitSource
+
+def test_list_files_from_index(git_project_dir):
+    """Test that only tracked files are listed, in tree order."""
+    (git_project_dir / "untracked.txt").write_text("untracked")
+    files = GitSource(str(git_project_dir)).list_files()
+
+    assert [f.relpath for f in files] == [
+        ".gitignore", os.path.join("src", "test.py"), "test.json", "test.py", "test.txt"
+    ]
+
+def test_list_files_and_read_blobs_at_revision(git_project_dir):
+    """Test that a revision lists blob sizes and reads committed contents."""
+    (git_project_dir / "test.txt").write_text("edited after commit")
+    source = GitSource(str(git_project_dir), rev="HEAD")
+    try:
+        files = {f.relpath: f for f in source.list_files()}
+        assert files["test.txt"].size == len("test content")
+
+        assert source.read_blob(files["test.txt"].object_id) == (b"test content", False)
+        assert source.read_blob(files["test.txt"].object_id, limit=4) == (b"test", True)
+        # The stream stays in sync after a truncated read
+        assert source.read_blob(files["test.py"].object_id) == (b'print("test")', False)
+    finally:
+        source.close()
+
+def test_capture_structure_from_git(git_project_dir, tmp_path):
+    """Test capturing tracked files only."""
+    (git_project_dir / "build").mkdir()
+    (git_project_dir / "build" / "generated.py").write_text("generated = True")
+    (git_project_dir / "scratch.txt").write_text("not tracked")
+    output_file = tmp_path / "output.txt"
+
+    ProjectCapture({'source': 'git'}).capture_structure(str(git_project_dir), str(output_file))
+
+    content = output_file.read_text()
+    assert "# File: test.txt" in content
+    assert 'print("src test")' in content
+    assert "generated" not in content
+    assert "scratch.txt" not in content
+
+def test_capture_structure_from_git_revision(git_project_dir, tmp_path):
+    """Test that contents come from the requested revision."""
+    (git_project_dir / "test.txt").write_text("edited after commit")
+    output_file = tmp_path / "output.txt"
+
+    ProjectCapture({'source': 'git', 'git_rev': 'HEAD'}).capture_structure(
+        str(git_project_dir), str(output_file))
+
+    content = output_file.read_text()
+    assert "test content" in content
+    assert "edited after commit" not in content
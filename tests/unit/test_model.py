@@ -0,0 +1,61 @@
+import os
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.model import BLOB, FILE, DirNode, FileRecord
+
+def test_capture_returns_model(temp_project_dir, tmp_path):
+    """Test the records, lazy contents and on-demand tree rendering."""
+    (temp_project_dir / "empty").mkdir()
+    output_file = tmp_path / "output.txt"
+    capturer = ProjectCapture()
+    capturer.capture_structure(str(temp_project_dir), str(output_file))
+
+    with capturer.capture(str(temp_project_dir)) as result:
+        assert [record.relpath for record in result] == [
+            os.path.join('src', 'test.py'), 'test.json', 'test.py', 'test.txt']
+        record = result['test.json']
+        assert record.kind == FILE and record.size == len('{"test": "content"}')
+        assert record.mtime == os.stat(temp_project_dir / "test.json").st_mtime
+        assert record.read() == '{"test": "content"}'
+        assert 'test.bin' not in result
+        assert [r.name for r in result.select('*.py')] == ['test.py', 'test.py']
+        # Same tree as the text output, empty directories included
+        assert output_file.read_text().startswith(result.render_tree() + '\n\n# File:')
+        assert '── empty' in result.render_tree()
+
+def test_records_are_slotted():
+    """Test that records and nodes carry no per-instance dict."""
+    record = FileRecord('a.txt', 1, 0.0)
+    with pytest.raises(AttributeError):
+        record.extra = 1
+    with pytest.raises(AttributeError):
+        DirNode('root').extra = 1
+    with pytest.raises(ValueError):
+        record.read()
+
+def test_capture_applies_budget(temp_project_dir):
+    """Test that limits and skipped files follow the byte budget."""
+    result = ProjectCapture({'max_total_bytes': 20}).capture(str(temp_project_dir))
+    assert len(result) == 2
+    assert result['test.json'].truncated
+    assert result['test.json'].contents == '{"t'
+    assert result.total_size == 20
+    assert set(result.skipped) == {'test.py', 'test.txt'}
+    assert 'test.txt' in result.render_tree()
+
+def test_capture_git_revision(git_project_dir):
+    """Test that records at a revision read their blobs."""
+    capturer = ProjectCapture({'source': 'git', 'git_rev': 'HEAD'})
+    with capturer.capture(str(git_project_dir)) as result:
+        record = result['test.txt']
+        assert record.kind == BLOB and record.mtime is None
+        assert record.read() == 'test content'
+
+def test_capture_deep_tree(deep_project_dir, tmp_path):
+    """Test that deep trees are nested, walked and rendered without recursing."""
+    output_file = tmp_path / "output.txt"
+    ProjectCapture().capture_structure(str(deep_project_dir), str(output_file))
+
+    with ProjectCapture().capture(str(deep_project_dir)) as result:
+        assert result.render_tree() + '\n' in output_file.read_text()
+        assert [record.name for record in result.tree.walk()] == ["leaf.txt"]
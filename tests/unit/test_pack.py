@@ -0,0 +1,71 @@
+import os
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.pack import CaptureReader, PackFormatError
+
+def test_pack_round_trip(temp_project_dir, tmp_path):
+    """Test reading single files back from a pack capture."""
+    output_file = tmp_path / "output.pack"
+    ProjectCapture().capture_structure(str(temp_project_dir), str(output_file), format='pack')
+
+    with CaptureReader(str(output_file)) as reader:
+        assert len(reader) == 4
+        assert reader.paths()[0] == os.path.join('src', 'test.py')
+        assert reader.read('test.json') == '{"test": "content"}'
+        with reader.read_bytes('test.txt') as view:
+            assert bytes(view) == b'test content'
+        assert 'test.bin' not in reader
+        assert reader.tree.startswith('test_project\n')
+        assert reader.metadata is None
+        with pytest.raises(KeyError):
+            reader.read('missing.txt')
+
+def test_pack_budget_and_dedup(tmp_path):
+    """Test truncation, metadata and duplicates sharing a blob."""
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "a.txt").write_text("same ☃")
+    (project_dir / "b.txt").write_text("same ☃")
+    (project_dir / "c.txt").write_text("x" * 100)
+    output_file = tmp_path / "output.pack"
+    ProjectCapture({'dedup': True, 'max_file_bytes': 10}).capture_structure(
+        str(project_dir), str(output_file), format='pack')
+
+    with CaptureReader(str(output_file)) as reader:
+        assert reader.read('b.txt') == "same ☃"
+        assert reader.duplicates == {'b.txt': 'a.txt'}
+        assert reader.read('c.txt') == "x" * 10
+        assert reader.is_truncated('c.txt') and not reader.is_truncated('a.txt')
+        assert reader.metadata['truncated'] == ['c.txt']
+
+def test_pack_rejects_compression(temp_project_dir, tmp_path):
+    """Test that a pack cannot be written compressed."""
+    with pytest.raises(ValueError):
+        ProjectCapture().capture_structure(
+            str(temp_project_dir), str(tmp_path / "output.pack.gz"), format='pack')
+
+def test_reader_rejects_other_files(tmp_path):
+    """Test that non-pack files are refused."""
+    path = tmp_path / "output.json"
+    path.write_text('{"tree": "", "files": {}}')
+    with pytest.raises(PackFormatError):
+        CaptureReader(str(path))
+    empty = tmp_path / "empty.pack"
+    empty.write_bytes(b"")
+    with pytest.raises(PackFormatError):
+        CaptureReader(str(empty))
+
+def test_close_releases_views(temp_project_dir, tmp_path):
+    """Test that views still held at close are released, not an error."""
+    output_file = tmp_path / "output.pack"
+    ProjectCapture().capture_structure(str(temp_project_dir), str(output_file), format='pack')
+
+    reader = CaptureReader(str(output_file))
+    view = reader.read_bytes('test.txt')
+    part = view[:4]
+    reader.close()
+    with pytest.raises(ValueError):
+        bytes(view)
+    # A slice keeps the mapping alive until it is released
+    assert bytes(part) == b'test'
+    part.release()
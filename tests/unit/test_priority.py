@@ -0,0 +1,38 @@
+import os
+import pytest
+from sourcesnatcher.priority import (CONFIG, ENTRY_POINT, LAST, README, SOURCE, TEST,
+                                     classify, priority_key)
+from sourcesnatcher.walker import FileEntry
+
+@pytest.mark.parametrize('relpath,expected', [
+    ('README.md', README),
+    ('docs/readme.rst', README),
+    ('src/app/__main__.py', ENTRY_POINT),
+    ('pyproject.toml', CONFIG),
+    ('deploy/values.yaml', CONFIG),
+    ('src/app/models.py', SOURCE),
+    ('tests/test_models.py', TEST),
+    ('src/app/models_test.go', TEST),
+    ('tests/README.md', TEST),
+    ('web/app.spec.ts', TEST),
+    ('package-lock.json', LAST),
+    ('static/app.min.js', LAST),
+])
+def test_classify(relpath, expected):
+    """Test the priority class of common project files."""
+    assert classify(relpath) == expected
+
+def test_priority_key_orders_by_class_depth_then_recency(tmp_path):
+    """Test that files sort by class, root first, then most recently modified."""
+    paths = ['tests/test_a.py', 'b.py', 'a.py', 'docs/README.md', 'README.md', 'setup.cfg']
+    entries = []
+    for i, relpath in enumerate(paths):
+        path = tmp_path / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('x')
+        os.utime(path, (1000 + i, 1000 + i))
+        entries.append(FileEntry(str(path), relpath))
+
+    ordered = [entry.relpath for entry in sorted(entries, key=priority_key)]
+    assert ordered == ['README.md', 'docs/README.md', 'setup.cfg', 'a.py', 'b.py',
+                       'tests/test_a.py']
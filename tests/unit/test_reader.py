@@ -0,0 +1,88 @@
+import json
+import threading
+import time
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.pack import CaptureReader
+from sourcesnatcher.reader import MMAP_MIN_BYTES, RawContents, read_in_order, read_mapped
+from sourcesnatcher.stats import CaptureStats
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_read_in_order_preserves_order(workers):
+    """Test that results come back in input order regardless of timing."""
+    def read(n):
+        time.sleep(0.001 * (n % 3))
+        return n * 2
+
+    results = list(read_in_order(range(20), read, workers=workers))
+    assert results == [(n, n * 2) for n in range(20)]
+
+def test_read_in_order_bounds_in_flight_reads():
+    """Test that no more than window reads are outstanding."""
+    lock = threading.Lock()
+    started = []
+
+    def read(n):
+        with lock:
+            started.append(n)
+        return n
+
+    results = read_in_order(range(100), read, workers=2, window=3)
+    next(results)
+    time.sleep(0.05)
+    assert len(started) <= 4
+    results.close()
+
+def test_capture_structure_with_workers(temp_project_dir, tmp_path):
+    """Test that a parallel capture matches a serial one."""
+    serial = tmp_path / "serial.txt"
+    parallel = tmp_path / "parallel.txt"
+
+    ProjectCapture().capture_structure(str(temp_project_dir), str(serial))
+    ProjectCapture({'workers': 4}).capture_structure(str(temp_project_dir), str(parallel))
+
+    assert parallel.read_text() == serial.read_text()
+
+def test_read_mapped(tmp_path):
+    """Test that only ASCII without carriage returns skips decoding."""
+    ascii_file = tmp_path / "ascii.txt"
+    ascii_file.write_bytes(b"line\n" * 10)
+    contents, truncated = read_mapped(str(ascii_file), limit=12)
+    assert isinstance(contents, RawContents) and truncated
+    assert bytes(contents.data) == b"line\nline\nli"
+    assert contents.decode() == "line\nline\nli"
+    contents.close()
+
+    crlf_file = tmp_path / "crlf.txt"
+    crlf_file.write_bytes(b"line\r\n" * 2)
+    assert read_mapped(str(crlf_file)) == ("line\nline\n", False)
+
+    empty_file = tmp_path / "empty.txt"
+    empty_file.write_bytes(b"")
+    assert read_mapped(str(empty_file)) == ('', False)
+
+@pytest.mark.parametrize('format', ['text', 'json', 'pack'])
+def test_large_files_are_mapped(tmp_path, format):
+    """Test that mapped large files produce the same capture as small ones."""
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    body = "x = 1\n" * (MMAP_MIN_BYTES // 6 + 1)
+    (project_dir / "big.py").write_text(body)
+    (project_dir / "big.txt").write_text("☃ snow\n" * (MMAP_MIN_BYTES // 8 + 1))
+    output_file = tmp_path / f"output.{format}"
+    stats = CaptureStats()
+    ProjectCapture({'max_file_bytes': len(body) - 1}).capture_structure(
+        str(project_dir), str(output_file), format, stats=stats)
+
+    if format == 'pack':
+        with CaptureReader(str(output_file)) as reader:
+            assert reader.read('big.py') == body[:-1]
+            assert reader.read('big.txt').startswith("☃ snow\n")
+    elif format == 'json':
+        data = json.loads(output_file.read_text())
+        assert data['files']['big.py'] == body[:-1]
+        assert 'big.py' in data['metadata']['truncated']
+    else:
+        output = output_file.read_text()
+        assert f"# File: big.py (truncated)\n\n{body[:-1]}\n\n# File: big.txt" in output
+    assert stats.counters['output_chars'] >= len(body) - 1
@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import pytest
+from sourcesnatcher.capture_project import ProjectCapture
+from sourcesnatcher.serve import HIT, MISS, SHARED, CaptureCache, CaptureService, make_server
+
+@pytest.fixture
+def service(tmp_path):
+    return CaptureService(None, CaptureCache(str(tmp_path / "captures")),
+                          allowed_roots=[str(tmp_path)])
+
+def _read(result):
+    f, status, _ = result
+    with f:
+        return f.read(), status
+
+def test_repeat_capture_is_served_from_cache(service, temp_project_dir):
+    """Test that an unchanged tree is answered from the cache."""
+    first, status = _read(service.capture(str(temp_project_dir), 'json'))
+    assert status == MISS
+    assert json.loads(first)['files']['test.txt'] == "test content"
+
+    second, status = _read(service.capture(str(temp_project_dir), 'json'))
+    assert status == HIT
+    assert second == first
+
+def test_changed_tree_is_captured_again(service, temp_project_dir):
+    """Test that a modified file changes the fingerprint."""
+    f, _, before = service.capture(str(temp_project_dir))
+    f.close()
+    (temp_project_dir / "test.txt").write_text("changed content")
+
+    f, status, after = service.capture(str(temp_project_dir))
+    with f:
+        assert b"changed content" in f.read()
+    assert status == MISS
+    assert after != before
+
+def test_settings_are_part_of_the_key(service, temp_project_dir):
+    """Test that other formats and overrides are separate captures."""
+    assert _read(service.capture(str(temp_project_dir), 'text'))[1] == MISS
+    assert _read(service.capture(str(temp_project_dir), 'yaml'))[1] == MISS
+    data, status = _read(service.capture(str(temp_project_dir), 'text',
+                                         {'max_file_bytes': 4}))
+    assert status == MISS
+    assert "(truncated)" in data.decode()
+
+def test_concurrent_requests_share_one_walk(service, temp_project_dir, monkeypatch):
+    """Test that requests for a project being captured wait for that capture."""
+    walks = []
+    scan = ProjectCapture._scan
+
+    def slow_scan(self, *args, **kwargs):
+        walks.append(1)
+        time.sleep(0.2)
+        return scan(self, *args, **kwargs)
+
+    monkeypatch.setattr(ProjectCapture, '_scan', slow_scan)
+    results = []
+
+    def request():
+        results.append(_read(service.capture(str(temp_project_dir))))
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(walks) == 1
+    assert sorted(status for _, status in results) == [MISS, SHARED, SHARED, SHARED]
+    assert len({data for data, _ in results}) == 1
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the cache keeps at most max_entries captures."""
+    cache = CaptureCache(str(tmp_path), max_entries=2)
+    for key in ('a', 'b', 'c'):
+        path = cache.new_path()
+        with open(path, 'w') as f:
+            f.write(key)
+        cache.put((key,), path).close()
+        if key == 'b':
+            cache.open(('a',)).close()
+
+    assert cache.open(('b',)) is None
+    with cache.open(('a',)) as f:
+        assert f.read() == b'a'
+    assert len(cache) == 2
+
+def test_http_endpoints(service, temp_project_dir):
+    """Test the HTTP front end."""
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        url = f"{base}/capture?root={temp_project_dir}&format=json"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers['X-Capture-Cache'] == MISS
+            assert json.load(response)['files']['test.py'] == 'print("test")'
+
+        body = json.dumps({'root': str(temp_project_dir), 'format': 'json'}).encode()
+        with urllib.request.urlopen(f"{base}/capture", data=body) as response:
+            assert response.headers['X-Capture-Cache'] == HIT
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/capture?root={temp_project_dir / 'missing'}")
+        assert error.value.code == 404
+        error.value.close()
+
+        body = json.dumps({'root': str(temp_project_dir),
+                           'config': {'cache_dir': '/tmp/elsewhere'}}).encode()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{base}/capture", data=body)
+        assert error.value.code == 400
+        error.value.close()
+
+        with urllib.request.urlopen(f"{base}/stats") as response:
+            assert json.load(response)['hit'] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@pytest.mark.parametrize('overrides', [
+    {'include_files': ['passwd'], 'excluded_dirs': []},
+    {'cache_dir': '/tmp/elsewhere'},
+    {'source': 'git', 'git_rev': 'HEAD'},
+])
+def test_unsafe_overrides_are_rejected(service, temp_project_dir, tmp_path, overrides):
+    """Test that requests cannot change filters, the source or the cache."""
+    with pytest.raises(ValueError):
+        service.capture(str(temp_project_dir), 'text', overrides)
+    assert service.stats()['entries'] == 0
+
+def test_roots_outside_allowed_roots_are_refused(temp_project_dir, tmp_path):
+    """Test that only roots inside the allowed roots are captured."""
+    service = CaptureService(None, CaptureCache(str(tmp_path / "captures")),
+                             allowed_roots=[str(temp_project_dir)])
+    _read(service.capture(str(temp_project_dir / "src")))
+    for root in (str(tmp_path), str(temp_project_dir) + "-other",
+                 str(temp_project_dir / ".." / "..")):
+        with pytest.raises(PermissionError):
+            service.capture(root)
+
+def test_symlinks_cannot_leave_allowed_roots(temp_project_dir, tmp_path):
+    """Test that symlinks out of an allowed root are not followed."""
+    secret = tmp_path / "secret"
+    secret.mkdir()
+    (secret / "key.txt").write_text("do not serve")
+    (temp_project_dir / "outside").symlink_to(secret)
+    (temp_project_dir / "key.txt").symlink_to(secret / "key.txt")
+    service = CaptureService({'symlinks': 'follow'}, CaptureCache(str(tmp_path / "captures")),
+                             allowed_roots=[str(temp_project_dir)])
+
+    body, _ = _read(service.capture(str(temp_project_dir)))
+    assert b"do not serve" not in body
+    assert b"outside" not in body
+
+def test_service_without_allowed_roots_refuses_every_root(temp_project_dir, tmp_path):
+    """Test that a service with no allowed roots captures nothing."""
+    service = CaptureService(None, CaptureCache(str(tmp_path / "captures")))
+    with pytest.raises(PermissionError):
+        service.capture(str(temp_project_dir))
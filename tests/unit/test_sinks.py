@@ -0,0 +1,50 @@
+import bz2
+import gzip
+import json
+import lzma
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.sinks import compression_for, open_sink
+
+@pytest.mark.parametrize('suffix,opener', [
+    ('.gz', gzip.open), ('.xz', lzma.open), ('.bz2', bz2.open),
+])
+def test_compressed_sink_from_suffix(tmp_path, suffix, opener):
+    """Test that the output suffix selects the compressor."""
+    output = tmp_path / f"capture.txt{suffix}"
+    with open_sink(str(output)) as f:
+        f.write("compressed ☃ contents")
+
+    with opener(output, 'rt') as f:
+        assert f.read() == "compressed ☃ contents"
+
+def test_compression_for_plain_output():
+    """Test that plain outputs are not compressed."""
+    assert compression_for("capture.json") is None
+    assert compression_for("capture.json.GZ") == "gzip"
+
+def test_split_sink_writes_parts_and_index(tmp_path):
+    """Test that split output concatenates back to the original stream."""
+    output = tmp_path / "capture.txt"
+    text = "".join(f"line {i}\n" for i in range(1000))
+    with open_sink(str(output), split_bytes=1000) as f:
+        f.write(text)
+
+    index = json.loads((tmp_path / "capture.txt.index.json").read_text())
+    assert len(index['parts']) == (len(text) + 999) // 1000
+    assert all(size == 1000 for size in index['sizes'][:-1])
+    joined = b"".join((tmp_path / part).read_bytes() for part in index['parts'])
+    assert joined.decode() == text
+    assert not output.exists()
+
+def test_capture_structure_gzip_split(temp_project_dir, tmp_path):
+    """Test a compressed, split capture end to end."""
+    output = tmp_path / "capture.json.gz"
+    ProjectCapture({'split_mb': 0.0001}).capture_structure(
+        str(temp_project_dir), str(output), format='json')
+
+    index = json.loads((tmp_path / "capture.json.gz.index.json").read_text())
+    assert index['compression'] == 'gzip'
+    joined = b"".join((tmp_path / part).read_bytes() for part in index['parts'])
+    data = json.loads(gzip.decompress(joined))
+    assert 'test.txt' in data['files']
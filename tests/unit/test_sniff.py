@@ -0,0 +1,44 @@
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.sniff import Sniffer, looks_like_text
+
+@pytest.mark.parametrize('prefix,expected', [
+    (b'', True),
+    (b'plain ascii\n', True),
+    ('unicode ☃ text'.encode('utf-8'), True),
+    ('cut off ☃'.encode('utf-8')[:-1], True),
+    ('latin-1 café'.encode('latin-1'), True),
+    (b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR', False),
+    (b'\x01\x02\x03\x04\x05\x06\x07\x08abc', False),
+])
+def test_looks_like_text(prefix, expected):
+    """Test the NUL-byte and UTF-8 validity heuristics."""
+    assert looks_like_text(prefix) == expected
+
+def test_sniffer_reads_bounded_prefix_and_caches(tmp_path):
+    """Test that only the prefix is read and decisions are cached."""
+    path = tmp_path / "blob.txt"
+    path.write_bytes(b"text" * 10 + b"\0" * 100000)
+    sniffer = Sniffer(prefix_bytes=16)
+
+    # The NUL bytes are past the prefix, so this looks like text
+    assert sniffer.is_text(str(path))
+    assert len(sniffer._cache) == 1
+
+    path.write_bytes(b"\0binary")
+    assert not sniffer.is_text(str(path))
+
+def test_capture_structure_with_sniffing(temp_project_dir, tmp_path):
+    """Test that sniffing keeps extensionless text and drops disguised binaries."""
+    (temp_project_dir / "LICENSE").write_text("MIT License")
+    (temp_project_dir / "dump.txt").write_bytes(b"\0\1\2\3" * 1000)
+    output_file = tmp_path / "output.txt"
+
+    ProjectCapture({'sniff_binary': True}).capture_structure(
+        str(temp_project_dir), str(output_file))
+
+    content = output_file.read_text()
+    assert "# File: LICENSE" in content
+    assert "dump.txt" not in content
+    assert "# File: test.py" in content
+    assert "test.bin" not in content
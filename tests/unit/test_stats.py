@@ -0,0 +1,30 @@
+import os
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.stats import CaptureStats
+
+def test_capture_structure_collects_stats(temp_project_dir, tmp_path):
+    """Test that phases, counters and skip reasons are recorded."""
+    stats = CaptureStats(slowest=2)
+    ProjectCapture().capture_structure(
+        str(temp_project_dir), str(tmp_path / "output.json"), format='json', stats=stats)
+
+    report = stats.report()
+    assert set(report['phases']) >= {'walk', 'filter', 'read', 'serialize', 'write', 'total'}
+    assert report['counters']['files_included'] == 4
+    assert report['counters']['files_seen'] == 5
+    assert report['counters']['dirs_excluded'] == 2
+    assert report['skipped'] == {'filtered': 1}
+    assert report['counters']['bytes_included'] > 0
+    assert len(report['slowest_files']) == 2
+
+def test_stats_hooks_are_called(temp_project_dir, tmp_path):
+    """Test the phase and per-file callbacks."""
+    phases = []
+    files = []
+    stats = CaptureStats(on_phase=lambda name, seconds: phases.append(name),
+                         on_file=lambda relpath, seconds, chars: files.append(relpath))
+    ProjectCapture({'workers': 2}).capture_structure(
+        str(temp_project_dir), str(tmp_path / "output.txt"), stats=stats)
+
+    assert 'walk' in phases and 'total' in phases
+    assert sorted(files) == sorted([os.path.join('src', 'test.py'), 'test.json', 'test.py', 'test.txt'])
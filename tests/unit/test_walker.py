@@ -0,0 +1,113 @@
+import json
+import os
+import pytest
+from sourcesnatcher.walker import scan_project
+
+def test_scan_project_tree_and_manifest(temp_project_dir):
+    """Test that a single walk yields both the tree and the file manifest."""
+    scan = scan_project(
+        str(temp_project_dir),
+        lambda relpath: relpath not in ['.git', 'node_modules'],
+        lambda relpath: not relpath.endswith('.bin')
+    )
+
+    assert scan.tree_lines[0] == "test_project"
+    assert "└── test.txt" in scan.tree_lines
+    assert "│   └── test.py" in scan.tree_lines
+    assert not any(".git" in line for line in scan.tree_lines)
+
+    relpaths = [entry.relpath for entry in scan.files]
+    assert relpaths == [os.path.join("src", "test.py"), "test.json", "test.py", "test.txt"]
+
+def test_scan_project_filters_each_file_once(temp_project_dir):
+    """Test that the file filter runs exactly once per file."""
+    seen = []
+
+    def include_file(relpath):
+        seen.append(relpath)
+        return True
+
+    scan_project(str(temp_project_dir), lambda relpath: True, include_file)
+
+    assert len(seen) == len(set(seen))
+    assert os.path.join("src", "test.py") in seen
+
+@pytest.fixture
+def linked_project(tmp_path):
+    """A project with a symlink cycle, a symlinked directory and a hard link."""
+    project_dir = tmp_path / "linked"
+    (project_dir / "src" / "pkg").mkdir(parents=True)
+    (project_dir / "src" / "pkg" / "mod.py").write_text('print("mod")')
+    (project_dir / "src" / "pkg" / "loop").symlink_to("..")
+    (project_dir / "vendor").symlink_to("src")
+    os.link(project_dir / "src" / "pkg" / "mod.py", project_dir / "hard.py")
+    return project_dir
+
+def test_scan_project_visits_each_directory_once(linked_project):
+    """Test that symlink cycles and symlinked directories are entered once."""
+    scan = scan_project(str(linked_project), lambda relpath: True, lambda relpath: True)
+
+    assert "│       ├── loop -> .." in scan.tree_lines
+    assert "└── vendor -> src" in scan.tree_lines
+    relpaths = [entry.relpath for entry in scan.files]
+    assert relpaths == ["hard.py", os.path.join("src", "pkg", "mod.py")]
+
+def test_scan_project_marks_linked_copies(linked_project):
+    """Test that a second path to the same file points at the first."""
+    scan = scan_project(str(linked_project), lambda relpath: True, lambda relpath: True)
+
+    assert scan.files[0].same_as is None
+    assert scan.files[1].same_as == "hard.py"
+
+def test_scan_project_skips_symlinks(linked_project):
+    """Test that the skip policy leaves symlinks out of tree and manifest."""
+    scan = scan_project(str(linked_project), lambda relpath: True, lambda relpath: True,
+                        follow_symlinks=False)
+
+    assert not any("loop" in line or "vendor" in line for line in scan.tree_lines)
+
+def test_scan_project_max_depth(linked_project):
+    """Test that directories at max_depth are shown but not entered."""
+    scan = scan_project(str(linked_project), lambda relpath: True, lambda relpath: True,
+                        max_depth=2)
+
+    assert "│   └── pkg" in scan.tree_lines
+    assert [entry.relpath for entry in scan.files] == ["hard.py"]
+
+def test_scan_project_deep_tree(deep_project_dir):
+    """Test that trees deeper than the recursion limit can be walked."""
+    scan = scan_project(str(deep_project_dir), lambda relpath: True, lambda relpath: True)
+
+    assert len(scan.files) == 1
+    assert scan.files[0].relpath.endswith("leaf.txt")
+
+def test_capture_writes_linked_copies_in_full(linked_project, tmp_path):
+    """Test that a hard link is read once but written under both paths."""
+    from sourcesnatcher import ProjectCapture
+
+    output_file = tmp_path / "output.json"
+    ProjectCapture({'text_extensions': ['.py']}).capture_structure(
+        str(linked_project), str(output_file), format='json')
+
+    data = json.loads(output_file.read_text())
+    assert data['files'] == {"hard.py": 'print("mod")',
+                             os.path.join("src", "pkg", "mod.py"): 'print("mod")'}
+    assert 'duplicates' not in data
+
+def test_capture_dedup_links_to_a_regular_path(tmp_path):
+    """Test that with dedup a symlink refers to its target, not the reverse."""
+    from sourcesnatcher import ProjectCapture
+
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    (project_dir / "small.txt").write_text("small")
+    (project_dir / "link.txt").symlink_to("small.txt")
+    os.link(project_dir / "small.txt", project_dir / "zz.txt")
+
+    output_file = tmp_path / "output.json"
+    ProjectCapture({'dedup': True}).capture_structure(
+        str(project_dir), str(output_file), format='json')
+
+    data = json.loads(output_file.read_text())
+    assert data['files'] == {"link.txt": "small", "small.txt": "small"}
+    assert data['duplicates'] == {"zz.txt": "small.txt"}
@@ -0,0 +1,157 @@
+import os
+import shutil
+import threading
+import pytest
+from sourcesnatcher import ProjectCapture
+from sourcesnatcher.watch import Watcher
+
+def fresh_capture(project_dir, tmp_path, format, config=None):
+    output_file = tmp_path / f"fresh.{format}"
+    ProjectCapture(config).capture_structure(str(project_dir), str(output_file), format)
+    return output_file.read_text()
+
+@pytest.mark.parametrize('format', ['text', 'json'])
+def test_watcher_matches_fresh_capture(temp_project_dir, tmp_path, format):
+    """Test that updates produce the same output as a full capture."""
+    output_file = tmp_path / f"watched.{format}"
+    watcher = Watcher(ProjectCapture(), str(temp_project_dir), str(output_file), format)
+    watcher.start()
+    assert output_file.read_text() == fresh_capture(temp_project_dir, tmp_path, format)
+
+    (temp_project_dir / "test.txt").write_text("changed content, longer")
+    (temp_project_dir / "new.md").write_text("# new")
+    (temp_project_dir / "docs" / "deep").mkdir(parents=True)
+    (temp_project_dir / "docs" / "deep" / "guide.md").write_text("guide")
+    shutil.rmtree(temp_project_dir / "src")
+    assert watcher.poll() > 0
+    watcher.write()
+
+    assert output_file.read_text() == fresh_capture(temp_project_dir, tmp_path, format)
+    assert not list(tmp_path.glob(".watched*"))
+
+def test_watcher_only_reads_changed_files(temp_project_dir, tmp_path):
+    """Test that unchanged files are not read again."""
+    capturer = ProjectCapture()
+    watcher = Watcher(capturer, str(temp_project_dir), str(tmp_path / "out.txt"))
+    watcher.start()
+
+    reads = []
+    read_entry = capturer._read_entry
+    capturer._read_entry = lambda entry, *args: reads.append(entry.relpath) or read_entry(entry, *args)
+    (temp_project_dir / "test.py").write_text('print("edited")')
+    assert watcher.poll() == 1
+    watcher.write()
+    assert reads == ['test.py']
+    assert watcher.poll() == 0
+
+@pytest.mark.parametrize('format', ['text', 'pack'])
+def test_watcher_copies_unchanged_entries(temp_project_dir, tmp_path, monkeypatch, format):
+    """Test that only changed entries are serialized, and the rest copied."""
+    from sourcesnatcher.writers import WRITERS
+
+    config = {'max_file_bytes': 10}
+    output_file = tmp_path / f"watched.{format}"
+    watcher = Watcher(ProjectCapture(config), str(temp_project_dir), str(output_file), format)
+    watcher.start()
+
+    written = []
+    write_file = WRITERS[format].write_file
+    monkeypatch.setattr(WRITERS[format], 'write_file',
+                        lambda self, relpath, *args: written.append(relpath)
+                        or write_file(self, relpath, *args))
+    (temp_project_dir / "test.py").write_text('print("edited")')
+    watcher.poll()
+    watcher.write()
+    assert written == ['test.py']
+
+    fresh_file = tmp_path / f"fresh.{format}"
+    ProjectCapture(config).capture_structure(str(temp_project_dir), str(fresh_file), format)
+    assert output_file.read_bytes() == fresh_file.read_bytes()
+
+    # An output changed by someone else is not copied from
+    output_file.write_text("")
+    watcher.write()
+    assert output_file.read_bytes() == fresh_file.read_bytes()
+
+def test_watcher_ignores_output_inside_project(temp_project_dir, tmp_path):
+    """Test that an output written into the project is not seen as a change."""
+    output_file = temp_project_dir / "capture.txt"
+    (temp_project_dir / "link.txt").symlink_to("capture.txt")
+    watcher = Watcher(ProjectCapture(), str(temp_project_dir), str(output_file))
+    watcher.start()
+    assert "# File: capture.txt" not in output_file.read_text()
+    assert watcher.poll() == 0
+
+    watcher.write()
+    assert watcher.poll() == 0
+    assert "# File: link.txt" not in output_file.read_text()
+
+def test_watcher_budget_follows_changes(temp_project_dir, tmp_path):
+    """Test that a file growing past the total budget drops later files."""
+    config = {'max_total_bytes': 100}
+    output_file = tmp_path / "out.json"
+    watcher = Watcher(ProjectCapture(config), str(temp_project_dir), str(output_file), 'json')
+    watcher.start()
+    (temp_project_dir / "src" / "test.py").write_text("x" * 200)
+    watcher.poll()
+    watcher.write()
+    assert output_file.read_text() == fresh_capture(temp_project_dir, tmp_path, 'json', config)
+
+def test_watch_runs_until_stopped(temp_project_dir, tmp_path):
+    """Test the polling loop, debouncing and the update callback."""
+    output_file = tmp_path / "out.txt"
+    updated = threading.Event()
+    stop = threading.Event()
+    capturer = ProjectCapture()
+    thread = threading.Thread(target=capturer.watch, args=(str(temp_project_dir), str(output_file)),
+                              kwargs={'interval': 0.02, 'debounce': 0.05, 'stop': stop,
+                                      'on_update': lambda changes: updated.set()})
+    thread.start()
+    try:
+        while not output_file.exists():
+            stop.wait(0.01)
+        (temp_project_dir / "test.txt").write_text("watched edit, longer")
+        assert updated.wait(5)
+    finally:
+        stop.set()
+        thread.join()
+    assert "watched edit" in output_file.read_text()
+
+def test_watch_rejects_stdout(temp_project_dir):
+    """Test that watch mode needs an output file."""
+    with pytest.raises(ValueError):
+        Watcher(ProjectCapture(), str(temp_project_dir), '-')
+
+def test_watcher_symlink_cycle(temp_project_dir, tmp_path):
+    """Test that a symlink cycle is listed once, as in a full capture."""
+    (temp_project_dir / "src" / "loop").symlink_to("..")
+    output_file = tmp_path / "watched.txt"
+    watcher = Watcher(ProjectCapture(), str(temp_project_dir), str(output_file))
+    watcher.start()
+
+    assert "loop -> .." in output_file.read_text()
+    assert output_file.read_text() == fresh_capture(temp_project_dir, tmp_path, 'text')
+
+def test_watcher_deep_tree(deep_project_dir, tmp_path):
+    """Test that deep trees are listed, rendered and dropped without recursing."""
+    output_file = tmp_path / "watched.txt"
+    watcher = Watcher(ProjectCapture(), str(deep_project_dir), str(output_file))
+    watcher.start()
+    assert output_file.read_text() == fresh_capture(deep_project_dir, tmp_path, 'text')
+
+    (deep_project_dir / "d").rename(deep_project_dir / "e")
+    assert watcher.poll() > 0
+    watcher.write()
+    assert output_file.read_text() == fresh_capture(deep_project_dir, tmp_path, 'text')
+
+def test_watcher_keeps_contents_in_cache(temp_project_dir, tmp_path):
+    """Test that contents live in a session cache, not in memory."""
+    watcher = Watcher(ProjectCapture(), str(temp_project_dir), str(tmp_path / "out.txt"))
+    watcher.start()
+    cache_dir = watcher._source.cache.cache_dir
+    assert (tmp_path / "out.txt").exists()
+    assert os.path.exists(os.path.join(cache_dir, 'index.json'))
+    assert all(not hasattr(watched, 'text') for watched in watcher._files.values())
+
+    watcher.close()
+    assert not os.path.exists(cache_dir)
@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import pytest
+import yaml
+from sourcesnatcher.writers import YamlWriter, get_writer
+
+SAMPLE_FILES = {
+    'a.txt': 'plain text',
+    'b.yaml': 'key: value\nlist:\n  - 1\n',
+    'c.json': '123',
+    'd.txt': 'yes',
+    'e.txt': '',
+    'f.py': 'print("unicode ☃")\n\ttabbed\n',
+}
+
+def _write(format, files, compact=False):
+    stream = io.StringIO()
+    writer = get_writer(format, stream, compact)
+    writer.begin('project\n└── a.txt')
+    for relpath, contents in files.items():
+        writer.write_file(relpath, contents)
+    writer.end()
+    return stream.getvalue()
+
+@pytest.mark.parametrize('files', [SAMPLE_FILES, {}])
+def test_json_writer_matches_json_dump(files):
+    """Test that the incremental JSON encoder matches json.dump output."""
+    expected = json.dumps({'tree': 'project\n└── a.txt', 'files': files}, indent=2)
+    assert _write('json', files) == expected
+
+@pytest.mark.parametrize('files', [SAMPLE_FILES, {}])
+def test_compact_json_matches_json_dump(files):
+    """Test that compact mode matches json.dump without whitespace."""
+    expected = json.dumps({'tree': 'project\n└── a.txt', 'files': files},
+                          separators=(',', ':'))
+    assert _write('json', files, compact=True) == expected
+
+@pytest.mark.parametrize('dumper', [yaml.SafeDumper, getattr(yaml, 'CSafeDumper', yaml.SafeDumper)])
+def test_yaml_writer_backends(dumper):
+    """Test that both emitters write file bodies as literal blocks."""
+    stream = io.StringIO()
+    writer = YamlWriter(stream, dumper=dumper)
+    writer.begin('project\n└── a.txt')
+    for relpath, contents in SAMPLE_FILES.items():
+        writer.write_file(relpath, contents)
+    writer.end()
+    output = stream.getvalue()
+    assert 'b.yaml: |\n    key: value\n' in output
+    assert yaml.safe_load(output)['files'] == SAMPLE_FILES
+
+@pytest.mark.parametrize('files', [SAMPLE_FILES, {}])
+def test_yaml_writer_round_trips(files):
+    """Test that the YAML emitter keeps every value a string."""
+    data = yaml.safe_load(_write('yaml', files))
+    assert data == {'tree': 'project\n└── a.txt', 'files': files}
+
+def test_text_writer_sections():
+    """Test the plain text layout."""
+    output = _write('text', {'a.txt': 'plain text'})
+    assert output == 'project\n└── a.txt\n\n# File: a.txt\n\nplain text'
+
+@pytest.mark.parametrize('dumper', [yaml.SafeDumper, getattr(yaml, 'CSafeDumper', yaml.SafeDumper)])
+def test_yaml_writer_keeps_unicode_line_breaks(dumper):
+    """Test that NEL and the Unicode separators are not read back as newlines."""
+    files = {'a.txt': 'one\x85two\nthree four '}
+    stream = io.StringIO()
+    writer = YamlWriter(stream, dumper=dumper)
+    writer.begin('project\n└── a.txt')
+    writer.write_file('a.txt', files['a.txt'])
+    writer.end()
+    assert yaml.safe_load(stream.getvalue())['files'] == files
+
+def test_yaml_capture_of_undecodable_name(tmp_path):
+    """Test that a file name that is not valid UTF-8 is written escaped."""
+    from sourcesnatcher import ProjectCapture
+
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    name = os.fsdecode(b'caf\xe9.txt')
+    (project_dir / name).write_text("menu")
+    output_file = tmp_path / "output.yaml"
+    ProjectCapture().capture_structure(str(project_dir), str(output_file), format='yaml')
+
+    data = yaml.safe_load(output_file.read_text(encoding='utf-8'))
+    assert data['files'] == {name: "menu"}
+    assert name in data['tree']